@@ -0,0 +1,303 @@
+"""
+Cache Compaction
+Merges overlapping neff tables into supersets and retires redundant files
+"""
+
+import os
+import sys
+import json
+import shutil
+import numpy as np
+from Lumerical import neff_table
+
+INDEX_FILENAME = "index.json"
+RETIRED_FOLDER = "retired"
+
+# voltages closer than this are treated as the same point when merging
+VOLTAGE_DECIMALS = 9
+
+
+def index_path(cache_folder):
+    return os.path.join(cache_folder, INDEX_FILENAME)
+
+
+def load_index(cache_folder):
+    """
+    Load the cache index
+
+    Args:
+        cache_folder: Platform cache folder
+
+    Returns:
+        dict: {'neff': [entries with 'segments']}, empty if there is no index
+    """
+    path = index_path(cache_folder)
+    if not os.path.exists(path):
+        return {'neff': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_index(cache_folder, index):
+    """
+    Replace the cache index atomically (readers see the old or the new one)
+
+    Args:
+        cache_folder: Platform cache folder
+        index: Index dictionary
+    """
+    path = index_path(cache_folder)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def segments_cover(segments, min_v, max_v, interval_v):
+    """
+    Check whether a set of sampled segments serves a request
+
+    Every voltage in [min_v, max_v] must lie in a segment sampled at least
+    as finely as interval_v
+
+    Args:
+        segments: List of {'min_v', 'max_v', 'interval_v'}
+        min_v: Requested minimum voltage
+        max_v: Requested maximum voltage
+        interval_v: Requested voltage interval
+
+    Returns:
+        bool: True if the request is covered
+    """
+    fine = sorted(
+        (s['min_v'], s['max_v']) for s in segments
+        if s['interval_v'] <= interval_v
+    )
+
+    # tolerate float noise in voltages parsed from filenames
+    eps = 10 ** -VOLTAGE_DECIMALS
+    reached = None
+    for start, stop in fine:
+        if stop < min_v - eps:
+            continue
+        if reached is None:
+            if start > min_v + eps:
+                return False
+            reached = stop
+        elif start > reached + eps:
+            break
+        else:
+            reached = max(reached, stop)
+        if reached >= max_v - eps:
+            return True
+    return False
+
+
+def entry_segments(entry):
+    """Segments described by a cache entry (a plain file is one segment)"""
+    if 'segments' in entry:
+        return entry['segments']
+    return [{
+        'min_v': entry['min_v'],
+        'max_v': entry['max_v'],
+        'interval_v': entry['interval_v'],
+    }]
+
+
+def merge_neff_tables(paths, intervals):
+    """
+    Merge neff tables into a sorted, deduplicated superset
+
+    Where tables overlap, the row from the finest table wins
+
+    Args:
+        paths: neff .txt files (rows of "V Re(neff) Im(neff)")
+        intervals: Voltage interval of each file
+
+    Returns:
+        np.ndarray: Merged rows, sorted by voltage
+    """
+    # finest first so np.unique keeps its rows
+    order = np.argsort(intervals, kind="stable")
+    tables = [np.atleast_2d(np.loadtxt(paths[i])) for i in order]
+    rows = np.concatenate(tables)
+
+    keys = np.round(rows[:, 0], VOLTAGE_DECIMALS)
+    _, first = np.unique(keys, return_index=True)
+    return rows[first]
+
+
+def intervals_compatible(a, b):
+    """True if one voltage grid nests in the other (intervals are integer multiples)"""
+    fine, coarse = sorted((a, b))
+    if fine <= 0:
+        return False
+    ratio = coarse / fine
+    return abs(ratio - round(ratio)) <= 1e-6 * ratio
+
+
+def mergeable_groups(entries):
+    """
+    Split neff entries of one wavelength into groups that can be merged
+
+    An entry joins a group if its voltage range overlaps or touches the
+    group's and its interval is compatible with every member's, so a merged
+    table never spans a gap or mixes unrelated grids
+
+    Args:
+        entries: Cache entries at the same laser wavelength
+
+    Returns:
+        list: Lists of entries, each covering one contiguous voltage range
+    """
+    eps = 10 ** -VOLTAGE_DECIMALS
+    groups = []
+    for entry in sorted(entries, key=lambda e: (e['min_v'], e['max_v'])):
+        for group in groups:
+            touches = entry['min_v'] <= max(e['max_v'] for e in group) + eps
+            if touches and all(intervals_compatible(entry['interval_v'], e['interval_v']) for e in group):
+                group.append(entry)
+                break
+        else:
+            groups.append([entry])
+    return groups
+
+
+def retire(cache_folder, filename):
+    """Move a redundant file out of the lookup path (load_cache ignores subfolders)"""
+    retired_folder = os.path.join(cache_folder, RETIRED_FOLDER)
+    os.makedirs(retired_folder, exist_ok=True)
+    shutil.move(os.path.join(cache_folder, filename), os.path.join(retired_folder, filename))
+
+
+def redundant_entries(entries, covers):
+    """
+    Find entries fully served by another entry
+
+    Args:
+        entries: Cache entries of one kind
+        covers: covers(a, b) -> True if a serves every request b serves
+
+    Returns:
+        list: Redundant entries
+    """
+    redundant = []
+    for i, entry in enumerate(entries):
+        for j, other in enumerate(entries):
+            if i == j or other in redundant:
+                continue
+            # on exact ties only the later entry is retired
+            if covers(other, entry) and not (covers(entry, other) and i < j):
+                redundant.append(entry)
+                break
+    return redundant
+
+
+def compact(api):
+    """
+    Compact the cache of the API's current platform
+
+    neff tables at the same laser wavelength whose voltage ranges overlap or
+    touch and whose intervals are compatible are merged into one superset
+    (see mergeable_groups); the others stay separate. Adaptive and mode
+    tracked tables are left as they are.
+    Heat and active waveguide files that another file fully covers are
+    retired (their binary formats are not merged).
+
+    Args:
+        api: API instance with the cache loaded (see API.load_cache)
+
+    Returns:
+        dict: {'merged': new neff files, 'retired': retired files}
+    """
+    cache_folder = api.get_cache_folder()
+    index = load_index(cache_folder)
+    indexed = {e['filename']: e for e in index.get('neff', [])}
+
+    merged_files = []
+    retired_files = []
+
+    # ---- neff: merge contiguous runs per laser wavelength ----
+    by_wavelength = {}
+    for entry in api.neff:
+        # adaptive and mode tracked tables keep their own sampling
+        if neff_table.parse_sampling(entry['filename']) != (None, False):
+            continue
+        entry = indexed.get(entry['filename'], entry)
+        by_wavelength.setdefault(entry['laser_wavelength'], []).append(entry)
+    groups = [(laser_wavelength, group) for laser_wavelength, entries in by_wavelength.items()
+              for group in mergeable_groups(entries)]
+
+    neff_index = []
+    for laser_wavelength, entries in groups:
+        if len(entries) < 2:
+            neff_index.extend(e for e in entries if 'segments' in e)
+            continue
+
+        paths = [os.path.join(cache_folder, e['filename']) for e in entries]
+        rows = merge_neff_tables(paths, [e['interval_v'] for e in entries])
+
+        segments = []
+        for e in entries:
+            segments.extend(entry_segments(e))
+
+        # same convention as the solver outputs: the name holds the requested
+        # range, not the last sampled voltage
+        min_v = min(s['min_v'] for s in segments)
+        max_v = max(s['max_v'] for s in segments)
+        # the range is contiguous, so the filename can carry the coarsest
+        # interval, which is always safe for lookups that ignore the index
+        interval_v = max(s['interval_v'] for s in segments)
+        filename = f"neff_{laser_wavelength}_{min_v}_{max_v}_{interval_v}_merged.txt"
+
+        output_path = os.path.join(cache_folder, filename)
+        tmp_path = output_path + ".tmp"
+        np.savetxt(tmp_path, rows, fmt="%.17g")
+        os.replace(tmp_path, output_path)
+
+        neff_index.append({
+            'laser_wavelength': laser_wavelength,
+            'min_v': min_v,
+            'max_v': max_v,
+            'interval_v': interval_v,
+            'filename': filename,
+            'segments': segments,
+        })
+        merged_files.append(filename)
+        retired_files.extend(e['filename'] for e in entries if e['filename'] != filename)
+
+        print(f"  ✓ Merged {len(entries)} neff tables at {laser_wavelength*1e9:.2f}nm into {filename} ({len(rows)} points)")
+
+    # index first: if we crash before retiring, the old files are only duplicates
+    index['neff'] = neff_index
+    write_index(cache_folder, index)
+
+    # ---- heat / active waveguide: retire fully covered files ----
+    def heat_covers(a, b):
+        return (a['min_v'] <= b['min_v'] and a['max_v'] >= b['max_v'] and
+                a['interval_v'] <= b['interval_v'])
+
+    def activebentwg_covers(a, b):
+        return (heat_covers(a, b) and
+                a['start_wavelength'] <= b['start_wavelength'] and
+                a['end_wavelength'] >= b['end_wavelength'])
+
+    for entries, covers in ((api.wgT, heat_covers), (api.activebentwg, activebentwg_covers)):
+        retired_files.extend(e['filename'] for e in redundant_entries(entries, covers))
+
+    for filename in retired_files:
+        retire(cache_folder, filename)
+        print(f"  • Retired {filename}")
+
+    return {'merged': merged_files, 'retired': retired_files}
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from API.main import API
+
+    api = API()
+    api.set_platform(sys.argv[1] if len(sys.argv) > 1 else 'sipho')
+    api.compact_cache()
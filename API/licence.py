@@ -0,0 +1,116 @@
+"""
+Licence Gate
+Lets background work use the solvers only while no foreground job needs them
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Preempted(Exception):
+    """Raised inside background work when a foreground job needs the licence"""
+
+
+class LicenceGate:
+    """
+    Tracks foreground jobs so background work can yield to them
+
+    Background work runs inside background(). A foreground job waits for
+    it to stop (it sees Preempted at its next check) before it starts, so
+    the two never drive the solvers or write the same files at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._foreground = 0
+        self._background = set()  # threads running background work
+        self._last_release = 0.0
+
+    @contextmanager
+    def foreground(self):
+        """Hold the solvers for a foreground job"""
+        self.hold()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def hold(self):
+        """
+        Hold the solvers until release(), e.g. while a solver session is
+        left open between foreground jobs. Blocks until running background
+        work has stopped.
+        """
+        with self._lock:
+            self._foreground += 1
+            self._lock.notify_all()
+            # wait for background work to see Preempted and clean up
+            current = threading.get_ident()
+            while self._background - {current}:
+                self._lock.wait()
+
+    def release(self):
+        """Undo one hold()"""
+        with self._lock:
+            self._foreground -= 1
+            self._last_release = time.time()
+            self._lock.notify_all()
+
+    @contextmanager
+    def background(self):
+        """
+        Run background work; foreground jobs wait until it is left
+
+        Raises:
+            Preempted: if a foreground job holds the solvers already
+        """
+        current = threading.get_ident()
+        with self._lock:
+            if self._foreground > 0:
+                raise Preempted("Foreground job holds the licence")
+            self._background.add(current)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._background.discard(current)
+                self._lock.notify_all()
+
+    def is_busy(self):
+        """True while a foreground job holds the solvers"""
+        with self._lock:
+            return self._foreground > 0
+
+    def check(self):
+        """
+        Called by background work between solves
+
+        Raises:
+            Preempted: if a foreground job is waiting for the licence
+        """
+        if self.is_busy():
+            raise Preempted("Foreground job needs the licence")
+
+    def wait_idle(self, idle_delay=0.0, stop_event=None):
+        """
+        Block until no foreground job has run for idle_delay seconds
+
+        Args:
+            idle_delay: Seconds of inactivity required after the last job
+            stop_event: Optional threading.Event that aborts the wait
+
+        Returns:
+            bool: True when idle, False if stop_event was set
+        """
+        with self._lock:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                if self._foreground == 0:
+                    remaining = self._last_release + idle_delay - time.time()
+                    if remaining <= 0:
+                        return True
+                    self._lock.wait(min(remaining, 1.0))
+                else:
+                    self._lock.wait(1.0)
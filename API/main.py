@@ -1,6 +1,21 @@
 import os
+import time
+import numpy as np
 from pprint import pprint
 from Lumerical import interface
+from Lumerical import neff_table
+from API import telemetry
+from API.runtime_model import RuntimeModel
+from API.licence import LicenceGate
+from API import compaction
+from API import replay
+from API.replay import MissingArtifactsError
+from Analysis.sweep_dataset import SweepDataset
+
+def grid_points(grid):
+    """Number of configurations in a sweep grid (see API.sweep)"""
+    return int(np.prod([len(np.atleast_1d(values)) for values in grid.values()]))
+
 
 class API:
 
@@ -8,6 +23,10 @@ class API:
         self.init = True
         self.platform = 'sipho'  # Default platform
         self.ic_connection = None  # Para mantener INTERCONNECT abierto si es necesario
+        self.ic_session = None  # Loaded INTERCONNECT project reused between runs
+        self.licence_gate = LicenceGate()  # Shared with the background prefetcher
+        self.interrupt = None  # Checked between solves (used by background work)
+        self.prefetcher = None
 
     def set_platform(self, platform):
         """
@@ -45,6 +64,7 @@ class API:
         activebentwg = []
         passivebentwg = []
         neff = []
+        neff_multi = []
 
         print(f"📂 Loading cache from: {cache_folder}")
 
@@ -66,11 +86,29 @@ class API:
                     parts = filename.split("_")
                     if len(parts) >= 5:
                         _, laser_wavelength, min_v, max_v, interval_v = parts[0], parts[1], parts[2], parts[3], parts[4]
+                        adaptive_tol, track_mode = neff_table.parse_sampling(filename)
                         neff.append({
                             "laser_wavelength": float(laser_wavelength),
                             "min_v": float(min_v),
                             "max_v": float(max_v),
                             "interval_v": float(interval_v),
+                            "adaptive_tol": adaptive_tol,
+                            "track_mode": track_mode,
+                            "filename": filename,
+                        })
+
+                elif filename.startswith("neffwl_") and filename.endswith(".txt"):
+                    parts = filename.split("_")
+                    if len(parts) >= 7:
+                        min_v, max_v, interval_v = parts[4], parts[5], parts[6]
+                        adaptive_tol, track_mode = neff_table.parse_sampling(filename)
+                        neff_multi.append({
+                            "wavelengths": neff_table.read_wavelengths(os.path.join(root, filename)) or [],
+                            "min_v": float(min_v),
+                            "max_v": float(max_v),
+                            "interval_v": float(interval_v),
+                            "adaptive_tol": adaptive_tol,
+                            "track_mode": track_mode,
                             "filename": filename,
                         })
 
@@ -98,12 +136,20 @@ class API:
                         })
             break
 
+        # merged neff tables are sampled at different intervals per voltage
+        # region, the index keeps those segments for lookups
+        indexed = {e['filename']: e for e in compaction.load_index(cache_folder).get('neff', [])}
+        for entry in neff:
+            if entry['filename'] in indexed:
+                entry['segments'] = indexed[entry['filename']]['segments']
+
         self.wgT = wgT
         self.activebentwg = activebentwg
         self.passivebentwg = passivebentwg
         self.neff = neff
+        self.neff_multi = neff_multi
         
-        print(f"  ✓ Loaded: {len(wgT)} heat sims | {len(activebentwg)} active WG | {len(passivebentwg)} passive WG | {len(neff)} neff")
+        print(f"  ✓ Loaded: {len(wgT)} heat sims | {len(activebentwg)} active WG | {len(passivebentwg)} passive WG | {len(neff)} neff | {len(neff_multi)} multi-wavelength neff")
 
     def get_param_suggestions(self):
         print("📋 Getting parameter suggestions from cache...")
@@ -133,79 +179,194 @@ class API:
             'constant_v': str(constant_v)
         }
 
-    def get_heat_sim(self):
-        cached_to_use = None
+    def find_cached_heat_sim(self, inputs):
         for cached in self.wgT:
-            if (self.inputs['max_v'] <= cached['max_v'] and
-                self.inputs['min_v'] >= cached['min_v'] and
-                self.inputs['interval_v'] >= cached['interval_v']):
-                cached_to_use = cached
-                break
+            if (inputs['max_v'] <= cached['max_v'] and
+                inputs['min_v'] >= cached['min_v'] and
+                inputs['interval_v'] >= cached['interval_v']):
+                return cached
+        return None
+
+    def find_cached_passivebentwg_sim(self, inputs):
+        for cached in self.passivebentwg:
+            if (inputs['start_wavelength'] >= cached['start_wavelength'] and
+                inputs['end_wavelength'] <= cached['end_wavelength']):
+                return cached
+        return None
+
+    def find_cached_activebentwg_sim(self, inputs):
+        for cached in self.activebentwg:
+            if (inputs['min_v'] >= cached['min_v'] and
+                inputs['max_v'] <= cached['max_v'] and
+                inputs['interval_v'] >= cached['interval_v'] and
+                inputs['start_wavelength'] >= cached['start_wavelength'] and
+                inputs['end_wavelength'] <= cached['end_wavelength']):
+                return cached
+        return None
+
+    def find_cached_effective_index_sim(self, inputs):
+        for cached in self.neff:
+            if not neff_table.serves_sampling(cached, inputs):
+                continue
+            if 'segments' in cached:
+                if (compaction.segments_cover(cached['segments'], inputs['min_v'],
+                                              inputs['max_v'], inputs['interval_v']) and
+                    inputs['source_wavelength'] <= cached['laser_wavelength']):
+                    return cached
+            elif (inputs['min_v'] >= cached['min_v'] and
+                inputs['max_v'] <= cached['max_v'] and
+                inputs['interval_v'] >= cached['interval_v'] and
+                inputs['source_wavelength'] <= cached['laser_wavelength']):
+                return cached
+
+        # a single wavelength can be served from a column of a multi-wavelength table
+        multi = self.find_cached_multi_neff_sim(inputs, [inputs['source_wavelength']])
+        if multi:
+            return self.multi_neff_column(multi, inputs['source_wavelength'])
+        return None
+
+    def find_cached_multi_neff_sim(self, inputs, wavelengths):
+        """
+        Find a multi-wavelength neff table covering the voltage range at
+        every requested wavelength
+
+        Args:
+            inputs: Dictionary with simulation parameters
+            wavelengths: Wavelengths that must all be columns of the table
+
+        Returns:
+            dict: Cache entry, or None
+        """
+        for cached in getattr(self, 'neff_multi', []):
+            if (neff_table.serves_sampling(cached, inputs) and
+                inputs['min_v'] >= cached['min_v'] and
+                inputs['max_v'] <= cached['max_v'] and
+                inputs['interval_v'] >= cached['interval_v'] and
+                all(np.isclose(cached['wavelengths'], w, rtol=0, atol=1e-15).any() for w in wavelengths)):
+                return cached
+        return None
+
+    def multi_neff_column(self, multi, wavelength):
+        """
+        Cache entry of the single wavelength neff_* table derived from one
+        column of a multi-wavelength table. The file itself is written by
+        extract_multi_neff_column, so lookups (e.g. plan) stay read-only.
+        """
+        return {
+            "laser_wavelength": wavelength,
+            "min_v": multi['min_v'],
+            "max_v": multi['max_v'],
+            "interval_v": multi['interval_v'],
+            "adaptive_tol": multi.get('adaptive_tol'),
+            "track_mode": multi.get('track_mode', False),
+            "filename": (f"neff_{wavelength}_{multi['min_v']}_{multi['max_v']}_{multi['interval_v']}_extracted_"
+                         f"{neff_table.sampling_suffix(multi.get('adaptive_tol'), multi.get('track_mode', False))}.txt"),
+            "source": multi['filename'],
+        }
+
+    def extract_multi_neff_column(self, cached):
+        """
+        Write the neff_* file of an entry from multi_neff_column if needed
+
+        Returns:
+            str: Path to the neff_* file
+        """
+        path = f"{self.get_cache_folder()}/" + cached['filename']
+        if not os.path.exists(path):
+            neff_table.extract_wavelength(f"{self.get_cache_folder()}/" + cached['source'],
+                                          cached['laser_wavelength'], path)
+            self.neff.append({k: v for k, v in cached.items() if k != 'source'})
+        return path
+
+    def get_heat_sim(self):
+        cached_to_use = self.find_cached_heat_sim(self.inputs)
 
         if cached_to_use:
             print("✓ Using cached heat simulation: " + cached_to_use['filename'])
             return f"{self.get_cache_folder()}/" + cached_to_use['filename']
         else:
             print("⚙ Running new heat simulation...")
-            return interface.heat(self.inputs)
+            start = time.time()
+            filename = interface.heat(self.inputs)
+            telemetry.record_stage('heat', self.platform, self.inputs, time.time() - start)
+            return filename
 
     def get_passivebentwg_sim(self):
-        cached_to_use = None
-        for cached in self.passivebentwg:
-            if (self.inputs['start_wavelength'] >= cached['start_wavelength'] and
-                self.inputs['end_wavelength'] <= cached['end_wavelength']):
-                cached_to_use = cached
-                break
+        cached_to_use = self.find_cached_passivebentwg_sim(self.inputs)
 
         if cached_to_use:
             print("✓ Using cached passivebentwg simulation: " + cached_to_use['filename'])
             return f"{self.get_cache_folder()}/" + cached_to_use['filename']
         else:
             print("⚙ Running new passivebentwg simulation...")
-            return interface.passivebentwg(self.inputs)
+            start = time.time()
+            filename = interface.passivebentwg(self.inputs)
+            telemetry.record_stage('passivebentwg', self.platform, self.inputs, time.time() - start)
+            return filename
 
     def get_activebentwg_sim(self):
-        cached_to_use = None
-        for cached in self.activebentwg:
-            if (self.inputs['min_v'] >= cached['min_v'] and
-                self.inputs['max_v'] <= cached['max_v'] and
-                self.inputs['interval_v'] >= cached['interval_v'] and
-                self.inputs['start_wavelength'] >= cached['start_wavelength'] and
-                self.inputs['end_wavelength'] <= cached['end_wavelength']):
-                cached_to_use = cached
-                break
+        cached_to_use = self.find_cached_activebentwg_sim(self.inputs)
 
         if cached_to_use:
             print("✓ Using cached activebentwg simulation: " + cached_to_use['filename'])
             return f"{self.get_cache_folder()}/" + cached_to_use['filename']
         else:
             print("⚙ Running new activebentwg simulation...")
+            start = time.time()
             filename, mode = interface.activebentwg(self.inputs)
+            telemetry.record_stage('activebentwg', self.platform, self.inputs, time.time() - start)
             # this can then be used for neff calc, rather than reconfiguring a sim
             self.lum_mode = mode
             return filename
 
     def get_effective_index_sim(self):
-        cached_to_use = None
-        for cached in self.neff:
-            if (self.inputs['min_v'] >= cached['min_v'] and
-                self.inputs['max_v'] <= cached['max_v'] and
-                self.inputs['interval_v'] >= cached['interval_v'] and
-                self.inputs['source_wavelength'] <= cached['laser_wavelength']):
-                cached_to_use = cached
-                break
+        cached_to_use = self.find_cached_effective_index_sim(self.inputs)
+        wavelengths = self.inputs.get('source_wavelengths')
 
         lum_mode = self.lum_mode if hasattr(self, 'lum_mode') else None
-        if cached_to_use:
+        # the session is closed below either way, never reuse it
+        self.lum_mode = None
+        if cached_to_use and not wavelengths:
             print("✓ Using cached effective_index simulation: " + cached_to_use['filename'])
             # if lum_mode is defined we should close it to minimize resources
             # (since this sim is cached, so we dont need it)
             if lum_mode is not None:
                 lum_mode.close()
+            if 'source' in cached_to_use:
+                return self.extract_multi_neff_column(cached_to_use)
             return f"{self.get_cache_folder()}/" + cached_to_use['filename']
-        else:
-            print("⚙ Running new effective_index simulation...")
-            return interface.effective_index(self.inputs, lum_mode)
+
+        if wavelengths:
+            # multi-wavelength tables are requested explicitly, the operating
+            # wavelength column is what the rest of the flow consumes
+            multi = self.find_cached_multi_neff_sim(self.inputs, list(wavelengths) + [self.inputs['source_wavelength']])
+            if multi:
+                print("✓ Using cached multi-wavelength effective_index simulation: " + multi['filename'])
+                if lum_mode is not None:
+                    lum_mode.close()
+            else:
+                print("⚙ Running new multi-wavelength effective_index simulation...")
+                start = time.time()
+                path = interface.effective_index(self.inputs, lum_mode, self.interrupt)
+                telemetry.record_stage('effective_index', self.platform, self.inputs, time.time() - start)
+                adaptive_tol, track_mode = neff_table.parse_sampling(path)
+                multi = {
+                    "wavelengths": neff_table.read_wavelengths(path),
+                    "min_v": self.inputs['min_v'],
+                    "max_v": self.inputs['max_v'],
+                    "interval_v": self.inputs['interval_v'],
+                    "adaptive_tol": adaptive_tol,
+                    "track_mode": track_mode,
+                    "filename": os.path.basename(path),
+                }
+                self.neff_multi.append(multi)
+            return self.extract_multi_neff_column(self.multi_neff_column(multi, self.inputs['source_wavelength']))
+
+        print("⚙ Running new effective_index simulation...")
+        start = time.time()
+        filename = interface.effective_index(self.inputs, lum_mode, self.interrupt)
+        telemetry.record_stage('effective_index', self.platform, self.inputs, time.time() - start)
+        return filename
 
     def get_interconnect_sim(self):
         # INTERCONNECT file is platform-specific
@@ -213,9 +374,256 @@ class API:
         print(f"📁 Using INTERCONNECT file: {platform_path}")
         return platform_path
 
-    def run(self, inputs):
+    def find_cached_interconnect_results(self, inputs):
+        key = replay.interconnect_key(self.platform, inputs)
+        for streamed in (True, False):
+            path = replay.results_path(self.get_cache_folder(), key, streamed)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def resolve_offline(self, inputs, pinned_files=None, pinned_results=None):
+        """
+        Resolve every stage from the cache without touching Lumerical
+
+        Args:
+            inputs: Dictionary with simulation parameters
+            pinned_files: Optional stage files from a run manifest, used as
+                long as they still exist
+            pinned_results: Optional memoized INTERCONNECT results from a
+                run manifest, used as long as they still exist
+
+        Returns:
+            tuple: (files dict, path to memoized INTERCONNECT results)
+
+        Raises:
+            MissingArtifactsError: listing every artifact the cache lacks
+        """
+        pinned_files = pinned_files or {}
+        finders = {
+            'heat': self.find_cached_heat_sim,
+            'passivebentwg': self.find_cached_passivebentwg_sim,
+            'activebentwg': self.find_cached_activebentwg_sim,
+            'effective_index': self.find_cached_effective_index_sim,
+        }
+
+        voltages = f"{inputs['min_v']}-{inputs['max_v']} V at interval <= {inputs['interval_v']} V"
+        wavelengths = f"{inputs['start_wavelength']*1e9:.2f}-{inputs['end_wavelength']*1e9:.2f} nm"
+        requirements = {
+            'heat': f"heat: wgT_* covering {voltages}",
+            'passivebentwg': f"passivebentwg: passivebentwg_* covering {wavelengths}",
+            'activebentwg': f"activebentwg: activebentwg_* covering {wavelengths}, {voltages}",
+            'effective_index': f"effective_index: neff_* at {inputs['source_wavelength']*1e9:.2f} nm covering {voltages}",
+        }
+
+        files = {}
+        missing = []
+        for stage, finder in finders.items():
+            pinned = pinned_files.get(stage)
+            if pinned and os.path.exists(pinned):
+                files[stage] = pinned
+                continue
+
+            cached = finder(inputs)
+            if cached and 'source' in cached:
+                files[stage] = self.extract_multi_neff_column(cached)
+            elif cached:
+                files[stage] = f"{self.get_cache_folder()}/" + cached['filename']
+            else:
+                missing.append(requirements[stage])
+
+        files['interconnect'] = f"Lumerical/platforms/{self.platform}/weight_bank.icp"
+
+        results_file = self.find_cached_interconnect_results(inputs)
+        if pinned_results and os.path.exists(pinned_results):
+            results_file = pinned_results
+        if results_file is None:
+            key = replay.interconnect_key(self.platform, inputs)
+            missing.append(f"interconnect: memoized results {replay.results_path(self.get_cache_folder(), key)}")
+
+        if missing:
+            raise MissingArtifactsError(missing)
+
+        return files, results_file
+
+    def find_partial_sim(self, stage, inputs):
+        """
+        Find a cached file that covers part of what a stage needs
+
+        A partial hit overlaps the requested voltage/wavelength range but is
+        either too narrow or too coarse, so the stage still has to run
+
+        Args:
+            stage: Stage name
+            inputs: Dictionary with simulation parameters
+
+        Returns:
+            dict: Cache entry, or None if nothing overlaps
+        """
+        def overlaps(start, stop, cached_start, cached_stop):
+            return start <= cached_stop and stop >= cached_start
+
+        if stage == 'heat':
+            candidates = [c for c in self.wgT
+                          if overlaps(inputs['min_v'], inputs['max_v'], c['min_v'], c['max_v'])]
+        elif stage == 'passivebentwg':
+            candidates = [c for c in self.passivebentwg
+                          if overlaps(inputs['start_wavelength'], inputs['end_wavelength'],
+                                      c['start_wavelength'], c['end_wavelength'])]
+        elif stage == 'activebentwg':
+            candidates = [c for c in self.activebentwg
+                          if overlaps(inputs['min_v'], inputs['max_v'], c['min_v'], c['max_v']) and
+                          overlaps(inputs['start_wavelength'], inputs['end_wavelength'],
+                                   c['start_wavelength'], c['end_wavelength'])]
+        elif stage == 'effective_index':
+            candidates = [c for c in self.neff
+                          if overlaps(inputs['min_v'], inputs['max_v'], c['min_v'], c['max_v']) and
+                          inputs['source_wavelength'] <= c['laser_wavelength']]
+        else:
+            candidates = []
+
+        return candidates[0] if candidates else None
+
+    def plan(self, inputs, grid=None):
+        """
+        Dry-run the simulation: work out what each stage would do without
+        launching any solver
+
+        Args:
+            inputs: Dictionary with simulation parameters (same as run)
+            grid: Optional sweep grid (same as sweep); INTERCONNECT then
+                runs once per grid point
+
+        Returns:
+            dict: {
+                'platform': platform name,
+                'stages': list of {'stage', 'status', 'file', 'estimated_time'}
+                          where status is 'cached', 'partial' or 'run',
+                'estimated_time': total estimated seconds (None if unknown)
+            }
+        """
+        finders = {
+            'heat': self.find_cached_heat_sim,
+            'passivebentwg': self.find_cached_passivebentwg_sim,
+            'activebentwg': self.find_cached_activebentwg_sim,
+            'effective_index': self.find_cached_effective_index_sim,
+        }
+        runtime_model = RuntimeModel.from_telemetry()
+
+        stages = []
+        for stage in telemetry.STAGES:
+            if stage == 'interconnect':
+                # sweeps are not memoized like single runs
+                results_file = None if grid else self.find_cached_interconnect_results(inputs)
+                cached = {'filename': os.path.basename(results_file)} if results_file else None
+            else:
+                cached = finders[stage](inputs)
+            partial = None if cached else self.find_partial_sim(stage, inputs)
+
+            if cached:
+                status = 'cached'
+                filename = f"{self.get_cache_folder()}/" + cached['filename']
+                estimated_time = 0.0
+            else:
+                status = 'partial' if partial else 'run'
+                filename = f"{self.get_cache_folder()}/" + partial['filename'] if partial else None
+                estimated_time = runtime_model.predict(stage, self.platform, inputs)
+                if grid and stage == 'interconnect' and estimated_time is not None:
+                    estimated_time *= grid_points(grid)
+
+            stages.append({
+                'stage': stage,
+                'status': status,
+                'file': filename,
+                'estimated_time': estimated_time,
+            })
+
+        times = [s['estimated_time'] for s in stages]
+        total = None if None in times else sum(times)
+
+        return {
+            'platform': self.platform,
+            'stages': stages,
+            'estimated_time': total,
+        }
+
+    def describe_plan(self, plan):
+        """
+        Human readable summary of a plan, shared by the CLI and GUI
+
+        Args:
+            plan: Dictionary returned by plan()
+
+        Returns:
+            list: Lines of text
+        """
+        def format_time(seconds):
+            if seconds is None:
+                return "no timing history"
+            if seconds < 60:
+                return f"{seconds:.0f}s"
+            if seconds < 3600:
+                return f"{seconds / 60:.1f}min"
+            return f"{seconds / 3600:.1f}h"
+
+        labels = {
+            'cached': "✓ cached",
+            'partial': "◐ partial",
+            'run': "⚙ run",
+        }
+
+        lines = [f"Platform: {plan['platform'].upper()}"]
+        for stage in plan['stages']:
+            line = f"{stage['stage']}: {labels[stage['status']]}"
+            if stage['file']:
+                line += f" ({os.path.basename(stage['file'])})"
+            if stage['status'] != 'cached':
+                line += f" ~ {format_time(stage['estimated_time'])}"
+            lines.append(line)
+        lines.append(f"Estimated total: {format_time(plan['estimated_time'])}")
+
+        return lines
+
+    def get_stage_files(self):
+        """
+        Resolve every upstream stage for self.inputs, from the cache or by
+        running the solver
+
+        Returns:
+            dict: Stage name -> file path
+        """
+        return {
+            'heat': self.get_heat_sim(),
+            'passivebentwg': self.get_passivebentwg_sim(),
+            'activebentwg': self.get_activebentwg_sim(),
+            'effective_index': self.get_effective_index_sim(),
+            'interconnect': self.get_interconnect_sim()
+        }
+
+    def run(self, inputs, offline=False, pinned_files=None, pinned_results=None):
+        """
+        Run the full simulation chain
+
+        Args:
+            inputs: Dictionary with simulation parameters. With
+                reuse_interconnect the project stays loaded for the next run
+                (and holds its licence) until close_interconnect
+            offline: Serve every stage, including INTERCONNECT, from the cache
+                and never load lumapi
+            pinned_files: Stage files to prefer in offline mode (from a manifest)
+            pinned_results: INTERCONNECT results to prefer in offline mode
+                (from a manifest)
+
+        Returns:
+            dict: {'files': stage files, 'results': INTERCONNECT monitor arrays,
+                   'dataset': the results as an Analysis SweepDataset,
+                   'manifest': path to the run manifest}
+
+        Raises:
+            MissingArtifactsError: in offline mode, if anything is not cached
+        """
         print("\n" + "="*70)
-        print("🚀 RUNNING SIMULATION")
+        print("🚀 RUNNING SIMULATION" + (" (OFFLINE REPLAY)" if offline else ""))
         print("="*70)
         print(f"Platform: {self.platform.upper()}")
         print(f"Cache folder: {self.get_cache_folder()}")
@@ -223,27 +631,241 @@ class API:
         pprint(inputs)
         print("="*70 + "\n")
         
-        self.inputs = inputs
+        if offline:
+            self.inputs = inputs
+            files, results_file = self.resolve_offline(inputs, pinned_files, pinned_results)
 
-        files = {
-            'heat': self.get_heat_sim(),
-            'passivebentwg': self.get_passivebentwg_sim(),
-            'activebentwg': self.get_activebentwg_sim(),
-            'effective_index': self.get_effective_index_sim(),
-            'interconnect': self.get_interconnect_sim()
+            print("📂 Files served from cache:")
+            for key, value in files.items():
+                print(f"  • {key}: {value}")
+            print(f"  • results: {results_file}\n")
+
+            results = replay.load_results(results_file)
+            return {
+                'files': files,
+                'results': results,
+                'dataset': SweepDataset.from_results(results),
+                'manifest': None,
+            }
+
+        with self.licence_gate.foreground():
+            self.inputs = inputs
+            files = self.get_stage_files()
+
+            print("\n📂 Files to be used in simulation:")
+            for key, value in files.items():
+                print(f"  • {key}: {value}")
+            print()
+
+            # memoize the monitor outputs so the run can be replayed offline;
+            # streamed results go to disk in chunks and come back memory mapped
+            results_file = replay.results_path(
+                self.get_cache_folder(), replay.interconnect_key(self.platform, inputs),
+                streamed=inputs.get('stream_results', False)
+            )
+
+            # keeping the project loaded so the next run only updates what
+            # changed is opt-in, the open project holds a licence
+            reuse = inputs.get('reuse_interconnect', False)
+
+            start = time.time()
+            session = interface.interconnect(inputs, files, results_file,
+                                             session=self.get_ic_session() if reuse else None)
+            telemetry.record_stage('interconnect', self.platform, inputs, time.time() - start)
+
+            # Si el usuario quiere mantener INTERCONNECT abierto, guardar la referencia
+            if inputs.get('keep_interconnect_open', False):
+                # tracked like a reused session so close_interconnect releases it
+                if session is not self.ic_session:
+                    self.close_interconnect()
+                    self.ic_session = session
+                    self.licence_gate.hold()
+                self.ic_connection = session.ic
+                print("\n✓ INTERCONNECT connection reference saved in API object")
+                print("  (This keeps the window open until the program exits)\n")
+
+        manifest = replay.write_manifest(
+            inputs.get('output_dir', './results'), self.platform, inputs, files, results_file
+        )
+        print(f"📝 Run manifest: {manifest}")
+
+        results = replay.load_results(results_file)
+        return {
+            'files': files,
+            'results': results,
+            'dataset': SweepDataset.from_results(results),
+            'manifest': manifest,
         }
 
-        print("\n📂 Files to be used in simulation:")
-        for key, value in files.items():
-            print(f"  • {key}: {value}")
-        print()
+    def sweep(self, inputs, grid, results=None, as_dataset=False):
+        """
+        Run a grid of INTERCONNECT configurations as one native sweep
 
-        # CRÍTICO: Capturar el objeto ic retornado
-        ic = interface.interconnect(inputs, files)
-        
-        # Si el usuario quiere mantener INTERCONNECT abierto, guardar la referencia
-        if inputs.get('keep_interconnect_open', False):
-            self.ic_connection = ic
-            print("\n✓ INTERCONNECT connection reference saved in API object")
-            print("  (This keeps the window open until the program exits)\n")
-        # Si no, el objeto se destruirá automáticamente y cerrará INTERCONNECT
\ No newline at end of file
+        Args:
+            inputs: Dictionary with simulation parameters (same as run)
+            grid: Ordered dict of interface.SWEEP_PARAMETERS name -> values
+                ('laser_frequency', 'dc_amplitude')
+            results: Optional name -> result path (see interface.sweep)
+            as_dataset: Return an Analysis.sweep_dataset.SweepDataset
+
+        Returns:
+            dict: interface.sweep output, one NumPy array per result with the
+                grid axes first (or the SweepDataset built from it)
+        """
+        with self.licence_gate.foreground():
+            self.inputs = inputs
+            files = self.get_stage_files()
+
+            session = self.get_ic_session() if inputs.get('reuse_interconnect', False) else None
+            start = time.time()
+            output = interface.sweep(dict(inputs, platform=self.platform), grid, files,
+                                     session=session, results=results)
+            # timed per grid point, each one is an INTERCONNECT run like run()'s
+            telemetry.record_stage('interconnect', self.platform, inputs, (time.time() - start) / grid_points(grid))
+
+        if as_dataset:
+            return SweepDataset.from_sweep(output)
+        return output
+
+    def get_ic_session(self):
+        """
+        INTERCONNECT session on the platform weight bank, loaded on first use
+
+        Returns:
+            interface.InterconnectSession
+        """
+        icp_file = self.get_interconnect_sim()
+        if self.ic_session is not None and self.ic_session.icp_file != icp_file:
+            self.close_interconnect()
+        if self.ic_session is None:
+            self.ic_session = interface.InterconnectSession(icp_file)
+            # background work must not compete for the licence it holds
+            self.licence_gate.hold()
+        return self.ic_session
+
+    def close_interconnect(self):
+        """
+        Close the reused or kept open INTERCONNECT project, releasing its
+        licence. Call it when the application shuts down.
+        """
+        if self.ic_session is not None:
+            self.ic_session.close()
+            self.ic_session = None
+            self.ic_connection = None
+            self.licence_gate.release()
+
+    def replay_run(self, manifest_path):
+        """
+        Replay a previous run from its manifest, purely from the cache
+
+        Args:
+            manifest_path: Manifest written by run()
+
+        Returns:
+            dict: Same as run()
+        """
+        manifest = replay.load_manifest(manifest_path)
+        self.set_platform(manifest['platform'])
+        self.load_cache()
+        if replay.interconnect_key(self.platform, manifest['inputs']) != manifest['key']:
+            print(f"⚠ Manifest inputs no longer hash to {manifest['key']}, replaying its recorded results")
+        return self.run(manifest['inputs'], offline=True, pinned_files=manifest['files'],
+                        pinned_results=manifest.get('results'))
+
+    def resonance_sweep(self, inputs, backend='analytic', **sweep_options):
+        """
+        Wavelength sweep that samples densely only inside each resonance
+
+        Args:
+            inputs: Dictionary with simulation parameters (start_wavelength,
+                end_wavelength and, for the analytic model, constant_v or min_v)
+            backend: 'analytic' (ring model from the platform tables) or
+                'lumerical' (INTERCONNECT laser sweep, one sweep per pass)
+            **sweep_options: Passed to Analysis.resonance_sweep.adaptive_sweep
+
+        Returns:
+            tuple: (wavelength, drop, thru) merged non-uniform spectrum
+        """
+        from Analysis.resonance_sweep import adaptive_sweep, ring_model_spectrum
+        from Analysis.ring_model import RingModel
+
+        if backend == 'analytic':
+            model = RingModel.from_platform(self.platform)
+            voltage = inputs.get('constant_v', inputs.get('min_v'))
+            spectrum = ring_model_spectrum(model, voltage)
+            return adaptive_sweep(spectrum, inputs['start_wavelength'], inputs['end_wavelength'], **sweep_options)
+        elif backend == 'lumerical':
+            inputs = dict(inputs, platform=self.platform)
+            with self.licence_gate.foreground():
+                # every pass reuses the project, it is closed afterwards
+                # unless reuse_interconnect is set
+                try:
+                    return adaptive_sweep(
+                        lambda wavelengths: interface.laser_sweep(inputs, wavelengths, session=self.get_ic_session()),
+                        inputs['start_wavelength'], inputs['end_wavelength'], **sweep_options
+                    )
+                finally:
+                    if not inputs.get('reuse_interconnect', False):
+                        self.close_interconnect()
+        raise ValueError(f"Invalid backend: {backend}. Must be 'analytic' or 'lumerical'")
+
+    def calibration(self, inputs, refresh=False):
+        """
+        Weight -> heater voltage calibration at the source wavelength
+
+        Built from the cached neff sim covering the inputs if there is one,
+        otherwise from the platform neff table
+
+        Args:
+            inputs: Dictionary with source_wavelength, min_v, max_v, interval_v
+            refresh: Rebuild the cached table
+
+        Returns:
+            Analysis.calibration.CalibrationTable
+        """
+        from Analysis.calibration import get_calibration
+
+        cached = self.find_cached_effective_index_sim(inputs) if hasattr(self, 'neff') else None
+        neff_path = None
+        if cached and 'source' not in cached:
+            neff_path = f"{self.get_cache_folder()}/" + cached['filename']
+
+        table = get_calibration(self.platform, inputs['source_wavelength'], inputs['min_v'],
+                                inputs['max_v'], inputs['interval_v'], neff_path=neff_path, refresh=refresh)
+        print(f"✓ Calibration: {table} | {table.resolution(inputs['interval_v'])['bits']:.1f} bits at {inputs['interval_v']} V")
+        return table
+
+    def compact_cache(self):
+        """
+        Merge overlapping neff tables of the current platform into supersets
+        and retire files that other cached files fully cover
+        """
+        print(f"🗜 Compacting cache: {self.get_cache_folder()}")
+        with self.licence_gate.foreground():
+            self.load_cache()
+            result = compaction.compact(self)
+            self.load_cache()
+        print(f"  ✓ {len(result['merged'])} merged | {len(result['retired'])} retired")
+        return result
+
+    def start_prefetcher(self, top_k=3, idle_delay=60.0):
+        """
+        Opt in to background precomputation of likely-needed artifacts
+
+        The prefetcher only uses the solvers while no run() is active and
+        yields at the next solve boundary when one starts
+
+        Args:
+            top_k: Number of predicted requests to keep warm
+            idle_delay: Seconds without foreground jobs before prefetching
+        """
+        from API.prefetch import Prefetcher
+
+        if self.prefetcher is None:
+            self.prefetcher = Prefetcher(self, top_k=top_k, idle_delay=idle_delay)
+        self.prefetcher.start()
+
+    def stop_prefetcher(self):
+        """Stop background precomputation"""
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
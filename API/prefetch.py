@@ -0,0 +1,184 @@
+"""
+Background Prefetcher
+Precomputes heat, active waveguide and neff artifacts for the requests we
+expect next, using the solvers only while no foreground job needs them
+"""
+
+import threading
+from collections import Counter
+from API import telemetry
+from API.licence import Preempted
+
+# Stages worth precomputing: they only depend on the voltage window and
+# wavelength, unlike interconnect which depends on the whole request
+PREFETCH_STAGES = ['heat', 'activebentwg', 'effective_index']
+
+
+def request_key(params):
+    """
+    Key used to group similar past requests
+
+    Args:
+        params: Simulation parameters of a past request
+
+    Returns:
+        tuple: Rounded voltage window and wavelengths
+    """
+    source_wavelength = params['source_wavelength']
+    return (
+        round(params['min_v'], 3),
+        round(params['max_v'], 3),
+        params['interval_v'],
+        round(source_wavelength * 1e9, 1),
+        round(params.get('start_wavelength', source_wavelength) * 1e9, 1),
+        round(params.get('end_wavelength', source_wavelength) * 1e9, 1),
+    )
+
+
+def predict_requests(records, suggestions=None, top_k=3):
+    """
+    Predict the next requests from past usage
+
+    Every run times exactly one interconnect stage, so those entries are
+    counted as past requests. The most frequent (then most recent) voltage
+    window / wavelength combinations come first.
+
+    Args:
+        records: Telemetry entries
+        suggestions: Output of API.get_param_suggestions, used when there is
+                     no usable history
+        top_k: Maximum number of predicted requests
+
+    Returns:
+        list: Input dictionaries for the predicted requests
+    """
+    counts = Counter()
+    latest = {}
+    for r in records:
+        params = r.get('params', {})
+        if r['stage'] != 'interconnect' or 'source_wavelength' not in params or 'min_v' not in params:
+            continue
+        key = request_key(params)
+        counts[key] += 1
+        latest[key] = r['timestamp']
+
+    ranked = sorted(counts, key=lambda k: (counts[k], latest[k]), reverse=True)
+
+    predicted = []
+    for min_v, max_v, interval_v, source_nm, start_nm, end_nm in ranked[:top_k]:
+        predicted.append({
+            'min_v': min_v,
+            'max_v': max_v,
+            'interval_v': interval_v,
+            'source_wavelength': source_nm * 1e-9,
+            'start_wavelength': start_nm * 1e-9,
+            'end_wavelength': end_nm * 1e-9,
+        })
+
+    if not predicted and suggestions is not None:
+        source_wavelength = float(suggestions['laser_wavelength'])
+        half_window = float(suggestions['wavelength_window']) / 2
+        predicted.append({
+            'min_v': float(suggestions['min_v']),
+            'max_v': float(suggestions['max_v']),
+            'interval_v': float(suggestions['interval_v']),
+            'source_wavelength': source_wavelength,
+            'start_wavelength': source_wavelength - half_window,
+            'end_wavelength': source_wavelength + half_window,
+        })
+
+    return predicted
+
+
+class Prefetcher:
+    """Opt-in background thread that fills the cache while the solvers are idle"""
+
+    def __init__(self, api, top_k=3, idle_delay=60.0, poll_interval=300.0):
+        """
+        Args:
+            api: API instance whose platform and licence gate are shared
+            top_k: Number of predicted requests to keep warm
+            idle_delay: Seconds without foreground jobs before prefetching
+            poll_interval: Seconds between prediction rounds
+        """
+        # separate API instance so background lookups never touch the
+        # foreground run's inputs or open MODE session
+        from API.main import API
+        self.worker = API()
+        self.worker.platform = api.platform
+        self.worker.licence_gate = api.licence_gate
+        self.worker.interrupt = api.licence_gate.check
+
+        self.gate = api.licence_gate
+        self.top_k = top_k
+        self.idle_delay = idle_delay
+        self.poll_interval = poll_interval
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start prefetching in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.loop)
+        self._thread.daemon = True
+        self._thread.start()
+        print(f"✓ Background prefetcher started (platform: {self.worker.platform.upper()})")
+
+    def stop(self):
+        """Ask the prefetcher to stop after the current solve"""
+        self._stop.set()
+
+    def loop(self):
+        while not self._stop.is_set():
+            if not self.gate.wait_idle(self.idle_delay, self._stop):
+                break
+            try:
+                self.prefetch_round()
+            except Preempted:
+                # a foreground job took the licence, go back to waiting
+                continue
+            self._stop.wait(self.poll_interval)
+
+    def prefetch_round(self):
+        """
+        Precompute every missing artifact of the predicted requests
+
+        Raises:
+            Preempted: as soon as a foreground job needs the licence
+        """
+        worker = self.worker
+        worker.load_cache()
+        predictions = predict_requests(
+            telemetry.load_records(),
+            worker.get_param_suggestions(),
+            self.top_k
+        )
+
+        # foreground jobs wait until the solves below stopped and cleaned up
+        with self.gate.background():
+            for inputs in predictions:
+                inputs['platform'] = worker.platform
+                worker.inputs = inputs
+                try:
+                    for stage in PREFETCH_STAGES:
+                        self.gate.check()
+                        if stage == 'heat':
+                            worker.get_heat_sim()
+                        elif stage == 'activebentwg':
+                            worker.get_activebentwg_sim()
+                        else:
+                            worker.get_effective_index_sim()
+                        # make the new artifact visible to the next lookup
+                        worker.load_cache()
+                finally:
+                    # never keep a MODE session (and its licence) open
+                    lum_mode = getattr(worker, 'lum_mode', None)
+                    if lum_mode is not None:
+                        try:
+                            lum_mode.close()
+                        except Exception:
+                            pass
+                        worker.lum_mode = None
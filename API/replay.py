@@ -0,0 +1,176 @@
+"""
+Run Replay
+Keys memoized INTERCONNECT outputs and writes run manifests so runs can be
+replayed purely from the cache
+"""
+
+import os
+import json
+import time
+import hashlib
+import numpy as np
+
+# Inputs that determine the INTERCONNECT output, with the defaults
+# interface.interconnect applies
+INTERCONNECT_INPUTS = {
+    'sim_type': None,
+    'heater_sim_type': None,
+    'source_wavelength': None,
+    'source_wavelengths': None,
+    'start_wavelength': None,
+    'end_wavelength': None,
+    'min_v': None,
+    'max_v': None,
+    'interval_v': None,
+    'constant_v': None,
+    'adaptive_tol': None,
+    'track_mode': None,
+    'element_bindings': None,
+    'time_window': 5.12e-9,
+    'n_samples': 15360,
+}
+
+
+class MissingArtifactsError(FileNotFoundError):
+    """Raised by offline runs when the cache cannot serve every stage"""
+
+    def __init__(self, missing):
+        """
+        Args:
+            missing: List of human readable descriptions of missing artifacts
+        """
+        self.missing = missing
+        message = "Offline run cannot be served from cache. Missing artifacts:\n"
+        message += "\n".join(f"  • {m}" for m in missing)
+        super().__init__(message)
+
+
+def interconnect_key(platform, inputs):
+    """
+    Hash identifying an INTERCONNECT run
+
+    Args:
+        platform: 'sipho' or 'sin'
+        inputs: Dictionary with simulation parameters
+
+    Returns:
+        str: Short hex digest
+    """
+    relevant = {'platform': platform}
+    for key, default in INTERCONNECT_INPUTS.items():
+        value = inputs.get(key, default)
+        if value is not None:
+            relevant[key] = value
+
+    digest = hashlib.sha1(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+    return digest[:16]
+
+
+def results_path(cache_folder, key, streamed=False):
+    """
+    Path of the memoized INTERCONNECT results for a run key
+
+    Args:
+        cache_folder: Platform cache folder
+        key: Run key from interconnect_key
+        streamed: Folder of chunk-streamed .npy files instead of a .npz
+
+    Returns:
+        str: Path
+    """
+    if streamed:
+        return f"{cache_folder}/interconnect_{key}"
+    return f"{cache_folder}/interconnect_{key}.npz"
+
+
+def load_results(path):
+    """
+    Load memoized INTERCONNECT results
+
+    Streamed results are memory mapped, so large signals are paged in on
+    demand instead of loaded
+
+    Args:
+        path: .npz file or streamed results folder
+
+    Returns:
+        dict: "<probe>__<name>" -> array
+    """
+    if os.path.isdir(path):
+        from Lumerical import streaming
+        return streaming.load_streamed(path)
+    return dict(np.load(path))
+
+
+def manifest_value(value):
+    """
+    JSON form of an input value
+
+    Tuples become lists and dicts are kept, which is how interconnect_key
+    serializes them too, so the key rebuilt from a manifest matches the run
+
+    Raises:
+        TypeError: for values a manifest cannot hold (callables, sessions)
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [manifest_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): manifest_value(v) for k, v in value.items()}
+    raise TypeError(f"{type(value).__name__} cannot be recorded in a manifest")
+
+
+def write_manifest(output_dir, platform, inputs, files, results_file):
+    """
+    Record everything needed to replay a run
+
+    Args:
+        output_dir: Folder for the manifest
+        platform: 'sipho' or 'sin'
+        inputs: Dictionary with simulation parameters
+        files: Stage files used by the run
+        results_file: Memoized INTERCONNECT results
+
+    Returns:
+        str: Path to the manifest
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # callables or sessions are not part of a replayable request
+    recorded = {}
+    for name, value in inputs.items():
+        try:
+            recorded[name] = manifest_value(value)
+        except TypeError:
+            continue
+
+    key = interconnect_key(platform, inputs)
+    manifest = {
+        'key': key,
+        'platform': platform,
+        'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'inputs': recorded,
+        'files': files,
+        'results': results_file,
+    }
+
+    path = os.path.join(output_dir, f"manifest_{key}.json")
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return path
+
+
+def load_manifest(path):
+    """
+    Args:
+        path: Manifest written by write_manifest
+
+    Returns:
+        dict: Manifest
+    """
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,100 @@
+"""
+Stage Runtime Model
+Predicts how long each simulation stage takes from the telemetry log
+"""
+
+import numpy as np
+from API import telemetry
+
+# Parameters each stage's runtime depends on. A constant term is always added.
+STAGE_FEATURES = {
+    'heat': ['n_voltages'],
+    'passivebentwg': ['wavelength_span'],
+    'activebentwg': ['n_voltages', 'wavelength_span'],
+    'effective_index': ['n_voltages'],
+    'interconnect': ['n_samples'],
+}
+
+
+class RuntimeModel:
+    """Linear least-squares runtime model per (stage, platform)"""
+
+    def __init__(self, ridge=1e-6):
+        """
+        Args:
+            ridge: Small L2 penalty that keeps fits stable with few records
+        """
+        self.ridge = ridge
+        self.coefficients = {}
+        self.records = []
+
+    @classmethod
+    def from_telemetry(cls, path=telemetry.TELEMETRY_FILE):
+        """
+        Build a model fitted on the local telemetry store
+
+        Args:
+            path: Telemetry file
+
+        Returns:
+            RuntimeModel: Fitted model
+        """
+        model = cls()
+        model.fit(telemetry.load_records(path))
+        return model
+
+    def design_row(self, stage, features):
+        return [1.0] + [float(features[name]) for name in STAGE_FEATURES[stage]]
+
+    def fit(self, records):
+        """
+        Fit one regression per (stage, platform) with enough records
+
+        Args:
+            records: Telemetry entries (see telemetry.record_stage)
+        """
+        self.records = records
+        self.coefficients = {}
+
+        groups = {}
+        for r in records:
+            if r['stage'] not in STAGE_FEATURES or 'features' not in r:
+                continue
+            groups.setdefault((r['stage'], r['platform']), []).append(r)
+
+        for (stage, platform), group in groups.items():
+            n_terms = len(STAGE_FEATURES[stage]) + 1
+            if len(group) < n_terms:
+                # underdetermined, predict() falls back to per-point rates
+                continue
+
+            X = np.array([self.design_row(stage, r['features']) for r in group])
+            y = np.array([r['duration'] for r in group])
+
+            # normalise columns so the ridge term treats all features alike
+            scale = np.abs(X).max(axis=0)
+            scale[scale == 0] = 1.0
+            Xs = X / scale
+
+            A = Xs.T @ Xs + self.ridge * np.eye(n_terms)
+            coef = np.linalg.solve(A, Xs.T @ y) / scale
+            self.coefficients[(stage, platform)] = coef
+
+    def predict(self, stage, platform, inputs):
+        """
+        Predict the wall time of a stage
+
+        Args:
+            stage: Stage name (see telemetry.STAGES)
+            platform: 'sipho' or 'sin'
+            inputs: Dictionary with simulation parameters
+
+        Returns:
+            float: Estimated seconds, or None if the stage has never been timed
+        """
+        coef = self.coefficients.get((stage, platform))
+        if coef is None:
+            return telemetry.estimate_stage(stage, platform, inputs, self.records)
+
+        row = np.array(self.design_row(stage, telemetry.stage_features(inputs)))
+        return max(float(row @ coef), 0.0)
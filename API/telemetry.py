@@ -0,0 +1,158 @@
+"""
+Stage Telemetry
+Records how long each simulation stage takes so future runs can be estimated
+"""
+
+import os
+import json
+import time
+
+TELEMETRY_FILE = "./Lumerical/telemetry.jsonl"
+
+STAGES = ['heat', 'passivebentwg', 'activebentwg', 'effective_index', 'interconnect']
+
+# Simulation parameters kept with every entry
+PARAM_KEYS = [
+    'source_wavelength', 'start_wavelength', 'end_wavelength',
+    'min_v', 'max_v', 'interval_v', 'time_window', 'n_samples',
+]
+
+
+def voltage_points(inputs):
+    """
+    Number of voltage points solved for the given inputs
+
+    Uses the same grid as interface.effective_index
+
+    Args:
+        inputs: Dictionary with min_v, max_v and interval_v
+
+    Returns:
+        int: Number of voltage points
+    """
+    return int((inputs['max_v'] - inputs['min_v']) / inputs['interval_v']) + 1
+
+
+def stage_grid_size(stage, inputs):
+    """
+    Size of the grid a stage has to solve, used to scale runtimes
+
+    Args:
+        stage: Stage name (see STAGES)
+        inputs: Dictionary with simulation parameters
+
+    Returns:
+        int: Number of grid points for the stage
+    """
+    if stage in ('heat', 'activebentwg', 'effective_index'):
+        return voltage_points(inputs)
+    elif stage == 'interconnect':
+        return int(inputs.get('n_samples', 15360))
+    return 1
+
+
+def stage_features(inputs):
+    """
+    Parameters that drive stage runtimes, stored with every telemetry entry
+
+    Args:
+        inputs: Dictionary with simulation parameters
+
+    Returns:
+        dict: n_voltages, wavelength_span (nm) and n_samples
+    """
+    start_wavelength = inputs.get('start_wavelength', inputs.get('source_wavelength', 0))
+    end_wavelength = inputs.get('end_wavelength', inputs.get('source_wavelength', 0))
+
+    return {
+        'n_voltages': voltage_points(inputs),
+        'wavelength_span': (end_wavelength - start_wavelength) * 1e9,
+        'n_samples': int(inputs.get('n_samples', 15360)),
+    }
+
+
+def record_stage(stage, platform, inputs, duration, path=TELEMETRY_FILE):
+    """
+    Append one stage execution to the telemetry store
+
+    Args:
+        stage: Stage name (see STAGES)
+        platform: 'sipho' or 'sin'
+        inputs: Dictionary with simulation parameters
+        duration: Wall time of the stage in seconds
+        path: Telemetry file
+    """
+    entry = {
+        'stage': stage,
+        'platform': platform,
+        'grid_size': stage_grid_size(stage, inputs),
+        'features': stage_features(inputs),
+        'params': {k: inputs[k] for k in PARAM_KEYS if k in inputs},
+        'duration': duration,
+        'timestamp': time.time(),
+    }
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def load_records(path=TELEMETRY_FILE):
+    """
+    Load every stage execution from the telemetry store
+
+    Args:
+        path: Telemetry file
+
+    Returns:
+        list: Telemetry entries (dicts), oldest first
+    """
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # a crash mid-write can leave a truncated last line
+                continue
+    return records
+
+
+def estimate_stage(stage, platform, inputs, records=None):
+    """
+    Estimate the wall time of a stage from past timings
+
+    Scales the median seconds-per-grid-point of past runs of the same stage
+    on the same platform to the requested grid size
+
+    Args:
+        stage: Stage name (see STAGES)
+        platform: 'sipho' or 'sin'
+        inputs: Dictionary with simulation parameters
+        records: Telemetry entries (loaded from disk if None)
+
+    Returns:
+        float: Estimated seconds, or None if the stage has never been timed
+    """
+    if records is None:
+        records = load_records()
+
+    rates = sorted(
+        r['duration'] / max(r['grid_size'], 1)
+        for r in records
+        if r['stage'] == stage and r['platform'] == platform
+    )
+    if not rates:
+        return None
+
+    median_rate = rates[len(rates) // 2]
+    return median_rate * stage_grid_size(stage, inputs)
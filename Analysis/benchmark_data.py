@@ -0,0 +1,88 @@
+"""
+Benchmark Data
+Small classification datasets bundled as arrays (Analysis/data/<name>.npz)
+for the photonic inference benchmarks: Fisher's Iris (UCI Machine Learning
+Repository iris.data, 150 samples, 4 features, 3 classes) and synthetic
+blobs and moons
+
+Regenerate the synthetic ones with python -m Analysis.benchmark_data
+"""
+
+import os
+import numpy as np
+
+DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATASETS = ('iris', 'blobs', 'moons')
+
+
+def make_blobs(samples=600, features=8, classes=4, spread=1.0, seed=0):
+    """Isotropic Gaussian clusters, one per class"""
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform(-4, 4, (classes, features))
+    labels = np.arange(samples) % classes
+    x = centres[labels] + spread * rng.standard_normal((samples, features))
+    return x, labels
+
+
+def make_moons(samples=600, noise=0.15, seed=0):
+    """Two interleaving half circles"""
+    rng = np.random.default_rng(seed)
+    labels = np.arange(samples) % 2
+    angle = rng.uniform(0, np.pi, samples)
+    x = np.column_stack([np.cos(angle), np.sin(angle)])
+    x[labels == 1] = np.column_stack([1 - np.cos(angle[labels == 1]), 0.5 - np.sin(angle[labels == 1])])
+    return x + noise * rng.standard_normal(x.shape), labels
+
+
+def save_dataset(name, x, labels, test_fraction=0.25, seed=0):
+    """Shuffle, split and save a dataset as Analysis/data/<name>.npz"""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(x))
+    split = int(len(x) * (1 - test_fraction))
+    train, test = order[:split], order[split:]
+
+    os.makedirs(DATA_FOLDER, exist_ok=True)
+    path = os.path.join(DATA_FOLDER, f"{name}.npz")
+    np.savez_compressed(path, x_train=x[train], y_train=labels[train], x_test=x[test], y_test=labels[test])
+    return path
+
+
+def load_dataset(name):
+    """
+    Load a bundled dataset
+
+    Args:
+        name: One of DATASETS
+
+    Returns:
+        tuple: (x_train, y_train, x_test, y_test)
+    """
+    if name not in DATASETS:
+        raise ValueError(f"Invalid dataset: {name}. Must be one of {DATASETS}")
+    with np.load(os.path.join(DATA_FOLDER, f"{name}.npz")) as data:
+        return data['x_train'], data['y_train'], data['x_test'], data['y_test']
+
+
+def read_iris(path):
+    """
+    Iris from the UCI iris.data file ("sepal length, sepal width, petal
+    length, petal width, class" rows)
+
+    Returns:
+        tuple: (x (150, 4) in cm, labels 0 setosa, 1 versicolor, 2 virginica)
+    """
+    classes = ('Iris-setosa', 'Iris-versicolor', 'Iris-virginica')
+    x, labels = [], []
+    with open(path) as f:
+        for line in f:
+            fields = line.strip().split(",")
+            if len(fields) == 5:
+                x.append([float(v) for v in fields[:4]])
+                labels.append(classes.index(fields[4]))
+    return np.array(x), np.array(labels)
+
+
+if __name__ == "__main__":
+    # iris.npz is bundled, rebuild it with save_dataset('iris', *read_iris(path))
+    print(f"✓ Saved: {save_dataset('blobs', *make_blobs())}")
+    print(f"✓ Saved: {save_dataset('moons', *make_moons())}")
@@ -0,0 +1,351 @@
+"""
+Weight Calibration
+Inverse lookup tables from a target weight in [-1, 1] to the heater voltage
+that produces it, built from the ring model weight(V) curve and cached per
+platform and wavelength
+"""
+
+import os
+import numpy as np
+
+from Analysis.ring_model import RingModel
+from Lumerical.interface import get_platform_path
+
+# tables are built this many times finer than the requested interval_v,
+# the weight curve is sharp around resonance
+OVERSAMPLE = 10
+
+# weight mismatch below which two voltages count as reaching the same target
+WEIGHT_TOLERANCE = 1e-6
+
+_tables = {}
+
+
+def weight_curve(model, wavelength, voltage):
+    """
+    Balanced weight thru - drop (linear transmission, so within [-1, 1])
+
+    Args:
+        model: Analysis.ring_model.RingModel
+        wavelength: Laser wavelength (m)
+        voltage: Heater voltages, any shape
+
+    Returns:
+        np.ndarray: Weights shaped like voltage
+    """
+    drop, thru = model.transmission(wavelength, np.asarray(voltage, dtype=float))
+    return thru - drop
+
+
+def monotonic_segments(weight):
+    """
+    Split a curve into monotonic runs
+
+    Consecutive segments share their turning point; flat steps stay in the
+    current run
+
+    Returns:
+        list: (start, stop) index pairs, stop exclusive
+    """
+    direction = np.sign(np.diff(weight))
+    # flat steps follow the previous direction
+    for i in np.flatnonzero(direction == 0):
+        direction[i] = direction[i - 1] if i > 0 else 0
+    turns = np.flatnonzero(direction[1:] * direction[:-1] < 0) + 1
+    bounds = np.concatenate(([0], turns, [len(weight) - 1]))
+    return [(int(start), int(stop) + 1) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+class CalibrationTable:
+    """
+    Inverse weight -> voltage lookup for one ring at one wavelength
+
+    weight(V) passes a resonance (and repeats every FSR), so the inverse is
+    kept as one ascending LUT per monotonic segment. Queries use the lowest
+    voltage segment that reaches the weight, i.e. the least heater power.
+    """
+
+    def __init__(self, voltage, weight, wavelength=None, attrs=None):
+        """
+        Args:
+            voltage: Ascending heater voltages (n,)
+            weight: Weight at each voltage (n,)
+            wavelength: Laser wavelength (m) the table was built for
+            attrs: Optional free-form metadata
+        """
+        self.voltage = np.asarray(voltage, dtype=float)
+        self.weight = np.asarray(weight, dtype=float)
+        self.wavelength = wavelength
+        self.attrs = attrs or {}
+
+        self.segments = []
+        for start, stop in monotonic_segments(self.weight):
+            w = self.weight[start:stop]
+            v = self.voltage[start:stop]
+            if w[-1] < w[0]:
+                w, v = w[::-1], v[::-1]
+            self.segments.append((w, v))
+
+        # every segment's LUT concatenated, segment s shifted up by s * step
+        # so a single searchsorted serves queries spread over all segments
+        self._step = 2 * np.abs(self.weight).max() + 1
+        self._keys = np.concatenate([w + s * self._step for s, (w, _) in enumerate(self.segments)])
+        self._voltages = np.concatenate([v for _, v in self.segments])
+        lengths = np.array([len(w) for w, _ in self.segments])
+        self._starts = np.cumsum(lengths) - lengths
+        self._stops = np.cumsum(lengths)
+        self.lows = np.array([w[0] for w, _ in self.segments])
+        self.highs = np.array([w[-1] for w, _ in self.segments])
+        self._voltage_lows = np.array([v.min() for _, v in self.segments])
+        self._voltage_highs = np.array([v.max() for _, v in self.segments])
+
+    def __repr__(self):
+        lo, hi = self.weight_range
+        return f"CalibrationTable({len(self.voltage)} points, {len(self.segments)} segments, weights {lo:.3f}..{hi:.3f})"
+
+    @property
+    def weight_range(self):
+        """(lowest, highest) reachable weight"""
+        return float(self.weight.min()), float(self.weight.max())
+
+    def first_segment(self, weights):
+        """
+        Lowest voltage segment reaching each weight
+
+        The curve is continuous, so the first s segments reach exactly
+        [min(lows[:s]), max(highs[:s])] and the first segment reaching a
+        weight is where that running range first includes it
+        """
+        weights = np.asarray(weights, dtype=float)
+        reach_high = np.maximum.accumulate(self.highs)
+        reach_low = np.minimum.accumulate(self.lows)
+        above = weights >= self.weight[0]
+        segment = np.where(above,
+                           np.searchsorted(reach_high, weights, side="left"),
+                           np.searchsorted(-reach_low, -weights, side="left"))
+        return np.minimum(segment, len(self.segments) - 1)
+
+    def to_voltage(self, weights, segment=None, minimum=None, maximum=None):
+        """
+        Heater voltages for target weights (vectorised, any shape)
+
+        Targets outside the reachable range are clipped to it.
+
+        Args:
+            weights: Target weights
+            segment: Optional segment index to use for every target instead
+                of the lowest voltage one that reaches it
+            minimum: Optional voltages (broadcast against weights) the
+                result must not be below, e.g. heat a ring already gets
+                from its neighbours; targets out of reach above it are
+                clipped to what the voltages above reach, NaN when the
+                bound is past the table
+            maximum: Same as minimum for voltages the result must not
+                exceed
+
+        Returns:
+            np.ndarray: Voltages shaped like weights
+        """
+        weights = np.asarray(weights, dtype=float)
+        if minimum is not None:
+            return self._to_voltage_above(weights, minimum)
+        if maximum is not None:
+            return self._to_voltage_above(weights, maximum, below=True)
+
+        if segment is None:
+            flat = np.clip(weights.ravel(), *self.weight_range)
+            segments = self.first_segment(flat)
+        else:
+            flat = np.clip(weights.ravel(), self.lows[segment], self.highs[segment])
+            segments = np.full(flat.shape, segment)
+        return self._interpolate(flat, segments).reshape(weights.shape)
+
+    def _interpolate(self, flat, segments):
+        # bracket each target inside its own segment and interpolate
+        keys = flat + segments * self._step
+        right = np.clip(np.searchsorted(self._keys, keys, side="right"),
+                        self._starts[segments] + 1, self._stops[segments] - 1)
+        k0, k1 = self._keys[right - 1], self._keys[right]
+        v0, v1 = self._voltages[right - 1], self._voltages[right]
+        span = np.where(k1 > k0, k1 - k0, 1.0)
+        return v0 + np.clip((keys - k0) / span, 0, 1) * (v1 - v0)
+
+    def nearest_voltage(self, weights, voltages):
+        """
+        Voltages reaching target weights (on any segment) nearest to given
+        voltages, e.g. to stay close to what a ring already sees
+
+        Args:
+            weights: Target weights
+            voltages: Reference voltages (broadcast against weights)
+
+        Returns:
+            np.ndarray: Voltages shaped like weights
+        """
+        weights = np.asarray(weights, dtype=float)
+        voltages = np.broadcast_to(np.asarray(voltages, dtype=float), weights.shape)
+        above = self._to_voltage_above(weights, voltages)
+        below = self._to_voltage_above(weights, voltages, below=True)
+        # exact solutions win over clipped ones, NaN (no solution on that side) never wins
+        target = np.clip(weights, *self.weight_range)
+        miss_above = np.nan_to_num(np.abs(self.to_weight(above) - target), nan=np.inf)
+        miss_below = np.nan_to_num(np.abs(self.to_weight(below) - target), nan=np.inf)
+        nearer = voltages - below < above - voltages
+        use_below = np.where(np.abs(miss_above - miss_below) > WEIGHT_TOLERANCE, miss_below < miss_above,
+                             np.isnan(above) | nearer)
+        return np.where(use_below, below, above)
+
+    def _to_voltage_above(self, weights, minimum, below=False):
+        # with below=True minimum is a maximum and the segments are walked down
+        weights = np.asarray(weights, dtype=float)
+        flat = np.clip(weights.ravel(), *self.weight_range)
+        bound = np.broadcast_to(np.asarray(minimum, dtype=float), weights.shape).ravel()
+        count = len(self.segments)
+        index = np.arange(count)
+
+        # the part of the segment holding each bound that lies past it
+        if below:
+            segments = np.searchsorted(self._voltage_lows, bound, side="right") - 1
+        else:
+            segments = np.searchsorted(self._voltage_highs, bound, side="left")
+        valid = (segments >= 0) & (segments < count)
+        s = np.clip(segments, 0, count - 1)
+        if below:
+            edges = self.to_weight(self._voltage_lows[s]), self.to_weight(np.minimum(bound, self._voltage_highs[s]))
+            beyond = index[None, :] < s[:, None]
+        else:
+            edges = self.to_weight(np.maximum(bound, self._voltage_lows[s])), self.to_weight(self._voltage_highs[s])
+            beyond = index[None, :] > s[:, None]
+        beyond &= valid[:, None]
+        lowest = np.minimum(np.minimum(*edges), np.where(beyond, self.lows, np.inf).min(axis=1))
+        highest = np.maximum(np.maximum(*edges), np.where(beyond, self.highs, -np.inf).max(axis=1))
+
+        # targets out of reach past the bound are clipped to what is reached,
+        # then solved in the bound's own segment or the nearest one beyond
+        flat = np.clip(flat, lowest, highest)
+        own = (flat >= np.minimum(*edges)) & (flat <= np.maximum(*edges))
+        reaches = beyond & (self.lows <= flat[:, None]) & (self.highs >= flat[:, None])
+        nearest = count - 1 - np.argmax(reaches[:, ::-1], axis=1) if below else np.argmax(reaches, axis=1)
+        segments = np.where(own, s, nearest)
+        found = valid & (own | reaches.any(axis=1))
+
+        voltage = np.full(flat.shape, np.nan)
+        voltage[found] = self._interpolate(flat[found], segments[found])
+        return voltage.reshape(weights.shape)
+
+    def to_weight(self, voltage):
+        """Weights at the given voltages, interpolated from the table"""
+        return np.interp(voltage, self.voltage, self.weight)
+
+    def resolution(self, interval_v, segment=None):
+        """
+        Weight resolution when the heater voltage is quantised to interval_v
+
+        Args:
+            interval_v: DAC voltage step (V)
+            segment: Segment the weights are programmed on (default: the
+                first one spanning the widest weight range)
+
+        Returns:
+            dict: {
+                'max_step': largest weight step between adjacent voltages,
+                'mean_step': mean weight step,
+                'levels': distinct voltages in the segment,
+                'bits': log2(weight span / max_step)
+            }
+        """
+        if segment is None:
+            segment = int(np.argmax(self.highs - self.lows))
+        w, v = self.segments[segment]
+        lo, hi = v.min(), v.max()
+        grid = np.arange(np.ceil(lo / interval_v), np.floor(hi / interval_v) + 1) * interval_v
+        if len(grid) < 2:
+            return {'max_step': float(np.ptp(w)), 'mean_step': float(np.ptp(w)), 'levels': len(grid), 'bits': 0.0}
+
+        steps = np.abs(np.diff(self.to_weight(grid)))
+        max_step = float(steps.max())
+        return {
+            'max_step': max_step,
+            'mean_step': float(steps.mean()),
+            'levels': len(grid),
+            'bits': float(np.log2(np.ptp(w) / max_step)) if max_step > 0 else np.inf,
+        }
+
+    def save(self, path):
+        np.savez(path, voltage=self.voltage, weight=self.weight,
+                 wavelength=np.nan if self.wavelength is None else self.wavelength)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            wavelength = float(data['wavelength'])
+            return cls(data['voltage'], data['weight'], None if np.isnan(wavelength) else wavelength)
+
+    @classmethod
+    def from_model(cls, model, wavelength, min_v, max_v, interval_v, oversample=OVERSAMPLE):
+        """
+        Build a table from a ring model
+
+        Args:
+            model: Analysis.ring_model.RingModel
+            wavelength: Laser wavelength (m)
+            min_v, max_v: Heater voltage range (V)
+            interval_v: Voltage step (V); the table is oversample times finer
+
+        Returns:
+            CalibrationTable
+        """
+        count = int(round((max_v - min_v) / interval_v * oversample)) + 1
+        voltage = np.linspace(min_v, max_v, max(count, 2))
+        return cls(voltage, weight_curve(model, wavelength, voltage), wavelength)
+
+
+def get_calibration_folder(platform):
+    return f"./Lumerical/cache_{platform}/calibration"
+
+
+def calibration_path(platform, wavelength, min_v, max_v, interval_v, source="neff"):
+    """Cache file of a table, source names the neff table it was built from"""
+    return os.path.join(get_calibration_folder(platform),
+                        f"calibration_{wavelength}_{min_v}_{max_v}_{interval_v}_{source}.npz")
+
+
+def get_calibration(platform, wavelength, min_v, max_v, interval_v, neff_path=None, refresh=False):
+    """
+    Calibration table for a platform and wavelength, cached in memory and in
+    the platform cache folder
+
+    A cached table is rebuilt when the neff table it came from is newer.
+
+    Args:
+        platform: 'sipho' or 'sin'
+        wavelength: Laser wavelength (m)
+        min_v, max_v, interval_v: Heater voltage range and step (V)
+        neff_path: neff table to build from (default: the platform neff.txt)
+        refresh: Rebuild even if cached
+
+    Returns:
+        CalibrationTable
+    """
+    if neff_path is None:
+        neff_path = f"{get_platform_path(platform)}/neff.txt"
+    source = os.path.splitext(os.path.basename(neff_path))[0]
+    path = calibration_path(platform, wavelength, min_v, max_v, interval_v, source)
+
+    fresh = (not refresh and os.path.exists(path) and
+             os.path.getmtime(path) >= os.path.getmtime(neff_path))
+    if fresh and path in _tables:
+        return _tables[path]
+
+    if fresh:
+        table = CalibrationTable.load(path)
+    else:
+        model = RingModel.from_platform(platform, neff_path=neff_path)
+        table = CalibrationTable.from_model(model, wavelength, min_v, max_v, interval_v)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table.save(path)
+
+    table.attrs.update(platform=platform, neff_path=neff_path, interval_v=interval_v)
+    _tables[path] = table
+    return table
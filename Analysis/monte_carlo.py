@@ -0,0 +1,210 @@
+"""
+Monte Carlo Fabrication Variation
+Yield of weight banks under ring radius, waveguide width (neff) and gap
+(coupling) variation, evaluated on the analytic ring model in vectorised
+chunks spread over a process pool
+"""
+
+import copy
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from Analysis.ring_model import RingModel
+from Analysis.photonic_layer import channel_wavelengths
+
+# (distribution, scale) per varied quantity: radius in m, neff as an
+# absolute offset, coupling as a relative change of both bus couplings
+DEFAULT_VARIATIONS = {
+    'radius': ('normal', 5e-9),
+    'neff': ('normal', 1e-3),
+    'coupling': ('normal', 0.05),
+}
+
+DISTRIBUTIONS = ('normal', 'uniform', 'none')
+
+
+def sample(distribution, scale, size, rng):
+    """
+    Zero-mean samples of a variation
+
+    Args:
+        distribution: 'normal' (scale is the standard deviation), 'uniform'
+            (scale is the half width) or 'none'
+        scale: Spread of the distribution
+        size: Number of samples
+        rng: np.random.Generator
+
+    Returns:
+        np.ndarray: (size,) samples
+    """
+    if distribution == 'normal':
+        return rng.normal(0.0, scale, size)
+    if distribution == 'uniform':
+        return rng.uniform(-scale, scale, size)
+    if distribution == 'none':
+        return np.zeros(size)
+    raise ValueError(f"Invalid distribution: {distribution}. Must be one of {DISTRIBUTIONS}")
+
+
+def _crossings(x, y, targets):
+    """
+    Row-wise inverse of monotonically increasing curves y(x)
+
+    Args:
+        x: (n,) shared abscissa
+        y: (m, n) increasing rows
+        targets: (m, k) values to find on each row
+
+    Returns:
+        np.ndarray: (m, k) x at which each row reaches each target (NaN
+            outside the row's range)
+    """
+    rows = np.arange(len(y))[:, None]
+    right = np.clip((y[:, None, :] < targets[..., None]).sum(axis=2), 1, len(x) - 1)
+    y0, y1 = y[rows, right - 1], y[rows, right]
+    rising = y1 > y0
+    fraction = np.where(rising, (targets - y0) / np.where(rising, y1 - y0, 1.0), 0.0)
+    reached = (targets >= y[:, :1]) & (targets <= y[:, -1:])
+    return np.where(reached, x[right - 1] + fraction * (x[right] - x[right - 1]), np.nan)
+
+
+def evaluate_rings(model, wavelengths, min_v, max_v, weight_target=0.9):
+    """
+    Tuning behaviour of one ring per channel wavelength
+
+    The heater only adds phase, so the ring is on resonance (weight minimum)
+    wherever the round trip phase crosses a multiple of 2 pi and off
+    resonance (maximum) half way between. The neff table is linear between
+    its voltages, which makes solving for those voltages on the table grid
+    exact. Loss changes with voltage, so every resonance in range is checked.
+
+    Args:
+        model: RingModel whose radius / neff_offset / coupling_scale are
+            (m, 1) arrays, one row per ring
+        wavelengths: (m,) channel wavelength of each ring
+        min_v, max_v: Heater voltage range (V)
+        weight_target: Weight magnitude the calibration needs
+
+    Returns:
+        dict: (m,) arrays 'offset' (cold resonance minus channel, m),
+            'tuning_voltage' (first resonance), 'calibration_voltage' (first
+            resonance reaching -weight_target), 'weight_min', 'weight_max'
+            (reachable thru - drop); voltages are NaN if out of range
+    """
+    table_v = model.neff_table[0]
+    grid = np.unique(np.concatenate(([min_v, max_v], table_v[(table_v > min_v) & (table_v < max_v)])))
+    wavelengths = np.asarray(wavelengths, dtype=float)[:, None]
+
+    neff = model.effective_index(wavelengths, grid[None, :]).real
+    phase = 2 * np.pi * neff * model.length / wavelengths
+    turns = phase / (2 * np.pi)
+
+    # cold detuning from the nearest resonance, as a wavelength offset
+    fsr = np.ravel(model.fsr(wavelengths))
+    offset = -(turns[:, 0] - np.round(turns[:, 0])) * fsr
+
+    # every resonance (and anti-resonance) order the heater range reaches
+    first = np.ceil(turns[:, 0])
+    count = int(max(np.max(np.floor(turns[:, -1]) - first), 0)) + 2
+    orders = first[:, None] + np.arange(count)
+    on = _crossings(grid, turns, orders)
+    off = _crossings(grid, turns, orders - 0.5)
+
+    def weight_at(voltage):
+        drop, thru = model.transmission(wavelengths, np.nan_to_num(voltage, nan=min_v))
+        return np.where(np.isnan(voltage), np.nan, thru - drop)
+
+    edges = weight_at(np.tile([min_v, max_v], (len(wavelengths), 1)))
+    on_weight = weight_at(on)
+    weight_min = np.nanmin(np.column_stack([on_weight, edges]), axis=1)
+    weight_max = np.nanmax(np.column_stack([weight_at(off), edges]), axis=1)
+
+    deep = on_weight <= -weight_target
+    calibration_voltage = np.where(deep.any(axis=1), on[np.arange(len(on)), deep.argmax(axis=1)], np.nan)
+
+    return {
+        'offset': offset,
+        'tuning_voltage': on[:, 0],
+        'calibration_voltage': calibration_voltage,
+        'weight_min': weight_min,
+        'weight_max': weight_max,
+    }
+
+
+def _run_chunk(model, wavelengths, banks, variations, min_v, max_v, weight_target, seed):
+    # module level so process pools can pickle it
+    rng = np.random.default_rng(seed)
+    rings = banks * len(wavelengths)
+
+    instance = copy.copy(model)
+    instance.radius = (model.radius + sample(*variations.get('radius', ('none', 0)), rings, rng))[:, None]
+    instance.neff_offset = (model.neff_offset + sample(*variations.get('neff', ('none', 0)), rings, rng))[:, None]
+    instance.coupling_scale = (model.coupling_scale * (1 + sample(*variations.get('coupling', ('none', 0)), rings, rng)))[:, None]
+
+    result = evaluate_rings(instance, np.tile(wavelengths, banks), min_v, max_v, weight_target)
+    return {key: value.reshape(banks, len(wavelengths)) for key, value in result.items()}
+
+
+def monte_carlo(samples=10000, rings=8, model=None, platform='sipho', variations=None,
+                min_v=0.0, max_v=3.0, weight_target=0.9, chunk_size=1024,
+                workers=None, processes=True, seed=0):
+    """
+    Yield of weight banks under fabrication variation
+
+    Every sample is a bank of rings, one per WDM channel, each ring drawing
+    its own variation. A bank passes if every ring reaches weights of
+    -weight_target and +weight_target inside the heater range.
+    Only per-ring scalars are kept, the working set is bounded by chunk_size.
+    Chunks get independent seeds, results do not depend on the pool size.
+
+    Args:
+        samples: Number of banks
+        rings: Rings (channels) per bank
+        model: Nominal RingModel (default: from the platform neff.txt and
+            couplingcoefficient.txt)
+        platform: 'sipho' or 'sin', used when no model is given
+        variations: Dict of 'radius' / 'neff' / 'coupling' -> (distribution,
+            scale), see DEFAULT_VARIATIONS; missing entries do not vary
+        min_v, max_v: Heater voltage range (V)
+        weight_target: Weight magnitude every ring must reach
+        chunk_size: Banks per chunk
+        workers: Pool size (default: executor default)
+        processes: Use a process pool (threads otherwise)
+        seed: Seed of the whole run
+
+    Returns:
+        dict: 'yield', 'ring_yield', 'summary' (statistics per metric),
+            (samples, rings) arrays of the evaluate_rings metrics and
+            (samples,) 'passed'
+    """
+    model = model or RingModel.from_platform(platform)
+    variations = DEFAULT_VARIATIONS if variations is None else variations
+    wavelengths = channel_wavelengths(model, rings)
+
+    sizes = [min(chunk_size, samples - start) for start in range(0, samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        parts = list(executor.map(_run_chunk, [model] * len(sizes), [wavelengths] * len(sizes), sizes,
+                                  [variations] * len(sizes), [min_v] * len(sizes), [max_v] * len(sizes),
+                                  [weight_target] * len(sizes), seeds))
+
+    result = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    ring_passed = np.isfinite(result['calibration_voltage']) & (result['weight_max'] >= weight_target)
+    result['passed'] = ring_passed.all(axis=1)
+
+    summary = {}
+    for key in ('offset', 'tuning_voltage', 'calibration_voltage', 'weight_min', 'weight_max'):
+        values = result[key][np.isfinite(result[key])]
+        summary[key] = {
+            'mean': float(values.mean()) if len(values) else np.nan,
+            'std': float(values.std()) if len(values) else np.nan,
+            'p5': float(np.percentile(values, 5)) if len(values) else np.nan,
+            'p95': float(np.percentile(values, 95)) if len(values) else np.nan,
+        }
+
+    result['yield'] = float(result['passed'].mean())
+    result['ring_yield'] = float(ring_passed.mean())
+    result['summary'] = summary
+    return result
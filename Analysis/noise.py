@@ -0,0 +1,191 @@
+"""
+Weight Bank Noise
+Laser RIN, shot and thermal noise on the balanced photodetectors and heater
+drift, applied to photonic layer inference, with streamed accuracy curves
+against laser power and DAC resolution
+"""
+
+import numpy as np
+
+q = 1.602176634e-19
+k_B = 1.380649e-23
+
+
+class NoiseModel:
+    """
+    Noise sources of a weight bank readout
+
+    RIN and shot/thermal noise are drawn per inference. Heater drift is slow
+    compared to an inference, so one voltage error per ring is drawn per
+    chunk of inferences and the banks are re-evaluated with it.
+    """
+
+    def __init__(self, rin=-140.0, bandwidth=1e9, temperature=300.0, load_resistance=50.0,
+                 dark_current=0.0, heater_drift=0.0, shot=True, thermal=True):
+        """
+        Args:
+            rin: Laser relative intensity noise (dB/Hz), None to disable
+            bandwidth: Detection bandwidth (Hz)
+            temperature: Photodetector load temperature (K)
+            load_resistance: Load seen by each photodetector (ohm)
+            dark_current: Dark current per photodetector (A)
+            heater_drift: RMS heater voltage error per ring (V)
+            shot: Include shot noise
+            thermal: Include thermal (Johnson) noise
+        """
+        self.rin = rin
+        self.bandwidth = bandwidth
+        self.temperature = temperature
+        self.load_resistance = load_resistance
+        self.dark_current = dark_current
+        self.heater_drift = heater_drift
+        self.shot = shot
+        self.thermal = thermal
+
+    def banks(self, layer, rng):
+        """(drop, thru) of the layer's banks, with heater drift if enabled"""
+        if not self.heater_drift:
+            return layer.drop, layer.thru
+        return layer.evaluate(layer.voltages + rng.normal(0.0, self.heater_drift, layer.voltages.shape))
+
+    def photocurrents(self, layer, x, rng):
+        """
+        Noisy thru and drop photocurrents (mA), see PhotonicLayer.photocurrents
+
+        Args:
+            layer: Analysis.photonic_layer.PhotonicLayer
+            x: (batch, in) non-negative inputs
+            rng: np.random.Generator
+
+        Returns:
+            tuple: (thru, drop) arrays of shape (batch, out)
+        """
+        power = np.asarray(x, dtype=float) * layer.laser_power
+        if self.rin is not None:
+            power = power * (1 + np.sqrt(10 ** (self.rin / 10) * self.bandwidth) * rng.standard_normal(power.shape))
+
+        drop, thru = self.banks(layer, rng)
+        currents = [layer.responsivity * power @ thru.T, layer.responsivity * power @ drop.T]
+
+        for current in currents:
+            variance = np.zeros(current.shape)
+            if self.shot:
+                variance = variance + 2 * q * (np.abs(current) * 1e-3 + self.dark_current) * self.bandwidth
+            if self.thermal:
+                variance = variance + 4 * k_B * self.temperature * self.bandwidth / self.load_resistance
+            current += np.sqrt(variance) * 1e3 * rng.standard_normal(current.shape)
+        return tuple(currents)
+
+
+def noisy_accuracy(layer, x, labels, noise, repeats=10, batch_size=65536, seed=0):
+    """
+    Accuracy of many noisy inferences, streamed in chunks
+
+    The inputs are repeated until repeats * len(x) inferences ran. Every
+    chunk draws from its own spawned seed, so results only depend on seed
+    and batch_size.
+
+    Args:
+        layer: Analysis.photonic_layer.PhotonicLayer
+        x: (samples, in) non-negative inputs
+        labels: (samples,) class labels
+        noise: NoiseModel
+        repeats: Noisy inferences per input
+        batch_size: Inferences per chunk
+        seed: Seed of the run
+
+    Returns:
+        dict: 'accuracy' (noisy), 'noiseless_accuracy' and 'relative_error'
+            (RMS error against the ideal float layer over its RMS output, so
+            it includes the weight programming error)
+    """
+    x = np.asarray(x, dtype=float)
+    labels = np.asarray(labels)
+    total = len(x) * repeats
+    starts = range(0, total, batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+
+    noiseless = layer.forward(x)
+    ideal = x @ layer.weights.T + layer.bias
+    correct = 0
+    error = 0.0
+    power = 0.0
+    for start, chunk_seed in zip(starts, seeds):
+        index = np.arange(start, min(start + batch_size, total)) % len(x)
+        output = layer.forward(x[index], noise=noise, rng=np.random.default_rng(chunk_seed))
+        correct += int(np.sum(output.argmax(axis=1) == labels[index]))
+        error += float(np.sum((output - ideal[index]) ** 2))
+        power += float(np.sum(ideal[index] ** 2))
+
+    return {
+        'accuracy': correct / total,
+        'noiseless_accuracy': float(np.mean(noiseless.argmax(axis=1) == labels)),
+        'relative_error': float(np.sqrt(error / max(power, 1e-300))),
+    }
+
+
+def accuracy_vs_power(layer, x, labels, powers, noise=None, **kwargs):
+    """
+    Noisy accuracy over laser powers per channel
+
+    Args:
+        layer: Analysis.photonic_layer.PhotonicLayer
+        x, labels: Inputs and labels
+        powers: Laser powers per channel at x = 1 (mW)
+        noise: NoiseModel (default: NoiseModel())
+        **kwargs: Passed to noisy_accuracy
+
+    Returns:
+        dict: 'laser_power', 'accuracy', 'relative_error' arrays
+    """
+    noise = noise or NoiseModel()
+    original = layer.laser_power
+    results = []
+    try:
+        for power in powers:
+            layer.laser_power = power
+            results.append(noisy_accuracy(layer, x, labels, noise, **kwargs))
+    finally:
+        layer.laser_power = original
+
+    return {
+        'laser_power': np.asarray(powers, dtype=float),
+        'accuracy': np.array([r['accuracy'] for r in results]),
+        'relative_error': np.array([r['relative_error'] for r in results]),
+    }
+
+
+def accuracy_vs_resolution(layer, x, labels, bits, noise=None, **kwargs):
+    """
+    Noisy accuracy over DAC resolutions spanning the layer's voltage range
+
+    Args:
+        layer: Analysis.photonic_layer.PhotonicLayer
+        x, labels: Inputs and labels
+        bits: DAC bits; interval_v = (max_v - min_v) / 2 ** bits
+        noise: NoiseModel (default: NoiseModel())
+        **kwargs: Passed to noisy_accuracy
+
+    Returns:
+        dict: 'bits', 'interval_v', 'accuracy', 'relative_error' arrays
+    """
+    noise = noise or NoiseModel()
+    bits = np.asarray(bits)
+    intervals = (layer.max_v - layer.min_v) / 2.0 ** bits
+    original = layer.interval_v
+    results = []
+    try:
+        for interval_v in intervals:
+            layer.interval_v = interval_v
+            layer.program()
+            results.append(noisy_accuracy(layer, x, labels, noise, **kwargs))
+    finally:
+        layer.interval_v = original
+        layer.program()
+
+    return {
+        'bits': bits,
+        'interval_v': intervals,
+        'accuracy': np.array([r['accuracy'] for r in results]),
+        'relative_error': np.array([r['relative_error'] for r in results]),
+    }
@@ -0,0 +1,405 @@
+"""
+Photonic Layer
+Dense neural-network layer mapped onto microring weight banks: weights are
+programmed as heater voltages through the calibration tables, and inference
+runs batched through the analytic ring model with balanced drop/thru
+photodetection
+
+Run the dataset benchmarks with python -m Analysis.photonic_layer
+"""
+
+import time
+import warnings
+import numpy as np
+
+from Analysis.ring_model import RingModel
+from Analysis.calibration import CalibrationTable
+
+# bank rows evaluated together when the inter-channel crosstalk is modelled
+# (each row holds an in_features x in_features transmission block)
+CROSSTALK_BLOCK = 1 << 22
+
+# rounds of moving rings to another resonance while thermal compensation
+# puts their heaters out of range
+THERMAL_ITERATIONS = 50
+
+# heater power levels (fractions of the range) thermal compensation starts
+# from, lowest first: cooler rings tune more gently, so the DAC step costs
+# less weight accuracy
+THERMAL_LEVELS = (0.05, 0.1, 0.2, 0.35, 0.5, 0.75)
+
+# target correction rounds for the in-bank crosstalk, and the weight error
+# (on the [-1, 1] scale) below which they stop
+CROSSTALK_ITERATIONS = 8
+CROSSTALK_TOLERANCE = 1e-3
+
+
+def channel_wavelengths(model, channels, centre=None):
+    """
+    WDM grid of one channel per input
+
+    Channels are FSR / N apart with N the smallest odd number above the
+    channel count. With N odd no channel sits half an FSR from another, so
+    a ring tuned off resonance for its own channel (weight +1) does not put
+    its resonance on a neighbour's.
+
+    Returns:
+        np.ndarray: (channels,) wavelengths (m)
+    """
+    centre = model.wavelength0 if centre is None else centre
+    slots = channels + 1 if channels % 2 == 0 else channels + 2
+    return centre + (np.arange(channels) - (channels - 1) / 2) * model.fsr(centre) / slots
+
+
+def bank_transmission(model, wavelengths, voltages, crosstalk=True):
+    """
+    Drop and thru transmission of every channel through every weight bank
+
+    Ring k of a bank is tuned for channel k. Without crosstalk each channel
+    only sees its own ring. With crosstalk every channel passes all the rings
+    of its bank in order: the drop port collects what each ring drops of the
+    light the earlier rings let through.
+
+    Args:
+        model: Analysis.ring_model.RingModel
+        wavelengths: (in,) channel wavelengths (m)
+        voltages: (out, in) heater voltage of each ring
+
+    Returns:
+        tuple: (drop, thru) arrays of shape (out, in)
+    """
+    voltages = np.asarray(voltages, dtype=float)
+    if not crosstalk:
+        return model.transmission(wavelengths[None, :], voltages)
+
+    rows, channels = voltages.shape
+    block = max(1, CROSSTALK_BLOCK // max(channels * channels, 1))
+    drop = np.empty((rows, channels))
+    thru = np.empty((rows, channels))
+    for start in range(0, rows, block):
+        # (rows, ring k, channel j)
+        ring_drop, ring_thru = model.transmission(wavelengths[None, None, :],
+                                                  voltages[start:start + block, :, None])
+        passed = np.cumprod(ring_thru, axis=1)
+        reaching = np.concatenate([np.ones_like(passed[:, :1]), passed[:, :-1]], axis=1)
+        drop[start:start + block] = np.einsum('rkj,rkj->rj', ring_drop, reaching)
+        thru[start:start + block] = passed[:, -1]
+    return drop, thru
+
+
+class PhotonicLayer:
+    """
+    y = W x + b computed by microring weight banks
+
+    Each output is one bank of in_features rings on a WDM bus. Inputs are
+    optical powers, so x must be non-negative (normalise features to [0, 1]).
+    Weights are scaled into [-1, 1] by their largest magnitude, programmed as
+    quantised heater voltages and read back as thru - drop photocurrents.
+    """
+
+    def __init__(self, weights, bias=None, model=None, platform='sipho', wavelengths=None,
+                 min_v=0.0, max_v=3.0, interval_v=1e-5, table_interval_v=1e-4,
+                 crosstalk=True, thermal=None, compensate=True, laser_power=1.0, responsivity=1.0):
+        """
+        Args:
+            weights: (out, in) weight matrix
+            bias: Optional (out,) bias, added electronically
+            model: Analysis.ring_model.RingModel (default: from the platform tables)
+            platform: 'sipho' or 'sin', used when no model is given
+            wavelengths: (in,) channel wavelengths (default: channel_wavelengths)
+            min_v, max_v: Heater voltage range (V). The platform tables tune
+                ever faster with voltage, the first few volts already span
+                several FSRs
+            interval_v: DAC voltage step (V); programmed voltages are quantised
+                to it. Weight accuracy is mostly set by this step
+            table_interval_v: Step of the calibration tables (see
+                CalibrationTable.from_model), independent of the DAC
+            crosstalk: Model every ring of a bank acting on every channel
+            thermal: Optional Analysis.thermal_crosstalk.ThermalCrosstalk
+                between the heaters of a bank; the tables then extend to the
+                hottest equivalent voltage the heaters together produce
+            compensate: Pre-compensate the heater voltages for thermal.
+                Rings left out of range are flagged in infeasible, with a
+                warning
+            laser_power: Optical power per channel at x = 1 (mW)
+            responsivity: Photodetector responsivity (A/W)
+        """
+        self.weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        out_features, in_features = self.weights.shape
+        self.bias = np.zeros(out_features) if bias is None else np.asarray(bias, dtype=float)
+        self.model = model or RingModel.from_platform(platform)
+        self.wavelengths = (channel_wavelengths(self.model, in_features) if wavelengths is None
+                            else np.asarray(wavelengths, dtype=float))
+        self.min_v = min_v
+        self.max_v = max_v
+        self.interval_v = interval_v
+        self.crosstalk = crosstalk
+        self.thermal = thermal
+        self.compensate = compensate
+        self.laser_power = laser_power
+        self.responsivity = responsivity
+
+        largest = np.abs(self.weights).max()
+        self.scale = largest if largest > 0 else 1.0
+
+        # neighbours' heat adds to each ring's own, the tables must reach the
+        # hottest equivalent voltage the heaters together can produce
+        table_max_v = max_v
+        if thermal is not None:
+            table_max_v = max_v * np.sqrt(thermal.matrix.sum(axis=-1).max())
+        self.tables = [CalibrationTable.from_model(self.model, wavelength, min_v, table_max_v, table_interval_v)
+                       for wavelength in self.wavelengths]
+        self.program()
+
+    @property
+    def shape(self):
+        return self.weights.shape
+
+    def program(self):
+        """
+        Map the weights onto quantised heater voltages and evaluate the banks
+
+        The calibration tables hold each ring alone. With crosstalk the
+        other rings of a bank also act on every channel, so the targets are
+        corrected by the remaining error and reprogrammed until the banks
+        apply the weights (the best round is kept).
+        """
+        desired = self.weights / self.scale
+        target = desired
+        best = None
+        for _ in range(CROSSTALK_ITERATIONS if self.crosstalk else 1):
+            voltages, infeasible = self._program(target)
+            drop, thru = self.evaluate(voltages)
+            error = desired - (thru - drop)
+            largest = np.abs(error).max()
+            if best is None or largest < best[0]:
+                best = (largest, voltages, infeasible, drop, thru)
+            if largest < CROSSTALK_TOLERANCE:
+                break
+            target = np.clip(target + error, -1, 1)
+        _, self.voltages, self.infeasible, self.drop, self.thru = best
+
+        if self.infeasible.any():
+            warnings.warn(f"{self.infeasible.sum()} of {self.infeasible.size} rings cannot be thermally "
+                          f"compensated with heaters in {self.min_v}..{self.max_v} V, see infeasible")
+
+    def _program(self, target):
+        """
+        Quantised heater voltages for target weights
+
+        Returns:
+            tuple: (voltages, (out, in) mask of rings thermal compensation
+                could not reach)
+        """
+        voltages = np.column_stack([table.to_voltage(target[:, j]) for j, table in enumerate(self.tables)])
+        infeasible = np.zeros(voltages.shape, dtype=bool)
+        if self.thermal is not None and self.compensate:
+            equivalent, infeasible = self._thermal_targets(target, voltages)
+            voltages = self.thermal.compensate(equivalent)
+        steps = np.round((voltages - self.min_v) / self.interval_v)
+        voltages = np.clip(self.min_v + steps * self.interval_v, self.min_v, self.max_v)
+        return voltages, infeasible
+
+    def _thermal_targets(self, target, voltages):
+        """
+        Equivalent voltages reaching the targets that heaters in range can
+        produce together
+
+        Every ring starts from the voltage reaching its target (on whichever
+        resonance) nearest to what a uniform heater power makes it see. The
+        heaters of the whole bank are then solved together, and rings whose
+        heater falls below (above) its range move to the next resonance up
+        (down) until the bank is feasible. Banks keep the lowest starting
+        power that works.
+
+        Returns:
+            tuple: (equivalent voltages, (out, in) mask of rings whose heater
+                falls outside min_v..max_v)
+        """
+        low, high = self.min_v ** 2, self.max_v ** 2
+        step = np.array([table.voltage[1] - table.voltage[0] for table in self.tables])
+        result = None
+        for level in THERMAL_LEVELS:
+            seen = self.thermal.apply(np.full(voltages.shape, np.sqrt(low + level * (high - low))))
+            equivalent = np.column_stack([table.nearest_voltage(target[:, j], seen[:, j])
+                                          for j, table in enumerate(self.tables)])
+            for _ in range(THERMAL_ITERATIONS):
+                solution = self.thermal.compensate(equivalent, clip=False)
+                under, over = solution < low, solution > high
+                if not (under | over).any():
+                    break
+                for j, table in enumerate(self.tables):
+                    for rows, below in ((np.flatnonzero(under[:, j]), False), (np.flatnonzero(over[:, j]), True)):
+                        if len(rows):
+                            if below:
+                                moved = table.to_voltage(target[rows, j], maximum=equivalent[rows, j] - step[j])
+                            else:
+                                moved = table.to_voltage(target[rows, j], minimum=equivalent[rows, j] + step[j])
+                            equivalent[rows, j] = np.where(np.isnan(moved), equivalent[rows, j], moved)
+            infeasible = under | over
+            if result is None:
+                result = (equivalent, infeasible)
+            else:
+                # banks keep the lowest level that works for all their rings
+                update = result[1].any(axis=-1) & ~infeasible.any(axis=-1)
+                result[0][update] = equivalent[update]
+                result[1][update] = infeasible[update]
+            if not result[1].any():
+                break
+        return result
+
+    def evaluate(self, voltages):
+        """
+        (drop, thru) of the banks for applied heater voltages, including the
+        thermal crosstalk between heaters
+        """
+        if self.thermal is not None:
+            voltages = self.thermal.apply(voltages)
+        return bank_transmission(self.model, self.wavelengths, voltages, self.crosstalk)
+
+    @property
+    def effective_weights(self):
+        """Weights the banks actually apply, in the units of weights"""
+        return self.scale * (self.thru - self.drop)
+
+    def photocurrents(self, x):
+        """
+        Thru and drop photocurrents of every bank (mA)
+
+        Args:
+            x: (batch, in) non-negative inputs
+
+        Returns:
+            tuple: (thru, drop) arrays of shape (batch, out)
+        """
+        power = np.asarray(x, dtype=float) * self.laser_power
+        return (self.responsivity * power @ self.thru.T,
+                self.responsivity * power @ self.drop.T)
+
+    def forward(self, x, batch_size=None, noise=None, rng=None):
+        """
+        Batched inference through the weight banks
+
+        Args:
+            x: (batch, in) or (in,) non-negative inputs
+            batch_size: Optional rows per chunk, bounds the working memory
+            noise: Optional Analysis.noise.NoiseModel applied to every chunk
+            rng: np.random.Generator for the noise (default: unseeded)
+
+        Returns:
+            np.ndarray: (batch, out) or (out,) outputs
+        """
+        x = np.asarray(x, dtype=float)
+        if (x < 0).any():
+            raise ValueError("Photonic inputs are optical powers and must be non-negative")
+        single = x.ndim == 1
+        x = np.atleast_2d(x)
+
+        batch_size = batch_size or len(x)
+        output = np.empty((len(x), len(self.bias)))
+        gain = self.scale / (self.responsivity * self.laser_power)
+        if noise is not None and rng is None:
+            rng = np.random.default_rng()
+        for start in range(0, len(x), batch_size):
+            if noise is None:
+                thru, drop = self.photocurrents(x[start:start + batch_size])
+            else:
+                thru, drop = noise.photocurrents(self, x[start:start + batch_size], rng)
+            # balanced photodetector pair
+            output[start:start + batch_size] = gain * (thru - drop) + self.bias
+        return output[0] if single else output
+
+    __call__ = forward
+
+
+def fit_linear(x, labels, l2=1e-3):
+    """
+    Ridge-regression linear classifier (one-hot targets), closed form
+
+    Returns:
+        tuple: (weights (classes, features), bias (classes,))
+    """
+    classes = int(labels.max()) + 1
+    targets = np.eye(classes)[labels] * 2 - 1
+    design = np.column_stack([x, np.ones(len(x))])
+    regulariser = l2 * np.eye(design.shape[1])
+    regulariser[-1, -1] = 0
+    solution = np.linalg.solve(design.T @ design + regulariser, design.T @ targets)
+    return solution[:-1].T, solution[-1]
+
+
+def benchmark(layer, x, labels=None, repeats=3, batch_size=None):
+    """
+    Throughput and accuracy of a photonic layer against the float matmul
+
+    Args:
+        layer: PhotonicLayer
+        x: (batch, in) non-negative inputs
+        labels: Optional class labels to report classification accuracy
+        repeats: Timed runs, the fastest is reported
+        batch_size: Passed to forward
+
+    Returns:
+        dict: 'mac_per_s', 'reference_mac_per_s', 'relative_error' (L2),
+            'max_error', plus 'accuracy' / 'reference_accuracy' with labels
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    macs = x.shape[0] * layer.weights.size
+
+    def fastest(function):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            value = function()
+            times.append(time.perf_counter() - start)
+        return value, max(min(times), 1e-12)
+
+    output, elapsed = fastest(lambda: layer.forward(x, batch_size))
+    reference, reference_elapsed = fastest(lambda: x @ layer.weights.T + layer.bias)
+
+    result = {
+        'mac_per_s': macs / elapsed,
+        'reference_mac_per_s': macs / reference_elapsed,
+        'relative_error': float(np.linalg.norm(output - reference) / max(np.linalg.norm(reference), 1e-30)),
+        'max_error': float(np.abs(output - reference).max()),
+    }
+    if labels is not None:
+        result['accuracy'] = float(np.mean(output.argmax(axis=1) == labels))
+        result['reference_accuracy'] = float(np.mean(reference.argmax(axis=1) == labels))
+    return result
+
+
+def run_benchmark(name, **layer_kwargs):
+    """
+    Train a linear classifier on a bundled dataset and run it photonically
+
+    Features are min-max scaled to [0, 1] on the training split so they can
+    be encoded as optical power
+
+    Args:
+        name: Analysis.benchmark_data dataset name
+        **layer_kwargs: Passed to PhotonicLayer
+
+    Returns:
+        dict: benchmark() output on the test split
+    """
+    from Analysis.benchmark_data import load_dataset
+
+    x_train, y_train, x_test, y_test = load_dataset(name)
+    lo, hi = x_train.min(axis=0), x_train.max(axis=0)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    x_train = (x_train - lo) / span
+    x_test = np.clip((x_test - lo) / span, 0, 1)
+
+    weights, bias = fit_linear(x_train, y_train)
+    layer = PhotonicLayer(weights, bias, **layer_kwargs)
+    return benchmark(layer, x_test, y_test)
+
+
+if __name__ == "__main__":
+    from Analysis.benchmark_data import DATASETS
+
+    for name in DATASETS:
+        result = run_benchmark(name)
+        print(f"{name}: accuracy {result['accuracy']:.3f} (float {result['reference_accuracy']:.3f}) | "
+              f"relative error {result['relative_error']:.3g} | {result['mac_per_s']:.3g} MAC/s")
@@ -0,0 +1,296 @@
+"""
+Resonance Fitting
+Batched Lorentzian/Gaussian lineshape fits of many spectra at once
+(vectorised Levenberg-Marquardt, chunks fitted in a thread pool)
+"""
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from Analysis.sweep_dataset import to_mw
+
+GAUSSIAN_FWHM = 2 * np.sqrt(2 * np.log(2))
+
+
+def _lorentzian(u, p):
+    """Value and Jacobian of offset + A w^2 / ((u - u0)^2 + w^2)"""
+    amplitude, u0, w, offset = (p[:, i, None] for i in range(4))
+    d = u - u0
+    denominator = d ** 2 + w ** 2
+    shape = w ** 2 / denominator
+    value = offset + amplitude * shape
+    jacobian = np.stack([
+        shape,
+        amplitude * 2 * w ** 2 * d / denominator ** 2,
+        amplitude * 2 * w * d ** 2 / denominator ** 2,
+        np.ones_like(shape),
+    ], axis=-1)
+    return value, jacobian
+
+
+def _gaussian(u, p):
+    """Value and Jacobian of offset + A exp(-(u - u0)^2 / (2 w^2))"""
+    amplitude, u0, w, offset = (p[:, i, None] for i in range(4))
+    d = u - u0
+    shape = np.exp(-d ** 2 / (2 * w ** 2))
+    value = offset + amplitude * shape
+    jacobian = np.stack([
+        shape,
+        amplitude * shape * d / w ** 2,
+        amplitude * shape * d ** 2 / w ** 3,
+        np.ones_like(shape),
+    ], axis=-1)
+    return value, jacobian
+
+
+LINESHAPES = {
+    'lorentzian': (_lorentzian, 2.0),
+    'gaussian': (_gaussian, GAUSSIAN_FWHM),
+}
+
+
+def initial_guess(wavelength, spectra):
+    """
+    Vectorised peak guesses for every spectrum
+
+    Args:
+        wavelength: Sorted wavelengths (n,)
+        spectra: Peaked spectra (m, n)
+
+    Returns:
+        tuple: (peak index, amplitude, offset, FWHM) arrays of shape (m,)
+    """
+    m, n = spectra.shape
+    rows = np.arange(m)
+    index = np.arange(n)
+
+    peak = np.argmax(spectra, axis=1)
+    offset = np.median(spectra, axis=1)
+    amplitude = spectra[rows, peak] - offset
+    half = offset + amplitude / 2
+
+    # nearest samples below half maximum on either side of the peak
+    below = spectra <= half[:, None]
+    left = np.where(below & (index < peak[:, None]), index, 0).max(axis=1)
+    right = np.where(below & (index > peak[:, None]), index, n - 1).min(axis=1)
+
+    spacing = np.median(np.diff(wavelength))
+    fwhm = np.maximum(wavelength[right] - wavelength[left], 2 * spacing)
+
+    return peak, amplitude, offset, fwhm
+
+
+def _fit_chunk(wavelength, spectra, lineshape, window, max_iter, tol):
+    model, fwhm_factor = LINESHAPES[lineshape]
+    m, n = spectra.shape
+
+    peak, amplitude, offset, fwhm = initial_guess(wavelength, spectra)
+    centre0 = wavelength[peak]
+
+    # fit window of +-window FWHM around each guess
+    lo = np.searchsorted(wavelength, centre0 - window * fwhm, side="left")
+    hi = np.searchsorted(wavelength, centre0 + window * fwhm, side="right")
+    hi = np.maximum(hi, np.minimum(lo + 5, n))
+
+    # only the window samples take part in the fit, gathered into a
+    # (m, widest window) block and masked past each window's end
+    width = int((hi - lo).max())
+    gather = np.minimum(lo[:, None] + np.arange(width), n - 1)
+    mask = gather < hi[:, None]
+    rows = np.arange(m)[:, None]
+
+    # fit in units of the guessed FWHM around the guessed centre and of the
+    # guessed amplitude, which keeps every problem equally well conditioned
+    scale = np.where(np.abs(amplitude) > 0, np.abs(amplitude), 1.0)
+    u = (wavelength[gather] - centre0[:, None]) / fwhm[:, None]
+    y = (spectra[rows, gather] - offset[:, None]) / scale[:, None]
+
+    p = np.column_stack([np.sign(amplitude) + (amplitude == 0), np.zeros(m),
+                         np.full(m, 1 / fwhm_factor), np.zeros(m)])
+    damping = np.full(m, 1e-3)
+
+    def cost_of(params):
+        value, jacobian = model(u, params)
+        residual = np.where(mask, y - value, 0.0)
+        return residual, jacobian, np.einsum('mn,mn->m', residual, residual)
+
+    residual, jacobian, cost = cost_of(p)
+    converged = np.zeros(m, dtype=bool)
+
+    for _ in range(max_iter):
+        jacobian = jacobian * mask[..., None]
+        jtj = np.swapaxes(jacobian, 1, 2) @ jacobian
+        gradient = (np.swapaxes(jacobian, 1, 2) @ residual[..., None])[..., 0]
+
+        diagonal = np.einsum('mii->mi', jtj)
+        system = jtj + (damping[:, None] * np.maximum(diagonal, 1e-12))[:, :, None] * np.eye(4)
+        try:
+            step = np.linalg.solve(system, gradient[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # a degenerate window (e.g. flat spectrum) must not stop the batch
+            step = (np.linalg.pinv(system) @ gradient[..., None])[..., 0]
+        step[converged] = 0
+
+        trial = p + step
+        trial_residual, trial_jacobian, trial_cost = cost_of(trial)
+
+        accept = trial_cost < cost
+        p = np.where(accept[:, None], trial, p)
+        residual = np.where(accept[:, None], trial_residual, residual)
+        jacobian = np.where(accept[:, None, None], trial_jacobian, jacobian)
+        improvement = np.where(accept, cost - trial_cost, 0.0)
+        cost = np.where(accept, trial_cost, cost)
+        damping = np.where(accept, damping / 10, damping * 10)
+
+        converged |= (accept & (improvement <= tol * np.maximum(cost, 1e-30))) | (damping > 1e10)
+        if converged.all():
+            break
+
+    amplitude_fit = p[:, 0] * scale
+    centre = centre0 + p[:, 1] * fwhm
+    linewidth = np.abs(p[:, 2]) * fwhm * fwhm_factor
+    offset_fit = offset + p[:, 3] * scale
+    rms = np.sqrt(cost / np.maximum(mask.sum(axis=1), 1)) * scale
+
+    return {
+        'centre': centre,
+        'linewidth': linewidth,
+        'amplitude': amplitude_fit,
+        'offset': offset_fit,
+        'rms': rms,
+        'converged': converged,
+        'window': (lo, hi),
+    }
+
+
+def _fit_batch(wavelength, spectra, lineshape, window, max_iter, tol, workers, chunk_size):
+    chunks = [slice(i, min(i + chunk_size, len(spectra))) for i in range(0, len(spectra), chunk_size)]
+
+    def run(chunk):
+        return _fit_chunk(wavelength, spectra[chunk], lineshape, window, max_iter, tol)
+
+    if workers == 1 or len(chunks) == 1:
+        parts = [run(chunk) for chunk in chunks]
+    else:
+        # NumPy releases the GIL in the heavy kernels, threads overlap well
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(run, chunks))
+
+    fit = {}
+    for key in parts[0]:
+        if key == 'window':
+            fit[key] = tuple(np.concatenate([part[key][i] for part in parts]) for i in range(2))
+        else:
+            fit[key] = np.concatenate([part[key] for part in parts])
+    return fit
+
+
+def fit_resonances(wavelength, spectra, kind='peak', lineshape='lorentzian', units='mW',
+                   window=3.0, max_iter=100, tol=1e-10, fsr_threshold=0.5,
+                   workers=None, chunk_size=1024):
+    """
+    Fit the main resonance of every spectrum, plus the next one for the FSR
+
+    Args:
+        wavelength: Sorted wavelengths (n,), shared by all spectra (m)
+        spectra: Power spectra (..., n); leading axes are batched
+        kind: 'peak' (drop port) or 'dip' (thru port)
+        lineshape: 'lorentzian' or 'gaussian'
+        units: Units of spectra ('mW', 'W' or 'dBm'); fits run on linear power
+        window: Fit window half-width, in guessed FWHMs
+        max_iter: Maximum Levenberg-Marquardt iterations
+        tol: Relative cost improvement that counts as converged
+        fsr_threshold: The second resonance must be at least this fraction
+            of the first (else the FSR is NaN)
+        workers: Threads fitting chunks in parallel (None: executor default)
+        chunk_size: Spectra per chunk
+
+    Returns:
+        dict: Arrays shaped like the leading axes of spectra:
+            'centre' (m), 'linewidth' (FWHM, m), 'q', 'extinction_ratio' (dB),
+            'fsr' (m), 'amplitude', 'offset' (mW), 'rms', 'converged',
+            'extinction_fitted' (False where the fitted floor is not
+            positive and the extinction ratio comes from the measured
+            extremes of the fit window)
+    """
+    if lineshape not in LINESHAPES:
+        raise ValueError(f"Invalid lineshape: {lineshape}. Must be one of {list(LINESHAPES)}")
+    if kind not in ('peak', 'dip'):
+        raise ValueError(f"Invalid kind: {kind}. Must be 'peak' or 'dip'")
+
+    wavelength = np.asarray(wavelength, dtype=float)
+    spectra = to_mw(spectra, units)
+    batch_shape = spectra.shape[:-1]
+    spectra = spectra.reshape(-1, len(wavelength))
+
+    # dips are fitted as peaks of the negated spectrum
+    sign = 1.0 if kind == 'peak' else -1.0
+    signed = sign * spectra
+
+    first = _fit_batch(wavelength, signed, lineshape, window, max_iter, tol, workers, chunk_size)
+
+    # mask the first resonance and fit the strongest remaining one
+    index = np.arange(len(wavelength))
+    lo, hi = first['window']
+    masked = np.where((index >= lo[:, None]) & (index < hi[:, None]),
+                      np.median(signed, axis=1, keepdims=True), signed)
+    second = _fit_batch(wavelength, masked, lineshape, window, max_iter, tol, workers, chunk_size)
+
+    fsr = np.abs(second['centre'] - first['centre'])
+    found = (first['amplitude'] > 0) & (second['amplitude'] >= fsr_threshold * first['amplitude'])
+    fsr = np.where(found, fsr, np.nan)
+
+    amplitude = sign * first['amplitude']
+    offset = sign * first['offset']
+    extreme = offset + amplitude
+    high, low = (extreme, offset) if kind == 'peak' else (offset, extreme)
+
+    # a fit whose floor is not positive has no ratio, use the measured
+    # extremes of its window instead (NaN if those are not positive either)
+    inside = (index >= lo[:, None]) & (index < hi[:, None])
+    measured_high = np.max(np.where(inside, spectra, -np.inf), axis=1)
+    measured_low = np.min(np.where(inside, spectra, np.inf), axis=1)
+    fitted = low > 0
+    high = np.where(fitted, high, measured_high)
+    low = np.where(fitted, low, measured_low)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        extinction_ratio = np.where(low > 0, 10 * np.log10(high / np.where(low > 0, low, 1.0)), np.nan)
+
+    result = {
+        'centre': first['centre'],
+        'linewidth': first['linewidth'],
+        'q': first['centre'] / first['linewidth'],
+        'extinction_ratio': extinction_ratio,
+        'fsr': fsr,
+        'amplitude': amplitude,
+        'offset': offset,
+        'rms': first['rms'],
+        'converged': first['converged'],
+        'extinction_fitted': fitted,
+    }
+    return {key: value.reshape(batch_shape) for key, value in result.items()}
+
+
+def fit_dataset(dataset, port='drop', **kwargs):
+    """
+    Fit every spectrum of a SweepDataset along its wavelength axis
+
+    Args:
+        dataset: Analysis.sweep_dataset.SweepDataset with a 'wavelength' axis
+        port: 'drop' (fitted as peaks) or 'thru' (fitted as dips)
+        **kwargs: Passed to fit_resonances
+
+    Returns:
+        dict: fit_resonances arrays over the other axes of the dataset
+    """
+    axis = dataset.dims.index('wavelength')
+    wavelength = np.asarray(dataset.coord('wavelength'))
+    spectra = np.moveaxis(np.asarray(dataset[port]), axis, -1)
+
+    # fits need ascending wavelengths
+    if wavelength[0] > wavelength[-1]:
+        wavelength = wavelength[::-1]
+        spectra = spectra[..., ::-1]
+
+    kwargs.setdefault('kind', 'peak' if port == 'drop' else 'dip')
+    return fit_resonances(wavelength, spectra, units=dataset.units, **kwargs)
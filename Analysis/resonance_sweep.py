@@ -0,0 +1,135 @@
+"""
+Resonance Sweep
+Wavelength sweep driver that finds ring resonances on a coarse pass and
+then bisects densely only inside each linewidth
+"""
+
+import numpy as np
+
+
+def find_resonances(wavelength, drop, thru):
+    """
+    Indices of resonance candidates: drop peaks or thru dips
+
+    Args:
+        wavelength: Sorted wavelengths
+        drop: Drop transmission (linear)
+        thru: Thru transmission (linear)
+
+    Returns:
+        np.ndarray: Sample indices of the candidates
+    """
+    drop = np.asarray(drop)
+    thru = np.asarray(thru)
+    if len(wavelength) < 3:
+        return np.array([], dtype=int)
+
+    drop_peak = (drop[1:-1] > drop[:-2]) & (drop[1:-1] >= drop[2:])
+    thru_dip = (thru[1:-1] < thru[:-2]) & (thru[1:-1] <= thru[2:])
+    return np.nonzero(drop_peak | thru_dip)[0] + 1
+
+
+def estimate_linewidth(wavelength, drop, index):
+    """
+    Full width at half maximum of the drop peak at a sample index
+
+    Walks out from the peak to the half-maximum crossings (between the
+    peak and its baseline). If a side never crosses, that side's extent is
+    the distance to the neighbouring sample.
+
+    Returns:
+        float: FWHM estimate (m)
+    """
+    peak = drop[index]
+    baseline = min(drop.min(), peak)
+    half = baseline + (peak - baseline) / 2
+
+    left = index
+    while left > 0 and drop[left] > half:
+        left -= 1
+    right = index
+    while right < len(drop) - 1 and drop[right] > half:
+        right += 1
+
+    return max(wavelength[right] - wavelength[left], 0.0)
+
+
+def adaptive_sweep(spectrum, start_wavelength, end_wavelength, coarse_points=100,
+                   points_per_linewidth=20, resolution=1e-13, max_passes=12):
+    """
+    Sweep a spectrum, sampling densely only around resonances
+
+    Every pass evaluates all its new wavelengths in a single spectrum() call,
+    so a Lumerical backend runs one native sweep per pass.
+
+    Args:
+        spectrum: Callable wavelengths (1D array, m) -> (drop, thru) linear
+            power arrays
+        start_wavelength: Sweep start (m)
+        end_wavelength: Sweep end (m)
+        coarse_points: Points of the initial uniform pass
+        points_per_linewidth: Target sample density inside each linewidth
+        resolution: Smallest wavelength step ever sampled (m)
+        max_passes: Maximum refinement passes
+
+    Returns:
+        tuple: (wavelength, drop, thru) merged non-uniform spectrum, sorted
+    """
+    wavelength = np.linspace(start_wavelength, end_wavelength, coarse_points)
+    drop, thru = (np.asarray(x, dtype=float) for x in spectrum(wavelength))
+
+    for _ in range(max_passes):
+        resonances = find_resonances(wavelength, drop, thru)
+        if len(resonances) == 0:
+            break
+
+        new_wavelengths = []
+        for i in resonances:
+            # the window can never be narrower than the surrounding samples,
+            # so an unresolved peak keeps the bracket of its neighbours
+            neighbour_span = wavelength[min(i + 1, len(wavelength) - 1)] - wavelength[max(i - 1, 0)]
+            linewidth = estimate_linewidth(wavelength, drop, i)
+            half_window = max(linewidth, neighbour_span / 2)
+            target_step = max(linewidth / points_per_linewidth, resolution)
+
+            lo = np.searchsorted(wavelength, wavelength[i] - half_window, side="left")
+            hi = np.searchsorted(wavelength, wavelength[i] + half_window, side="right")
+            lo = max(lo - 1, 0)
+            hi = min(hi + 1, len(wavelength))
+
+            window = wavelength[lo:hi]
+            gaps = np.diff(window)
+            coarse_gaps = gaps > target_step
+            new_wavelengths.append(window[:-1][coarse_gaps] + gaps[coarse_gaps] / 2)
+
+        new_wavelengths = np.unique(np.concatenate(new_wavelengths))
+        # never re-sample an existing point
+        new_wavelengths = new_wavelengths[~np.isin(new_wavelengths, wavelength)]
+        if len(new_wavelengths) == 0:
+            break
+
+        new_drop, new_thru = (np.asarray(x, dtype=float) for x in spectrum(new_wavelengths))
+
+        wavelength = np.concatenate((wavelength, new_wavelengths))
+        drop = np.concatenate((drop, new_drop))
+        thru = np.concatenate((thru, new_thru))
+        order = np.argsort(wavelength)
+        wavelength, drop, thru = wavelength[order], drop[order], thru[order]
+
+    return wavelength, drop, thru
+
+
+def ring_model_spectrum(model, voltage=None):
+    """
+    Spectrum callable backed by the analytic ring model
+
+    Args:
+        model: RingModel
+        voltage: Heater voltage
+
+    Returns:
+        callable: wavelengths -> (drop, thru)
+    """
+    def spectrum(wavelength):
+        return model.transmission(wavelength, voltage)
+    return spectrum
@@ -0,0 +1,215 @@
+"""
+Resonance Tracking
+Follows ring resonances across a heater sweep (voltage x wavelength) to
+build the tuning curve, unwrapping resonances that leave the window by
+one FSR
+"""
+
+import numpy as np
+
+from Analysis.sweep_dataset import to_mw
+
+
+def detect_peaks(wavelength, spectra, min_prominence=0.5):
+    """
+    Vectorised peak detection on every row of a matrix
+
+    Peaks are local maxima rising at least min_prominence of the row's
+    range above the row median, refined to sub-sample positions by a
+    parabola through the three samples around each maximum.
+
+    Args:
+        wavelength: Sorted wavelengths (n,)
+        spectra: Peaked spectra (m, n), linear
+        min_prominence: Fraction of (max - median) a peak must reach
+
+    Returns:
+        np.ndarray: (m, k) peak wavelengths per row, sorted, NaN padded
+    """
+    y = np.asarray(spectra, dtype=float)
+    median = np.median(y, axis=1, keepdims=True)
+    threshold = median + min_prominence * (y.max(axis=1, keepdims=True) - median)
+
+    centre = y[:, 1:-1]
+    is_peak = (centre > y[:, :-2]) & (centre >= y[:, 2:]) & (centre > threshold)
+    rows, columns = np.nonzero(is_peak)
+    columns = columns + 1
+
+    # parabolic sub-sample offset, in samples
+    left, middle, right = y[rows, columns - 1], y[rows, columns], y[rows, columns + 1]
+    curvature = left - 2 * middle + right
+    offset = np.where(curvature != 0, 0.5 * (left - right) / np.where(curvature != 0, curvature, 1), 0.0)
+    spacing = np.gradient(wavelength)[columns]
+    positions = wavelength[columns] + np.clip(offset, -0.5, 0.5) * spacing
+
+    # scatter into a NaN padded (m, k) matrix, row by row in order
+    counts = np.bincount(rows, minlength=len(y))
+    k = max(int(counts.max()) if len(counts) else 0, 1)
+    slot = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    peaks = np.full((len(y), k), np.nan)
+    peaks[rows, slot] = positions
+    return peaks
+
+
+def estimate_group_length(peaks):
+    """
+    Group optical length n_g L of the ring from neighbouring peaks in the
+    same row, each pair giving lambda^2 / spacing (median over pairs)
+
+    Returns:
+        float: n_g L (m), NaN if no row holds two peaks
+    """
+    spacing = np.diff(peaks, axis=1)
+    centre = 0.5 * (peaks[:, 1:] + peaks[:, :-1])
+    found = np.isfinite(spacing) & (spacing > 0)
+    return float(np.median(centre[found] ** 2 / spacing[found])) if found.any() else np.nan
+
+
+def estimate_fsr(peaks, wavelength=None):
+    """
+    FSR lambda^2 / (n_g L) at a wavelength (default: the median peak), see
+    estimate_group_length
+
+    Returns:
+        float: FSR (m), NaN if no row holds two peaks
+    """
+    if wavelength is None:
+        wavelength = np.nanmedian(peaks) if np.isfinite(peaks).any() else np.nan
+    return float(wavelength ** 2 / estimate_group_length(peaks))
+
+
+def track_resonances(voltage, wavelength, transmission, kind='peak', units='mW',
+                     fsr=None, power=None, resistance=800.0, min_prominence=0.5):
+    """
+    Track every resonance across a heater sweep
+
+    Between consecutive voltages each peak of the previous row is matched
+    to the nearest peak of the next one, its own order, and the step shift
+    is the median over peaks. Only peaks entering or leaving the window are
+    matched across it, one local FSR lambda^2 / (n_g L) away. Shifts
+    accumulate, so resonances keep being tracked after they wrap around
+    the wavelength window.
+
+    Args:
+        voltage: Heater voltages (m,)
+        wavelength: Sorted wavelengths (n,)
+        transmission: Power matrix (m, n), one spectrum per voltage
+        kind: 'peak' (drop port) or 'dip' (thru port)
+        units: Units of transmission ('mW', 'W' or 'dBm')
+        fsr: Free spectral range (m) at the centre of the window, scaled
+            with lambda^2 across it; estimated from the data if None (give
+            it when the window holds a single resonance)
+        power: Heater power per voltage (mW); V^2 / resistance if None
+        resistance: Heater resistance (ohm) used for the power
+        min_prominence: See detect_peaks
+
+    Returns:
+        dict: {
+            'voltage': (m,), 'power': heater power (m,) in mW,
+            'shift': resonance shift vs the first voltage (m,) in m,
+            'centres': tracked (unwrapped) centres (m, k) in m for the
+                resonances of the first voltage,
+            'peaks': detected peaks per voltage (m, k'), NaN padded,
+            'fsr': FSR at the centre of the window (m),
+            'tuning_efficiency': linear fit of shift vs power (nm/mW),
+            'local_efficiency': d(shift)/d(power) per voltage (nm/mW)
+        }
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    wavelength = np.asarray(wavelength, dtype=float)
+    spectra = to_mw(transmission, units)
+    if kind == 'dip':
+        spectra = -spectra
+
+    peaks = detect_peaks(wavelength, spectra, min_prominence)
+    centre = 0.5 * (wavelength[0] + wavelength[-1])
+    group_length = estimate_group_length(peaks) if fsr is None else centre ** 2 / fsr
+    fsr = centre ** 2 / group_length
+
+    # rows without peaks repeat the last row that had some, so the chain
+    # of shifts bridges them instead of losing a step
+    valid = np.isfinite(peaks).any(axis=1)
+    filled = peaks[np.maximum.accumulate(np.where(valid, np.arange(len(peaks)), 0))]
+    previous, following = filled[:-1], filled[1:]
+
+    # peaks entering or leaving the window meet their order one local FSR
+    # (lambda^2 / n_g L) outside it; these wrapped candidates only exist
+    # outside the window, so they never compete with the peaks inside it
+    local_fsr = following ** 2 / group_length
+    candidates = np.concatenate([
+        following,
+        np.where(following + local_fsr > wavelength[-1], following + local_fsr, np.nan),
+        np.where(following - local_fsr < wavelength[0], following - local_fsr, np.nan),
+    ], axis=1)
+
+    # (m-1, k, 3k) differences between every previous peak and candidate;
+    # each peak takes the nearest, its own order, within half an FSR
+    delta = candidates[:, None, :] - previous[:, :, None]
+    distance = np.where(np.isnan(delta), np.inf, np.abs(delta))
+    match = distance.argmin(axis=2)
+    nearest = np.take_along_axis(delta, match[..., None], axis=2)[..., 0]
+    half_fsr = 0.5 * previous ** 2 / group_length if np.isfinite(group_length) else np.inf
+    nearest = np.where(np.abs(nearest) < half_fsr, nearest, np.nan)
+
+    # steps come from the peaks matched inside the window when there are any
+    inside = np.isfinite(nearest) & (match < following.shape[1])
+    nearest = np.where(inside.any(axis=1, keepdims=True) & ~inside, np.nan, nearest)
+
+    # median over the matched peaks; rows without peaks contribute no step
+    found = ~np.isnan(nearest)
+    ordered = np.sort(np.where(found, nearest, np.inf), axis=1)
+    count = found.sum(axis=1)
+    rows = np.arange(len(ordered))
+    low = ordered[rows, np.maximum((count - 1) // 2, 0)]
+    high = ordered[rows, np.maximum(count // 2, 0)]
+    steps = np.where(count > 0, 0.5 * (low + high), 0.0)
+
+    shift = np.concatenate(([0.0], np.cumsum(steps)))
+    centres = filled[:1] + shift[:, None]
+
+    if power is None:
+        power = voltage ** 2 / resistance * 1e3
+    power = np.asarray(power, dtype=float)
+
+    shift_nm = shift * 1e9
+    if len(power) > 1 and np.ptp(power) > 0:
+        tuning_efficiency = float(np.polyfit(power, shift_nm, 1)[0])
+        local_efficiency = np.gradient(shift_nm, power)
+    else:
+        tuning_efficiency = np.nan
+        local_efficiency = np.full(len(power), np.nan)
+
+    return {
+        'voltage': voltage,
+        'power': power,
+        'shift': shift,
+        'centres': centres,
+        'peaks': peaks,
+        'fsr': fsr,
+        'tuning_efficiency': tuning_efficiency,
+        'local_efficiency': local_efficiency,
+    }
+
+
+def track_dataset(dataset, port='drop', **kwargs):
+    """
+    Track resonances of a SweepDataset with 'voltage' and 'wavelength' axes
+
+    Args:
+        dataset: Analysis.sweep_dataset.SweepDataset
+        port: 'drop' (tracked as peaks) or 'thru' (tracked as dips)
+        **kwargs: Passed to track_resonances
+
+    Returns:
+        dict: track_resonances output
+    """
+    spectra = np.asarray(dataset[port])
+    if dataset.dims.index('voltage') > dataset.dims.index('wavelength'):
+        spectra = spectra.T
+    wavelength = np.asarray(dataset.coord('wavelength'))
+    if wavelength[0] > wavelength[-1]:
+        wavelength = wavelength[::-1]
+        spectra = spectra[:, ::-1]
+
+    kwargs.setdefault('kind', 'peak' if port == 'drop' else 'dip')
+    return track_resonances(dataset.coord('voltage'), wavelength, spectra, units=dataset.units, **kwargs)
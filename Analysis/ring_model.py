@@ -0,0 +1,182 @@
+"""
+Analytic Ring Model
+Add-drop microring transmission computed from the platform neff(V) and
+coupling tables, without running Lumerical
+"""
+
+import numpy as np
+
+from Lumerical.interface import get_platform_path
+
+c = 3.0e8
+
+
+def load_neff_table(path):
+    """
+    Load a neff table ("V Re(neff) Im(neff)" rows)
+
+    Args:
+        path: neff .txt file (platform table or cache file)
+
+    Returns:
+        tuple: (voltage array, complex neff array), sorted by voltage
+    """
+    data = np.atleast_2d(np.loadtxt(path))
+    order = np.argsort(data[:, 0])
+    data = data[order]
+    return data[:, 0], data[:, 1] + 1j * data[:, 2]
+
+
+def load_coupling_table(path):
+    """
+    Load a coupling table ("frequency(Hz) coupling" rows)
+
+    Args:
+        path: couplingcoefficient.txt
+
+    Returns:
+        tuple: (wavelength array in m, power coupling array), sorted by wavelength
+    """
+    data = np.atleast_2d(np.loadtxt(path))
+    wavelength = c / data[:, 0]
+    order = np.argsort(wavelength)
+    return wavelength[order], data[order, 1]
+
+
+class RingModel:
+    """Add-drop ring resonator with a thermally tuned effective index"""
+
+    def __init__(self, radius=10e-6, coupling=0.04, drop_coupling=None,
+                 neff=2.565 + 0.0j, group_index=4.2, wavelength0=1545e-9,
+                 neff_table=None, coupling_table=None, neff_offset=0.0, coupling_scale=1.0):
+        """
+        Args:
+            radius: Ring radius (m)
+            coupling: Power coupling of the input bus (used if no coupling_table)
+            drop_coupling: Power coupling of the drop bus (defaults to coupling)
+            neff: Complex effective index at wavelength0 (used if no neff_table)
+            group_index: Group index, sets the dispersion around wavelength0
+            wavelength0: Wavelength at which neff is given (m)
+            neff_table: Optional (voltage, complex neff) from load_neff_table
+            coupling_table: Optional (wavelength, coupling) from load_coupling_table
+            neff_offset: Added to the effective index (e.g. width variation)
+            coupling_scale: Multiplies both bus couplings (e.g. gap variation)
+
+        radius, neff_offset and coupling_scale may be arrays that broadcast
+        against the wavelength/voltage arguments, modelling many rings at once
+        """
+        self.radius = radius
+        self.coupling = coupling
+        self.drop_coupling = drop_coupling
+        self.neff = neff
+        self.group_index = group_index
+        self.wavelength0 = wavelength0
+        self.neff_table = neff_table
+        self.coupling_table = coupling_table
+        self.neff_offset = neff_offset
+        self.coupling_scale = coupling_scale
+
+    @classmethod
+    def from_platform(cls, platform, neff_path=None, **kwargs):
+        """
+        Build a model from the platform tables
+
+        Args:
+            platform: 'sipho' or 'sin'
+            neff_path: Optional neff table (e.g. a cache file), defaults to
+                the platform neff.txt
+            **kwargs: Other RingModel arguments
+
+        Returns:
+            RingModel
+        """
+        platform_path = get_platform_path(platform)
+        if neff_path is None:
+            neff_path = f"{platform_path}/neff.txt"
+
+        return cls(
+            neff_table=load_neff_table(neff_path),
+            coupling_table=load_coupling_table(f"{platform_path}/couplingcoefficient.txt"),
+            **kwargs
+        )
+
+    @property
+    def length(self):
+        return 2 * np.pi * self.radius
+
+    def effective_index(self, wavelength, voltage=None):
+        """
+        Complex effective index at the given wavelengths and heater voltages
+
+        Args:
+            wavelength: Wavelengths (m), any shape
+            voltage: Heater voltages, broadcast against wavelength. Ignored
+                without a neff table.
+
+        Returns:
+            np.ndarray: Complex neff
+        """
+        wavelength = np.asarray(wavelength, dtype=float)
+
+        if self.neff_table is not None and voltage is not None:
+            table_v, table_neff = self.neff_table
+            voltage = np.asarray(voltage, dtype=float)
+            neff0 = np.interp(voltage, table_v, table_neff.real) + 1j * np.interp(voltage, table_v, table_neff.imag)
+        elif self.neff_table is not None:
+            neff0 = self.neff_table[1][0]
+        else:
+            neff0 = self.neff
+
+        neff0 = neff0 + self.neff_offset
+        # first order dispersion: d(neff)/d(lambda) = (neff - ng) / lambda
+        return neff0 + (neff0.real - self.group_index) * (wavelength - self.wavelength0) / self.wavelength0
+
+    def couplings(self, wavelength):
+        """Power coupling of the input and drop buses at the given wavelengths"""
+        if self.coupling_table is not None:
+            table_wavelength, table_coupling = self.coupling_table
+            kappa = np.interp(wavelength, table_wavelength, table_coupling)
+        else:
+            kappa = np.full(np.shape(wavelength), self.coupling)
+
+        drop_kappa = kappa if self.drop_coupling is None else np.full(np.shape(wavelength), self.drop_coupling)
+        if np.any(self.coupling_scale != 1.0):
+            kappa = np.clip(kappa * self.coupling_scale, 0, 1)
+            drop_kappa = np.clip(drop_kappa * self.coupling_scale, 0, 1)
+        return kappa, drop_kappa
+
+    def transmission(self, wavelength, voltage=None):
+        """
+        Drop and thru power transmission (linear, 0..1)
+
+        Args:
+            wavelength: Wavelengths (m), any shape
+            voltage: Heater voltages, broadcast against wavelength
+
+        Returns:
+            tuple: (drop, thru) arrays with the broadcast shape
+        """
+        wavelength = np.asarray(wavelength, dtype=float)
+        neff = self.effective_index(wavelength, voltage)
+        wavelength = np.broadcast_to(wavelength, neff.shape)
+
+        kappa, drop_kappa = self.couplings(wavelength)
+        r1 = np.sqrt(1 - kappa)
+        r2 = np.sqrt(1 - drop_kappa)
+
+        # round trip field attenuation and phase
+        a = np.exp(-2 * np.pi * np.clip(neff.imag, 0, None) * self.length / wavelength)
+        phi = 2 * np.pi * neff.real * self.length / wavelength
+        cos_phi = np.cos(phi)
+
+        denominator = 1 - 2 * a * r1 * r2 * cos_phi + (a * r1 * r2) ** 2
+        thru = (a ** 2 * r2 ** 2 - 2 * a * r1 * r2 * cos_phi + r1 ** 2) / denominator
+        drop = a * (1 - r1 ** 2) * (1 - r2 ** 2) / denominator
+
+        return drop, thru
+
+    def fsr(self, wavelength=None):
+        """Free spectral range (m) around a wavelength"""
+        if wavelength is None:
+            wavelength = self.wavelength0
+        return wavelength ** 2 / (self.group_index * self.length)
@@ -0,0 +1,110 @@
+"""
+Sweep Archive
+Discovers every sweep folder under a root (e.g. Extras/sweep_data), converts
+them concurrently to sweep bundles once, and opens them as SweepDatasets
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from Lumerical import bundle
+from Analysis.sweep_dataset import SweepDataset
+
+CACHE_FOLDER = ".bundles"
+
+
+def is_sweep_folder(path):
+    """A sweep folder holds exported .txt matrices or .npy spectra"""
+    try:
+        filenames = os.listdir(path)
+    except OSError:
+        return False
+    if bundle.META_FILENAME in filenames:
+        return False
+    return any(f.endswith(".npy") for f in filenames) or any(
+        f.endswith(".txt") and _is_lumerical_text(os.path.join(path, f)) for f in filenames)
+
+
+def _is_lumerical_text(path):
+    # exported matrices start with "<name>(rows,cols)"
+    with open(path) as f:
+        header = f.readline().strip()
+    return header.endswith(")") and "(" in header
+
+
+def discover(root):
+    """
+    Find every sweep folder under root
+
+    Returns:
+        list: Folder paths relative to root, sorted
+    """
+    folders = []
+    for folder, subdirs, files in os.walk(root):
+        # never descend into converted bundles
+        subdirs[:] = [d for d in subdirs if d != CACHE_FOLDER and not d.endswith(".sweep")]
+        if is_sweep_folder(folder):
+            folders.append(os.path.relpath(folder, root))
+    return sorted(folders)
+
+
+def bundle_path(root, relative, cache_folder=None):
+    """Where the converted bundle of a sweep folder is cached"""
+    cache_folder = cache_folder or os.path.join(root, CACHE_FOLDER)
+    return os.path.join(cache_folder, relative.replace(os.sep, "__") + ".sweep")
+
+
+def is_stale(source, converted):
+    """True if the bundle is missing or older than any source file"""
+    meta_path = os.path.join(converted, bundle.META_FILENAME)
+    if not os.path.exists(meta_path):
+        return True
+    converted_time = os.path.getmtime(meta_path)
+    return any(os.path.getmtime(os.path.join(source, f)) > converted_time
+               for f in os.listdir(source) if os.path.isfile(os.path.join(source, f)))
+
+
+def _materialize(source, converted, options=None):
+    # module level so process pools can pickle it
+    if is_stale(source, converted):
+        try:
+            bundle.convert(source, converted, **(options or {}))
+        except ValueError as error:
+            # e.g. exported text without enough information to place its axes
+            print(f"  ⚠ Skipping sweep folder: {error}")
+            return None
+    return converted
+
+
+def load_archive(root, cache_folder=None, workers=None, processes=False, options=None):
+    """
+    Load every sweep under root
+
+    Stale or missing bundles are converted in a pool (threads by default,
+    processes for large text archives where parsing dominates); fresh ones
+    are only memory mapped, so a second load is near-instant.
+
+    Args:
+        root: Archive root, e.g. "Extras/sweep_data"
+        cache_folder: Where bundles are cached (default: <root>/.bundles)
+        workers: Pool size (default: executor default)
+        processes: Use a process pool instead of threads
+        options: Optional {relative folder: bundle.convert kwargs}, e.g. the
+            sweep_values / wavelengths of exported text without an axis file
+
+    Returns:
+        dict: Relative folder -> SweepDataset; folders that cannot be
+            converted are skipped with a warning
+    """
+    options = options or {}
+    folders = discover(root)
+    jobs = {relative: (os.path.join(root, relative), bundle_path(root, relative, cache_folder))
+            for relative in folders}
+
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        futures = {relative: executor.submit(_materialize, source, converted, options.get(relative))
+                   for relative, (source, converted) in jobs.items()}
+        converted = {relative: future.result() for relative, future in futures.items()}
+
+    return {relative: SweepDataset.from_bundle(path) for relative, path in converted.items() if path is not None}
@@ -0,0 +1,314 @@
+"""
+Sweep Dataset
+Labelled container for drop/thru sweep data shared by the API outputs and
+the analysis code
+"""
+
+import numpy as np
+
+c = 3.0e8
+
+POWER_UNITS = ('dBm', 'mW', 'W')
+
+# name parts identifying the power array of a monitor result
+SIGNAL_NAMES = ('signal', 'power')
+
+
+def to_mw(values, units):
+    """Power in units ('dBm', 'mW' or 'W') to mW"""
+    values = np.asarray(values, dtype=float)
+    if units == 'dBm':
+        return 10 ** (values / 10)
+    if units == 'W':
+        return values * 1e3
+    return values
+
+
+def mw_to(values, units, floor=1e-30):
+    """Power in mW to units ('dBm', 'mW' or 'W')"""
+    values = np.asarray(values, dtype=float)
+    if units == 'dBm':
+        return 10 * np.log10(np.maximum(values, floor))
+    if units == 'W':
+        return values * 1e-3
+    return values
+
+
+def _index(coord, value):
+    """
+    Index (or slice) selecting a physical value (or inclusive range) on a
+    monotonic coordinate. Scalars pick the nearest sample.
+    """
+    descending = len(coord) > 1 and coord[0] > coord[-1]
+    ascending = coord[::-1] if descending else coord
+
+    if isinstance(value, slice):
+        lo = -np.inf if value.start is None else value.start
+        hi = np.inf if value.stop is None else value.stop
+        start = np.searchsorted(ascending, min(lo, hi), side="left")
+        stop = np.searchsorted(ascending, max(lo, hi), side="right")
+        if descending:
+            start, stop = len(coord) - stop, len(coord) - start
+        return slice(start, stop)
+
+    i = int(np.clip(np.searchsorted(ascending, value), 1, len(coord) - 1)) if len(coord) > 1 else 0
+    if len(coord) > 1 and abs(ascending[i - 1] - value) <= abs(ascending[i] - value):
+        i -= 1
+    return len(coord) - 1 - i if descending else i
+
+
+class SweepDataset:
+    """
+    Drop/thru power over named axes (e.g. voltage, wavelength)
+
+    Every port holds its own array, so memory mapped data stays lazy:
+    selections return views and nothing is read until values are used.
+    The port is an axis of its own, selected with sel(port=...).
+    """
+
+    def __init__(self, data, dims, coords=None, units='dBm', attrs=None):
+        """
+        Args:
+            data: Dict of port name (e.g. 'drop', 'thru') -> array, all with
+                the same shape
+            dims: Axis names of the arrays, e.g. ('voltage', 'wavelength')
+            coords: Optional dict of axis name -> 1D physical values
+                (defaults to sample indices)
+            units: Power units of the data ('dBm', 'mW' or 'W')
+            attrs: Optional free-form metadata
+        """
+        if units not in POWER_UNITS:
+            raise ValueError(f"Invalid units: {units}. Must be one of {POWER_UNITS}")
+
+        self.data = dict(data)
+        self.dims = tuple(dims)
+        self.units = units
+        self.attrs = attrs or {}
+
+        shape = self.shape
+        self.coords = {}
+        for i, dim in enumerate(self.dims):
+            values = (coords or {}).get(dim)
+            self.coords[dim] = np.arange(shape[i]) if values is None else np.asarray(values)
+
+    @property
+    def ports(self):
+        return list(self.data)
+
+    @property
+    def shape(self):
+        return np.shape(next(iter(self.data.values())))
+
+    def __getitem__(self, port):
+        return self.data[port]
+
+    def __repr__(self):
+        axes = ", ".join(f"{dim}: {n}" for dim, n in zip(self.dims, self.shape))
+        return f"SweepDataset({axes}; ports: {', '.join(self.ports)}; {self.units})"
+
+    def coord(self, dim):
+        return self.coords[dim]
+
+    @property
+    def values(self):
+        """All ports stacked on a trailing port axis (reads the data)"""
+        return np.stack([np.asarray(v) for v in self.data.values()], axis=-1)
+
+    def isel(self, **indexers):
+        """
+        Select by sample index per axis (ints or slices); port by name
+
+        Returns:
+            SweepDataset: Views of the selected data
+        """
+        ports = indexers.pop('port', None)
+        data = self.data
+        if ports is not None:
+            ports = [ports] if isinstance(ports, str) else list(ports)
+            data = {port: data[port] for port in ports}
+
+        key = tuple(indexers.get(dim, slice(None)) for dim in self.dims)
+        dims = tuple(dim for dim in self.dims if not isinstance(indexers.get(dim), (int, np.integer)))
+        coords = {dim: self.coords[dim][indexers.get(dim, slice(None))] for dim in dims}
+
+        return SweepDataset({port: values[key] for port, values in data.items()},
+                            dims, coords, self.units, self.attrs)
+
+    def sel(self, **indexers):
+        """
+        Select by physical value per axis: scalars pick the nearest sample,
+        slices an inclusive range. port selects by name.
+
+        Example:
+            ds.sel(voltage=4.5, wavelength=slice(1540e-9, 1550e-9))
+
+        Returns:
+            SweepDataset: Views of the selected data
+        """
+        positional = {}
+        for dim, value in indexers.items():
+            if dim == 'port':
+                positional[dim] = value
+            else:
+                positional[dim] = _index(self.coords[dim], value)
+        return self.isel(**positional)
+
+    def to_units(self, units):
+        """
+        Convert every port to other power units (vectorised, reads the data)
+
+        Returns:
+            SweepDataset
+        """
+        if units == self.units:
+            return self
+        data = {port: mw_to(to_mw(values, self.units), units) for port, values in self.data.items()}
+        return SweepDataset(data, self.dims, self.coords, units, self.attrs)
+
+    def to_mw(self):
+        return self.to_units('mW')
+
+    def to_dbm(self):
+        return self.to_units('dBm')
+
+    def balanced_weight(self):
+        """
+        Weight of a balanced photodetector pair: thru minus drop power (mW)
+
+        Returns:
+            np.ndarray: Same shape as the ports
+        """
+        return to_mw(self.data['thru'], self.units) - to_mw(self.data['drop'], self.units)
+
+    def to_bundle(self, path):
+        """
+        Save as a sweep bundle (see Lumerical/bundle.py)
+
+        Returns:
+            str: path
+        """
+        from Lumerical import bundle
+
+        axes = {dim: {'units': _axis_units(dim), 'values': self.coords[dim]} for dim in self.dims}
+        arrays = {port: (self.dims, self.units, np.asarray(values)) for port, values in self.data.items()}
+        return bundle.write_bundle(path, axes, arrays, attrs=self.attrs)
+
+    @classmethod
+    def from_arrays(cls, drop, thru, dims=('wavelength',), coords=None, units='dBm', attrs=None):
+        """Dataset from parallel drop/thru arrays"""
+        return cls({'drop': drop, 'thru': thru}, dims, coords, units, attrs)
+
+    @classmethod
+    def from_bundle(cls, path, ports=None):
+        """
+        Open a sweep bundle lazily (memory mapped)
+
+        Args:
+            path: Bundle folder
+            ports: Arrays to use as ports (default: every array that is
+                not an axis)
+
+        Returns:
+            SweepDataset
+        """
+        from Lumerical import bundle
+
+        meta, arrays = bundle.open_bundle(path)
+        ports = ports or [name for name in arrays if name not in meta['axes']]
+        dims = meta['arrays'][ports[0]]['dims']
+        coords = {dim: bundle.axis_values(meta, arrays, dim) for dim in dims}
+        units = meta['arrays'][ports[0]].get('units') or 'mW'
+        return cls({port: arrays[port] for port in ports}, dims, coords,
+                   units if units in POWER_UNITS else 'mW', meta.get('attrs'))
+
+    @classmethod
+    def from_sweep(cls, output, units='W'):
+        """
+        Dataset from interface.sweep / API.sweep output
+
+        The grid axes come first; each result's own axes (e.g. the OSA
+        wavelength or frequency) follow, matched to its own parameters by
+        length and converted to wavelength when they are a frequency
+
+        Raises:
+            ValueError: if the results do not share the same axes
+        """
+        ports = [name for name in output if name != 'axes' and not name.endswith('_parameters')]
+        grid_shape = tuple(len(values) for values in output['axes'].values())
+
+        data = {}
+        dims = coords = None
+        for port in ports:
+            # results carry singleton padding, keep only their real axes
+            values = output[port]
+            extra_shape = tuple(n for n in np.shape(values)[len(grid_shape):] if n > 1)
+            data[port] = np.reshape(values, grid_shape + extra_shape)
+
+            port_dims = list(output['axes'])
+            port_coords = dict(output['axes'])
+            own = dict(output.get(f"{port}_parameters", {}))
+            for n in extra_shape:
+                name, axis = next(((p, v) for p, v in own.items() if len(v) == n and p not in port_coords),
+                                  (f"axis_{len(port_dims)}", None))
+                own.pop(name, None)
+                if name == 'frequency':
+                    name, axis = 'wavelength', c / np.asarray(axis)
+                port_dims.append(name)
+                port_coords[name] = axis
+
+            if dims is None:
+                dims, coords, first = port_dims, port_coords, port
+            elif (port_dims != dims or data[port].shape != data[first].shape or
+                  not all(_same_coord(coords[dim], port_coords[dim]) for dim in dims)):
+                raise ValueError(f"Sweep results {first} and {port} have different axes: "
+                                 f"{dict(zip(dims, data[first].shape))} vs {dict(zip(port_dims, data[port].shape))}")
+
+        return cls(data, dims, coords, units)
+
+    @classmethod
+    def from_results(cls, results, units='W', signal=None):
+        """
+        Dataset from run() results ("<probe>__<name>" arrays)
+
+        For each probe the wavelength (or frequency) array is the axis and
+        the signal is the array named signal, by default the one whose name
+        contains one of SIGNAL_NAMES (or the only other array)
+
+        Raises:
+            ValueError: if a probe's signal cannot be told apart by name
+        """
+        probes = sorted({key.split("__")[0] for key in results})
+        data = {}
+        wavelength = None
+        for probe in probes:
+            arrays = {key.split("__", 1)[1]: value for key, value in results.items() if key.startswith(probe + "__")}
+            if 'wavelength' in arrays:
+                wavelength = np.ravel(arrays.pop('wavelength'))
+                arrays.pop('frequency', None)
+            elif 'frequency' in arrays:
+                wavelength = c / np.ravel(arrays.pop('frequency'))
+            if not arrays:
+                continue
+
+            if signal is not None:
+                names = [signal] if signal in arrays else []
+            else:
+                names = [name for name in arrays if any(part in name.lower() for part in SIGNAL_NAMES)]
+                if not names and len(arrays) == 1:
+                    names = list(arrays)
+            if len(names) != 1:
+                raise ValueError(f"Cannot tell the signal of {probe} from {sorted(arrays)}, pass signal=<name>")
+            data[probe] = np.ravel(arrays[names[0]])
+
+        return cls(data, ('wavelength',), {'wavelength': wavelength}, units)
+
+
+def _same_coord(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return len(a) == len(b) and np.allclose(a, b)
+
+
+def _axis_units(dim):
+    return {'voltage': 'V', 'wavelength': 'm', 'frequency': 'Hz', 'laser_frequency': 'Hz',
+            'dc_amplitude': ''}.get(dim, '')
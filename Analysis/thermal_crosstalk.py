@@ -0,0 +1,176 @@
+"""
+Thermal Crosstalk
+Heater-to-ring coupling in dense weight banks: a coupling matrix derived
+from the DEVICE temperature maps (wgT_*.mat) or a decay law, applied to the
+heater voltages and inverted to pre-compensate them
+"""
+
+import warnings
+import numpy as np
+
+LAWS = ('exponential', 'power')
+
+
+def load_temperature_map(path):
+    """
+    Load a DEVICE heat result (interface.heat output)
+
+    Args:
+        path: wgT_*.mat file
+
+    Returns:
+        tuple: (y, z, voltage, temperature rise (points, voltages)); y and z
+            in m, the rise in K above the substrate
+    """
+    from scipy.io import loadmat
+
+    data = loadmat(path)['temperature'][0, 0]
+    y = np.ravel(data['y']).astype(float)
+    z = np.ravel(data['z']).astype(float)
+    voltage = np.ravel(data['V_wire1']).astype(float)
+    temperature = np.reshape(data['T'], (len(y), -1)).astype(float)
+    return y, z, voltage, temperature - float(np.ravel(data['T_substrate'])[0])
+
+
+def fit_decay_length(path, z_band=0.1e-6, pitch=None):
+    """
+    Lateral thermal decay length of a heater from its temperature map
+
+    The rise along the heater's own height (points within z_band of the
+    hottest one) is fitted with exp(-|y - y0| / length) at the hottest
+    voltage; y0 is the centre of the hot region. The fit only covers the
+    map's lateral extent (a few um for the DEVICE maps), coupling at a
+    larger pitch is an extrapolation and warns.
+
+    Args:
+        path: wgT_*.mat file
+        z_band: Height tolerance around the hottest point (m)
+        pitch: Optional ring pitch (m) the length will be used at
+
+    Returns:
+        float: Decay length (m), inf if the map shows no lateral decay
+    """
+    y, z, _, rise = load_temperature_map(path)
+    rise = rise[:, np.argmax(rise.max(axis=0))]
+    hottest = np.argmax(rise)
+
+    band = (np.abs(z - z[hottest]) <= z_band) & (rise > 0)
+    centre = np.sum(y[band] * rise[band]) / np.sum(rise[band])
+    distance = np.abs(y[band] - centre)
+    log_ratio = np.log(rise[band] / rise[hottest])
+
+    # least squares slope through the origin of log(rise) vs distance
+    slope = np.sum(distance * log_ratio) / max(np.sum(distance ** 2), 1e-30)
+    if pitch is not None and pitch > distance.max():
+        warnings.warn(f"Pitch {pitch * 1e6:.3g} um is beyond the {distance.max() * 1e6:.3g} um the "
+                      f"temperature map spans from the heater, the decay length is extrapolated")
+    return -1 / slope if slope < 0 else np.inf
+
+
+def decay(distance, length, law='exponential', exponent=2.0):
+    """
+    Relative temperature rise at a distance from a heater (1 at the heater)
+
+    Args:
+        distance: Distances (m), any shape
+        length: Decay length (m)
+        law: 'exponential' exp(-d / length) or 'power' (1 + d / length)^-exponent
+        exponent: Exponent of the power law
+    """
+    distance = np.abs(np.asarray(distance, dtype=float))
+    if law == 'exponential':
+        return np.exp(-distance / length)
+    if law == 'power':
+        return (1 + distance / length) ** -exponent
+    raise ValueError(f"Invalid law: {law}. Must be one of {LAWS}")
+
+
+class ThermalCrosstalk:
+    """
+    Linear heater-to-ring thermal coupling
+
+    Heat adds linearly in dissipated power, which goes with V^2 for a
+    resistive heater. The neff(V) tables hold each ring's response to its own
+    heater, so a ring sees its own heater at the equivalent voltage
+    sqrt(sum_j K_ij V_j^2). K has ones on its diagonal.
+    """
+
+    def __init__(self, matrix):
+        """
+        Args:
+            matrix: (n, n) coupling matrix, or (banks, n, n) one per bank
+        """
+        self.matrix = np.asarray(matrix, dtype=float)
+
+    def __repr__(self):
+        n = self.matrix.shape[-1]
+        nearest = self.matrix[..., 0, 1].mean() if n > 1 else 0.0
+        return f"ThermalCrosstalk({n} rings, nearest neighbour coupling {nearest:.3g})"
+
+    @classmethod
+    def from_decay(cls, count, pitch, length, law='exponential', exponent=2.0):
+        """
+        Coupling matrix of count rings in a row at a given pitch
+
+        Args:
+            count: Rings per bank
+            pitch: Ring to ring spacing (m)
+            length: Decay length (m)
+            law, exponent: See decay
+
+        Returns:
+            ThermalCrosstalk
+        """
+        positions = np.arange(count) * pitch
+        return cls(decay(positions[:, None] - positions[None, :], length, law, exponent))
+
+    @classmethod
+    def from_temperature_map(cls, path, count, pitch, **kwargs):
+        """
+        Coupling matrix with the decay length fitted on a DEVICE temperature
+        map (see fit_decay_length, warns when pitch is beyond the map)
+
+        Returns:
+            ThermalCrosstalk
+        """
+        return cls.from_decay(count, pitch, fit_decay_length(path, pitch=pitch, **kwargs))
+
+    def apply(self, voltages):
+        """
+        Equivalent own-heater voltages each ring sees
+
+        Args:
+            voltages: (..., n) heater voltages, e.g. (banks, n)
+
+        Returns:
+            np.ndarray: Same shape as voltages
+        """
+        power = np.asarray(voltages, dtype=float) ** 2
+        return np.sqrt(np.maximum((self.matrix @ power[..., None])[..., 0], 0))
+
+    def compensate(self, voltages, clip=True):
+        """
+        Heater voltages that make every ring see the target voltages
+
+        Solves K x = V^2 for all banks at once (batched). Rings whose
+        neighbours alone already heat them past the target cannot be cooled:
+        clipped, they get 0 V and miss the target, see PhotonicLayer for
+        retargeting them.
+
+        Args:
+            voltages: (..., n) target equivalent voltages
+            clip: Return heater voltages; if False return the raw solution
+                x (squared voltages, negative where infeasible)
+
+        Returns:
+            np.ndarray: Same shape as voltages
+        """
+        power = np.asarray(voltages, dtype=float) ** 2
+        if self.matrix.ndim == 2:
+            # one matrix for every bank: a single solve with many right hand sides
+            solution = np.linalg.solve(self.matrix, power.reshape(-1, power.shape[-1]).T).T.reshape(power.shape)
+        else:
+            solution = np.linalg.solve(self.matrix, power[..., None])[..., 0]
+        if not clip:
+            return solution
+        return np.sqrt(np.maximum(solution, 0))
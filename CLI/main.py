@@ -1,5 +1,4 @@
-from PyInquirer import style_from_dict, Token, prompt
-from PyInquirer import Validator, ValidationError
+from PyInquirer import prompt
 
 class CLI:
 
@@ -94,3 +93,56 @@ class CLI:
 
         self.params = params
         return params
+
+    def confirm_plan(self, plan_lines):
+        """
+        Show the dry-run plan and ask whether to launch the solvers
+
+        Args:
+            plan_lines: Lines from API.describe_plan
+
+        Returns:
+            bool: True if the user wants to run the simulation
+        """
+        print("\n📋 Simulation plan:")
+        for line in plan_lines:
+            print(f"  • {line}")
+        print()
+
+        questions = [
+            {
+                'type': 'confirm',
+                'name': 'run',
+                'message': 'Run this simulation?',
+                'default': True
+            }
+        ]
+
+        return prompt(questions).get('run', False)
+
+    def simulate(self, api):
+        """
+        Ask for the parameters, show the dry-run plan and run once confirmed
+
+        Args:
+            api: API.main.API with its platform set and cache loaded
+
+        Returns:
+            dict: API.run output, None if the user declined the plan
+        """
+        params = self.run()
+        if not self.confirm_plan(api.describe_plan(api.plan(params))):
+            print("Simulation cancelled")
+            return None
+        return api.run(params)
+
+
+if __name__ == '__main__':
+    from API.main import API
+
+    api = API()
+    api.load_cache()
+    try:
+        CLI(api.get_param_suggestions()).simulate(api)
+    finally:
+        api.close_interconnect()
@@ -0,0 +1,105 @@
+"""
+Adaptive Sampling
+Refines sweep grids only where the sampled quantity changes quickly
+"""
+
+import numpy as np
+
+
+def refine_grid(solve, grid, tol_real, tol_imag=None, coarse_points=9):
+    """
+    Adaptively sample a complex function on a subset of a uniform grid
+
+    Starts from a coarse subset of the grid and bisects (in grid indices)
+    every interval whose midpoint differs from the linear interpolation of
+    its ends by more than the tolerance. A second pass estimates the local
+    curvature from neighbouring samples and keeps bisecting intervals whose
+    interpolation error bound (h^2 |f''| / 8) is still above tolerance.
+    Every sample lies on the original grid, so the result is a non-uniform
+    subset of the uniform table that linear interpolation reproduces within
+    tolerance.
+
+    Args:
+        solve: Callable v -> complex value, or 1D array of complex values
+            (e.g. one per wavelength); every component must meet the
+            tolerance. One solver call per sample.
+        grid: Uniform grid (1D array), the finest resolution allowed
+        tol_real: Tolerance on the real part
+        tol_imag: Tolerance on the imaginary part (defaults to tol_real)
+        coarse_points: Number of points of the initial coarse pass
+
+    Returns:
+        tuple: (np.ndarray of sampled grid values, np.ndarray of complex
+                values with one row per sample), sorted by grid value
+    """
+    grid = np.asarray(grid)
+    if tol_imag is None:
+        tol_imag = tol_real
+
+    n = len(grid)
+    values = {}
+
+    def sample(i):
+        if i not in values:
+            values[i] = np.asarray(solve(grid[i]), dtype=complex)
+        return values[i]
+
+    coarse = np.unique(np.round(np.linspace(0, n - 1, min(coarse_points, n))).astype(int))
+    for i in coarse:
+        sample(i)
+
+    def bisect(pending):
+        while pending:
+            i, j = pending.pop()
+            if j - i < 2:
+                continue
+
+            m = (i + j) // 2
+            # linear interpolation at the midpoint index
+            w = (m - i) / (j - i)
+            predicted = (1 - w) * sample(i) + w * sample(j)
+            actual = sample(m)
+
+            if (np.any(np.abs(actual.real - predicted.real) > tol_real) or
+                    np.any(np.abs(actual.imag - predicted.imag) > tol_imag)):
+                pending.append((i, m))
+                pending.append((m, j))
+
+    bisect(list(zip(coarse[:-1], coarse[1:])))
+
+    while True:
+        indices = np.array(sorted(values))
+        if len(indices) < 3:
+            break
+
+        x = grid[indices]
+        y = np.array([values[i] for i in indices])
+
+        # second divided differences at the interior samples
+        y = y.reshape(len(x), -1)
+        slopes = np.diff(y, axis=0) / np.diff(x)[:, None]
+        curvature = 2 * np.diff(slopes, axis=0) / (x[2:] - x[:-2])[:, None]
+
+        # each interval takes the larger curvature of its two end samples
+        # (and the worst component)
+        node_curvature = np.concatenate((curvature[:1], curvature, curvature[-1:]))
+        h = np.diff(x)
+        worst_real = np.abs(node_curvature.real).max(axis=1)
+        worst_imag = np.abs(node_curvature.imag).max(axis=1)
+        bound_real = h ** 2 / 8 * np.maximum(worst_real[:-1], worst_real[1:])
+        bound_imag = h ** 2 / 8 * np.maximum(worst_imag[:-1], worst_imag[1:])
+
+        refine = ((bound_real > tol_real) | (bound_imag > tol_imag)) & (np.diff(indices) >= 2)
+        if not refine.any():
+            break
+
+        pending = []
+        for k in np.nonzero(refine)[0]:
+            i, j = indices[k], indices[k + 1]
+            m = (i + j) // 2
+            sample(m)
+            pending.extend([(i, m), (m, j)])
+        bisect(pending)
+
+    indices = np.array(sorted(values))
+    return grid[indices], np.array([values[i] for i in indices])
@@ -0,0 +1,407 @@
+"""
+Sweep Bundles
+Binary columnar storage for sweep data: a folder with one .npy file per
+array and a meta.json describing axes and units. Arrays can grow while a
+sweep runs and open memory mapped at any time.
+
+Existing text/.npy sweep data and neff tables convert with
+python -m Lumerical.bundle <source> <bundle folder>
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+
+META_FILENAME = "meta.json"
+
+# Fixed .npy header size, so the shape can be rewritten in place as rows
+# are appended (a multiple of 64 as the format recommends)
+HEADER_SIZE = 128
+
+
+def _npy_header(dtype, shape):
+    header = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                   'fortran_order': False,
+                   'shape': tuple(shape)})
+    # magic (6) + version (2) + header length (2), then the padded header
+    header_len = HEADER_SIZE - 10
+    header = header.ljust(header_len - 1) + "\n"
+    if len(header) != header_len:
+        raise ValueError(f"Array header too long for shape {shape}")
+    return np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + header_len.to_bytes(2, "little") + header.encode("latin1")
+
+
+class AppendableArray:
+    """
+    .npy file that grows along its first axis
+
+    Every flush() rewrites the header with the rows written so far, so
+    np.load(path, mmap_mode='r') always sees a consistent prefix
+    """
+
+    def __init__(self, path, row_shape=(), dtype=float):
+        """
+        Args:
+            path: Destination .npy file
+            row_shape: Shape of one row
+            dtype: Element type
+        """
+        self.path = path
+        self.row_shape = tuple(row_shape)
+        self.dtype = np.dtype(dtype)
+        self.rows = 0
+        self.file = open(path, "wb")
+        self.file.write(_npy_header(self.dtype, (0,) + self.row_shape))
+        self.file.flush()
+
+    def append(self, rows):
+        """
+        Args:
+            rows: One row (row_shape) or a block of rows (n,) + row_shape
+        """
+        rows = np.asarray(rows, dtype=self.dtype)
+        if rows.shape == self.row_shape:
+            rows = rows[None]
+        self.file.write(np.ascontiguousarray(rows).tobytes())
+        self.rows += len(rows)
+
+    def flush(self):
+        self.file.flush()
+        self.file.seek(0)
+        self.file.write(_npy_header(self.dtype, (self.rows,) + self.row_shape))
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class BundleWriter:
+    """
+    Writes a sweep bundle row by row
+
+    All arrays share the first (streamed) axis. meta.json is written when
+    the bundle is created, marked complete on close()
+    """
+
+    def __init__(self, path, axes, arrays, attrs=None):
+        """
+        Args:
+            path: Bundle folder
+            axes: Dict of axis name -> {'units': str, 'values': list or None}.
+                The first axis is the streamed one, its values are an array
+                of the bundle.
+            arrays: Dict of array name -> {'dims': [axis names], 'units': str,
+                'dtype': str}; the first dim must be the streamed axis
+            attrs: Optional free-form metadata
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.meta = {
+            'axes': axes,
+            'arrays': arrays,
+            'attrs': attrs or {},
+            'complete': False,
+        }
+
+        self.arrays = {}
+        for name, spec in arrays.items():
+            row_shape = tuple(len(axes[dim]['values']) for dim in spec['dims'][1:])
+            self.arrays[name] = AppendableArray(os.path.join(path, f"{name}.npy"), row_shape, spec['dtype'])
+
+        self.write_meta()
+
+    def write_meta(self):
+        tmp_path = os.path.join(self.path, META_FILENAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, META_FILENAME))
+
+    def append(self, **rows):
+        """Append one row (or block of rows) to every array"""
+        for name, values in rows.items():
+            self.arrays[name].append(values)
+
+    def flush(self):
+        for array in self.arrays.values():
+            array.flush()
+
+    def close(self):
+        for array in self.arrays.values():
+            array.close()
+        self.meta['complete'] = True
+        self.write_meta()
+
+    def abort(self):
+        """Close the open arrays and remove the unfinished bundle"""
+        for array in self.arrays.values():
+            array.file.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def open_bundle(path):
+    """
+    Open a sweep bundle, memory mapping every array
+
+    Works on bundles still being written (arrays hold the flushed rows)
+
+    Returns:
+        tuple: (meta dict, dict of array name -> read-only memmap)
+    """
+    with open(os.path.join(path, META_FILENAME)) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in meta['arrays']}
+    return meta, arrays
+
+
+def axis_values(meta, arrays, name):
+    """
+    Values of an axis: listed in meta.json, or stored as the array of the
+    same name for streamed axes
+
+    Returns:
+        np.ndarray or None
+    """
+    values = meta['axes'][name].get('values')
+    if values is not None and None not in values:
+        return np.asarray(values)
+    return arrays.get(name)
+
+
+def write_bundle(path, axes, arrays, attrs=None):
+    """
+    Write complete in-memory arrays as a sweep bundle
+
+    Args:
+        path: Bundle folder
+        axes: Dict of axis name -> {'units': str, 'values': 1D array or None}
+        arrays: Dict of array name -> (dims, units, ndarray)
+        attrs: Optional free-form metadata
+
+    Returns:
+        str: path
+    """
+    os.makedirs(path, exist_ok=True)
+
+    meta_axes = {}
+    for name, spec in axes.items():
+        values = spec.get('values')
+        meta_axes[name] = {'units': spec.get('units', ''),
+                           'values': None if values is None else np.asarray(values).tolist()}
+
+    meta_arrays = {}
+    for name, (dims, units, values) in arrays.items():
+        values = np.asarray(values)
+        np.save(os.path.join(path, f"{name}.npy"), values)
+        meta_arrays[name] = {'dims': list(dims), 'units': units, 'dtype': values.dtype.str}
+
+    meta = {'axes': meta_axes, 'arrays': meta_arrays, 'attrs': attrs or {}, 'complete': True}
+    tmp_path = os.path.join(path, META_FILENAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, META_FILENAME))
+
+    return path
+
+
+def read_lumerical_text(path):
+    """
+    Read a matrix exported from INTERCONNECT as text
+
+    The first line is "<name>(rows,cols)" and the values follow separated by
+    whitespace. Parsed in one pass with np.fromstring instead of np.loadtxt.
+
+    Returns:
+        tuple: (name, np.ndarray of shape (rows, cols))
+    """
+    with open(path) as f:
+        header = f.readline().strip()
+        text = f.read()
+
+    name, _, dims = header.partition("(")
+    values = np.fromstring(text, sep=" ")
+    if dims:
+        shape = tuple(int(n) for n in dims.rstrip(")").split(","))
+        values = values.reshape(shape)
+    return name, values
+
+
+# exported files holding power spectra, other files need explicit units
+PORTS = ('drop', 'thru')
+
+
+def convert_text_sweep(folder, output_path, sweep_axis='voltage', sweep_values=None,
+                       wavelengths=None, units='dBm', extra_units=None):
+    """
+    Convert an exported sweep folder (e.g. Extras/sweep_data/heater_voltage_sweep/*)
+    into a bundle
+
+    The drop.txt / thru.txt power spectra become arrays in units. Matrix
+    rows are sweep points and columns wavelengths. A single column is a
+    sweep when the sweep axis is known (a <sweep_axis>.txt file or
+    sweep_values) and one spectrum when only wavelengths are given. Other
+    files (e.g. output.txt, a weight) are skipped unless extra_units maps
+    them.
+
+    Args:
+        folder: Folder with the exported .txt files
+        output_path: Bundle folder
+        sweep_axis: Name of the row axis
+        sweep_values: Optional row axis values
+        wavelengths: Optional column axis values (m)
+        units: Units of the port arrays
+        extra_units: Optional {file name: units} of other files to keep
+
+    Returns:
+        str: output_path
+
+    Raises:
+        ValueError: if an axis the data needs cannot be inferred
+    """
+    extra_units = extra_units or {}
+    matrices = {}
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith(".txt"):
+            continue
+        name = filename[:-len(".txt")]
+        if name != sweep_axis and name not in PORTS and name not in extra_units:
+            print(f"  • Skipping {os.path.join(folder, filename)}: not a power spectrum (see extra_units)")
+            continue
+        values = read_lumerical_text(os.path.join(folder, filename))[1]
+        # a single column is a vector
+        matrices[name] = values[:, 0] if values.ndim == 2 and values.shape[1] == 1 else values
+
+    if sweep_axis in matrices:
+        axis = matrices.pop(sweep_axis).ravel()
+        sweep_values = axis if sweep_values is None else sweep_values
+    if not matrices:
+        raise ValueError(f"No port data in {folder}")
+
+    attrs = {'source': os.path.abspath(folder)}
+    if sweep_values is None and all(values.ndim == 1 for values in matrices.values()):
+        if wavelengths is None:
+            raise ValueError(f"{folder} holds single column data without a {sweep_axis} axis: pass "
+                             f"sweep_values for a {sweep_axis} sweep or wavelengths for one spectrum")
+        axes = {'wavelength': {'units': 'm', 'values': wavelengths}}
+        arrays = {name: (('wavelength',), extra_units.get(name, units), values)
+                  for name, values in matrices.items()}
+        return write_bundle(output_path, axes, arrays, attrs)
+
+    if sweep_values is None:
+        raise ValueError(f"{folder} has no {sweep_axis}.txt: pass sweep_values")
+    axes = {sweep_axis: {'units': 'V' if sweep_axis == 'voltage' else '', 'values': sweep_values}}
+    arrays = {}
+    for name, values in matrices.items():
+        if values.ndim == 2:
+            if wavelengths is None:
+                raise ValueError(f"{name} in {folder} has one column per wavelength: pass wavelengths")
+            axes.setdefault('wavelength', {'units': 'm', 'values': wavelengths})
+            arrays[name] = ((sweep_axis, 'wavelength'), extra_units.get(name, units), values)
+        else:
+            arrays[name] = ((sweep_axis,), extra_units.get(name, units), values)
+
+    return write_bundle(output_path, axes, arrays, attrs)
+
+
+def _port_name(name):
+    # drop_transmission / thru_transmission_wide -> drop / thru ports
+    port = name.split("_")[0]
+    return port if port in PORTS else name
+
+
+def convert_npy_sweep(folder, output_path, units='dBm'):
+    """
+    Convert a folder of .npy spectra (a wavelength*.npy axis plus one array
+    per signal, as in Extras/sweep_data/peak1) into a bundle
+
+    Per port axes (<port>_wavelength.npy, as in Extras/transmission_profiles)
+    are axis coordinates too: the signals are resampled onto one shared
+    ascending wavelength axis where they differ from it.
+
+    Returns:
+        str: output_path
+    """
+    wavelength = None
+    port_wavelengths = {}
+    signals = {}
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith(".npy"):
+            continue
+        name = filename[:-len(".npy")]
+        values = np.load(os.path.join(folder, filename))
+        if name.startswith("wavelength"):
+            wavelength = values
+        elif name.endswith("_wavelength"):
+            port_wavelengths[_port_name(name[:-len("_wavelength")])] = values
+        else:
+            signals[_port_name(name)] = values
+
+    if wavelength is None and port_wavelengths:
+        wavelength = np.sort(next(iter(port_wavelengths.values())))
+
+    arrays = {}
+    resampled = []
+    for name, values in signals.items():
+        own = port_wavelengths.get(name)
+        if own is not None and not np.array_equal(own, wavelength):
+            order = np.argsort(own)
+            values = np.interp(wavelength, own[order], values[order])
+            resampled.append(name)
+        arrays[name] = (('wavelength',), units, values)
+
+    axes = {'wavelength': {'units': 'm', 'values': wavelength}}
+    attrs = {'source': os.path.abspath(folder)}
+    if resampled:
+        attrs['resampled'] = resampled
+    return write_bundle(output_path, axes, arrays, attrs)
+
+
+def convert_neff_table(path, output_path):
+    """
+    Convert a neff_* or neffwl_* table into a bundle
+
+    Returns:
+        str: output_path
+    """
+    from Lumerical import neff_table
+
+    voltage, wavelengths, neff = neff_table.read_table(path)
+    axes = {
+        'voltage': {'units': 'V', 'values': None},
+        'wavelength': {'units': 'm', 'values': wavelengths},
+    }
+    arrays = {
+        'voltage': (('voltage',), 'V', voltage),
+        'neff': (('voltage', 'wavelength'), '', neff),
+    }
+    return write_bundle(output_path, axes, arrays, attrs={'kind': 'neff', 'source': os.path.basename(path)})
+
+
+def convert(path, output_path, **kwargs):
+    """
+    Convert existing sweep data into a bundle, picking the converter from
+    what path holds (neff table, folder of exported .txt or of .npy files)
+
+    Args:
+        **kwargs: Passed to convert_text_sweep (axis values, extra_units)
+
+    Returns:
+        str: output_path
+    """
+    if os.path.isfile(path):
+        return convert_neff_table(path, output_path)
+    if any(f.endswith(".npy") for f in os.listdir(path)):
+        return convert_npy_sweep(path, output_path)
+    return convert_text_sweep(path, output_path, **kwargs)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m Lumerical.bundle <sweep folder or neff table> <bundle folder>")
+        sys.exit(1)
+
+    print(f"✓ Bundle written: {convert(sys.argv[1], sys.argv[2])}")
@@ -0,0 +1,150 @@
+"""
+Sweep Checkpoints
+Persists completed sweep points as they finish, so a sweep interrupted by
+a licence drop or a crashed solver resumes where it stopped
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+from Lumerical import neff_table
+
+# Inputs that determine the effective_index sweep points
+NEFF_INPUTS = ('platform', 'source_wavelength', 'source_wavelengths', 'min_v', 'max_v',
+               'interval_v', 'adaptive_tol', 'track_mode')
+
+# Inputs that determine an INTERCONNECT sweep (besides its grid)
+SWEEP_INPUTS = ('platform', 'source_wavelength', 'constant_v', 'time_window', 'n_samples',
+                'element_bindings')
+
+VOLTAGE_DECIMALS = 9
+
+
+def get_checkpoint_folder(platform):
+    """Checkpoints live next to the cache, in a subfolder load_cache skips"""
+    return f"./Lumerical/cache_{platform}/checkpoints"
+
+
+def run_id(kind, inputs, keys, extra=None):
+    """
+    ID of a sweep run: the same inputs always resume the same checkpoint
+
+    Args:
+        kind: Sweep kind ('neff', 'sweep')
+        inputs: Dictionary with simulation parameters
+        keys: Inputs that determine the sweep
+        extra: Optional other JSON serializable data (e.g. the sweep grid)
+
+    Returns:
+        str: Short hex digest, prefixed by kind
+    """
+    relevant = {key: inputs[key] for key in keys if inputs.get(key) is not None}
+    if extra is not None:
+        relevant['extra'] = extra
+    digest = hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{kind}_{digest[:16]}"
+
+
+class PointCheckpoint:
+    """
+    Append-only log of completed voltage points
+
+    Rows use the neff table format and every append is flushed and synced,
+    so the log survives the process dying mid-sweep. A row cut short by a
+    crash is ignored on load.
+    """
+
+    def __init__(self, folder, run):
+        """
+        Args:
+            folder: Checkpoint folder
+            run: Run ID from run_id
+        """
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, f"{run}.txt")
+        self.points = {}
+        self.n_values = None
+
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    self._parse(line)
+
+        self.file = open(self.path, "a")
+
+    def _parse(self, line):
+        if not line.endswith("\n") or line.startswith("#"):
+            return
+        try:
+            columns = [float(x) for x in line.split()]
+        except ValueError:
+            return
+        if len(columns) < 3 or len(columns) % 2 == 0:
+            return
+        values = np.array(columns[1::2]) + 1j * np.array(columns[2::2])
+        self.points[round(columns[0], VOLTAGE_DECIMALS)] = values if len(values) > 1 else values[0]
+
+    def __len__(self):
+        return len(self.points)
+
+    def get(self, v):
+        """Value of a completed point, or None"""
+        return self.points.get(round(float(v), VOLTAGE_DECIMALS))
+
+    def append(self, v, value):
+        """Record a completed point durably"""
+        self.file.write(neff_table.format_row(v, value))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.points[round(float(v), VOLTAGE_DECIMALS)] = value
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        """Remove the checkpoint once the sweep output is written"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BatchCheckpoint:
+    """
+    Completed batches of a native INTERCONNECT sweep, one .npz per batch
+    """
+
+    def __init__(self, folder, run):
+        """
+        Args:
+            folder: Checkpoint folder
+            run: Run ID from run_id
+        """
+        self.folder = os.path.join(folder, run)
+        os.makedirs(self.folder, exist_ok=True)
+
+    def path(self, batch):
+        return os.path.join(self.folder, f"batch_{batch}.npz")
+
+    def load(self, batch):
+        """
+        Returns:
+            dict: Arrays saved for a batch, or None if it did not complete
+        """
+        path = self.path(batch)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return dict(data)
+
+    def save(self, batch, arrays):
+        # written under a temporary name so a partial batch never loads
+        tmp_path = self.path(batch) + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self.path(batch))
+
+    def discard(self):
+        for filename in os.listdir(self.folder):
+            os.remove(os.path.join(self.folder, filename))
+        os.rmdir(self.folder)
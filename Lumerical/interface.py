@@ -3,21 +3,42 @@ Lumerical Interface
 Handles all interactions with Lumerical API
 """
 
-import imp
 import numpy as np
 import sys
 import os
 import time
+import shutil
 
 # Añadir ruta del proyecto al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Cargar lumapi usando el detector automático
-from lumerical_path_detector import auto_detect_and_load_lumapi
+from Lumerical import adaptive
+from Lumerical import neff_table
+from Lumerical import results as lumerical_results
+from Lumerical import streaming
+from Lumerical import checkpoint
 
-print("🔍 Detectando instalación de Lumerical automáticamente...")
-lumapi = auto_detect_and_load_lumapi()
-print("✓ Lumerical API cargada correctamente\n")
+# lumapi se carga la primera vez que se necesita, para que el modo offline
+# (replay desde cache) funcione sin Lumerical instalado
+_lumapi = None
+
+
+def get_lumapi():
+    """
+    Load the Lumerical API on first use
+
+    Returns:
+        module: lumapi
+    """
+    global _lumapi
+    if _lumapi is None:
+        # Cargar lumapi usando el detector automático
+        from lumerical_path_detector import auto_detect_and_load_lumapi
+
+        print("🔍 Detectando instalación de Lumerical automáticamente...")
+        _lumapi = auto_detect_and_load_lumapi()
+        print("✓ Lumerical API cargada correctamente\n")
+    return _lumapi
 
 
 def get_platform_path(platform):
@@ -62,7 +83,7 @@ def heat(inputs):
     print(f"  File: {ldev_file}")
     print(f"  Voltage range: {min_v}V to {max_v}V (interval: {interval_v}V)")
     
-    device = lumapi.DEVICE(ldev_file)
+    device = get_lumapi().DEVICE(ldev_file)
     device.switchtolayout()
     
     # Output filename
@@ -116,7 +137,7 @@ def passivebentwg(inputs):
     print(f"  File: {lms_file}")
     print(f"  Wavelength range: {start_wavelength*1e9:.2f}nm to {end_wavelength*1e9:.2f}nm")
     
-    mode = lumapi.MODE(lms_file)
+    mode = get_lumapi().MODE(lms_file)
     
     # Disable temperature import
     mode.switchtolayout()
@@ -188,7 +209,7 @@ def activebentwg(inputs):
     print(f"  Wavelength range: {start_wavelength*1e9:.2f}nm to {end_wavelength*1e9:.2f}nm")
     print(f"  Voltage range: {min_v}V to {max_v}V (interval: {interval_v}V)")
     
-    mode = lumapi.MODE(lms_file)
+    mode = get_lumapi().MODE(lms_file)
     
     # Import temperature map from heat simulation
     mode.switchtolayout()
@@ -230,7 +251,72 @@ def activebentwg(inputs):
     return output_path, mode
 
 
-def effective_index(inputs, lum_mode=None):
+class ModeTracker:
+    """
+    Follows one mode across consecutive MODE solves
+
+    Every solve searches near the effective index of the closest voltage
+    already solved, then picks the trial mode with the largest overlap with
+    the previously tracked mode (closest neff if overlap is unavailable)
+    """
+
+    def __init__(self, mode, trial_modes=2, name='tracked_mode'):
+        """
+        Args:
+            mode: MODE object ready for findmodes()
+            trial_modes: Number of candidate modes per solve
+            name: Global d-card name for the reference mode (one per tracker)
+        """
+        self.mode = mode
+        self.trial_modes = trial_modes
+        self.name = name
+        self.reference = None  # global d-card with the last tracked mode
+        self.solved = []  # (voltage, neff) of every solve
+    
+    def find(self, v):
+        """
+        Solve at the current layout (voltage v already applied)
+        
+        Returns:
+            complex: neff of the tracked mode
+        """
+        mode = self.mode
+        mode.setanalysis("number of trial modes", self.trial_modes)
+        
+        if self.solved:
+            # warm start: search near the neighbouring voltage's solution
+            nearest = min(self.solved, key=lambda item: abs(item[0] - v))[1]
+            mode.setanalysis("search", "near n")
+            mode.setanalysis("n", np.real(nearest))
+        
+        mode.findmodes()
+        n_modes = int(mode.nummodes())
+        
+        if self.reference is None or n_modes < 2:
+            best = 1
+        else:
+            nearest = min(self.solved, key=lambda item: abs(item[0] - v))[1]
+            modes = range(1, n_modes + 1)
+            try:
+                # overlap() returns [field overlap, power coupling]
+                scores = [np.real(np.ravel(mode.overlap(f'mode{k}', self.reference))[0]) for k in modes]
+            except Exception:
+                # fall back to the closest effective index
+                scores = [-abs(mode.getdata(f'mode{k}', 'neff')[0][0] - nearest) for k in modes]
+            best = int(np.argmax(scores)) + 1
+        
+        neff = mode.getdata(f'mode{best}', 'neff')[0][0]
+        
+        # keep the tracked mode as the next overlap reference
+        if self.reference is not None:
+            mode.cleardcard(self.reference)
+        self.reference = mode.copydcard(f'mode{best}', self.name)
+        self.solved.append((v, neff))
+        
+        return neff
+
+
+def effective_index(inputs, lum_mode=None, interrupt=None):
     """
     Calculate effective index vs voltage
     
@@ -238,10 +324,26 @@ def effective_index(inputs, lum_mode=None):
         inputs: Dictionary with simulation parameters including:
             - platform: 'sipho' or 'sin'
             - source_wavelength: Laser wavelength
+            - source_wavelengths: Optional list of wavelengths. Every voltage
+              is solved at all of them in the same temperature state and a
+              single neff(V, λ) table (neffwl_*) is written
             - min_v: Minimum voltage
             - max_v: Maximum voltage
-            - interval_v: Voltage interval
+            - interval_v: Voltage interval (finest spacing in adaptive mode)
+            - adaptive_tol: Optional tolerance on Re/Im(neff). When set, the
+              voltage grid is refined only where neff(V) changes quickly
+              (see adaptive.refine_grid) and the table is non-uniform
+            - track_mode: Optional bool. Seed every solve from the previous
+              voltage and match modes by overlap (see ModeTracker) instead
+              of taking mode1 from a cold solve
+            - neff_binary: Optional bool. Also stream the table to a
+              columnar sweep bundle (see neff_table.NeffWriter)
         lum_mode: Optional MODE object from activebentwg (to avoid reopening)
+        interrupt: Optional callable run before every voltage point. It can
+            raise to abort the sweep (the MODE session is closed first)
+    
+    Every solved voltage is checkpointed as it completes, so rerunning with
+    the same inputs resumes an interrupted sweep (see checkpoint.PointCheckpoint)
     
     Returns:
         str: Path to generated .txt file
@@ -250,19 +352,32 @@ def effective_index(inputs, lum_mode=None):
     platform_path = get_platform_path(platform)
     
     source_wavelength = inputs['source_wavelength']
+    wavelengths = None
+    if inputs.get('source_wavelengths'):
+        # the table always includes the operating wavelength
+        wavelengths = sorted(set(inputs['source_wavelengths']) | {source_wavelength})
     min_v = inputs['min_v']
     max_v = inputs['max_v']
     interval_v = inputs['interval_v']
+    adaptive_tol = inputs.get('adaptive_tol')
+    track_mode = inputs.get('track_mode', False)
     
     print(f"⚙ Calculating effective index vs voltage...")
     print(f"  Platform: {platform.upper()}")
-    print(f"  Wavelength: {source_wavelength*1e9:.2f}nm")
+    if wavelengths:
+        print(f"  Wavelengths: {', '.join(f'{w*1e9:.2f}' for w in wavelengths)}nm")
+    else:
+        print(f"  Wavelength: {source_wavelength*1e9:.2f}nm")
     print(f"  Voltage range: {min_v}V to {max_v}V (interval: {interval_v}V)")
+    if adaptive_tol:
+        print(f"  Adaptive sampling (tolerance: {adaptive_tol})")
+    if track_mode:
+        print(f"  Mode tracking enabled")
     
     # Open MODE if not provided
     if lum_mode is None:
         lms_file = f"{platform_path}/rib_waveguide.lms"
-        mode = lumapi.MODE(lms_file)
+        mode = get_lumapi().MODE(lms_file)
         mode.switchtolayout()
         mode.select("temperature")
         
@@ -281,27 +396,89 @@ def effective_index(inputs, lum_mode=None):
     n_points = int((max_v - min_v) / interval_v) + 1
     voltage = np.linspace(min_v, max_v, n_points)
     
-    result_str = ""
+    run = checkpoint.run_id('neff', dict(inputs, platform=platform), checkpoint.NEFF_INPUTS)
+    points = checkpoint.PointCheckpoint(checkpoint.get_checkpoint_folder(platform), run)
+    if len(points):
+        print(f"  ↻ Resuming {run}: {len(points)} voltage points already solved")
+    
+    # one tracker per wavelength, the modes differ between them
+    trackers = None
+    if track_mode:
+        trackers = [ModeTracker(mode, name=f'tracked_mode_{i}') for i in range(len(wavelengths or [0]))]
+        # resumed points still warm start the next solves
+        for v, value in sorted(points.points.items()):
+            for i, tracker in enumerate(trackers):
+                tracker.solved.append((v, np.atleast_1d(value)[i]))
+    
+    def solve_at_wavelength(v, i):
+        if trackers is not None:
+            return trackers[i].find(v)
+        
+        mode.findmodes()
+        
+        data = mode.getdata('mode1', 'neff')
+        return data[0][0]
+    
+    def solve(v):
+        done = points.get(v)
+        if done is not None:
+            return done
+        
+        value = solve_point(v)
+        points.append(v, value)
+        return value
     
-    for v in voltage:
+    def solve_point(v):
+        if interrupt is not None:
+            interrupt()
+        
         mode.switchtolayout()
         mode.setnamed('temperature', 'enabled', 1)
         mode.setnamed('temperature', 'V_wire1', v)
-        mode.findmodes()
         
-        data = mode.getdata('mode1', 'neff')
-        neff = data[0][0]
+        if not wavelengths:
+            return solve_at_wavelength(v, 0)
         
-        result_str += f"{v} {np.real(neff)} {np.imag(neff)}\n"
-    
-    # Save results
-    output_filename = f"neff_{source_wavelength}_{min_v}_{max_v}_{interval_v}_neff.txt"
+        # same temperature state, only the analysis wavelength changes
+        neffs = []
+        for i, wavelength in enumerate(wavelengths):
+            mode.setanalysis("wavelength", wavelength)
+            neffs.append(solve_at_wavelength(v, i))
+        return np.array(neffs)
+    
+    # Save results as they are produced
+    # the sampling is part of the name, lookups must not serve adaptive or
+    # tracked tables to requests expecting something else
+    suffix = neff_table.sampling_suffix(adaptive_tol, track_mode)
+    if wavelengths:
+        output_filename = neff_table.multi_filename(wavelengths, min_v, max_v, interval_v, suffix)
+    else:
+        output_filename = f"neff_{source_wavelength}_{min_v}_{max_v}_{interval_v}_{suffix}.txt"
     cache_folder = f"./Lumerical/cache_{platform}"
     output_path = f"{cache_folder}/{output_filename}"
     
-    with open(output_path, "w") as f:
-        f.write(result_str)
-    
+    writer = neff_table.NeffWriter(output_path, wavelengths, binary=inputs.get('neff_binary', False))
+    
+    try:
+        if adaptive_tol:
+            # the grid is only known once refined, its points stream to the checkpoint meanwhile
+            voltage, neffs = adaptive.refine_grid(solve, voltage, adaptive_tol)
+            print(f"  Solved {len(voltage)} of {n_points} voltage points")
+            for v, neff in zip(voltage, neffs):
+                writer.write(v, neff)
+        else:
+            for v in voltage:
+                writer.write(v, solve(v))
+    except Exception:
+        # release the licence before handing control back, the checkpoint
+        # keeps every point solved so far
+        writer.abort()
+        points.close()
+        mode.close()
+        raise
+    
+    writer.close()
+    points.discard()
     mode.close()
     
     print(f"  ✓ Effective index calculation complete: {output_path}")
@@ -309,7 +486,211 @@ def effective_index(inputs, lum_mode=None):
     return output_path
 
 
-def interconnect(inputs, files):
+# Monitors read back after every INTERCONNECT run (element, result)
+RESULT_PROBES = {
+    'drop': ("OSA_1", "mode 1/signal"),
+    'thru': ("OSA_2", "mode 1/signal"),
+}
+
+
+def save_interconnect_results(ic, output_path):
+    """
+    Read the RESULT_PROBES monitors and store them as a .npz file
+
+    Every numeric entry of each Lumerical dataset is saved under
+    streaming.result_key(probe, name) so runs can be replayed without
+    INTERCONNECT
+
+    Args:
+        ic: INTERCONNECT object after run()
+        output_path: Destination .npz file
+
+    Returns:
+        str: Path to the .npz file
+    """
+    arrays = {}
+    for probe, (element, result_name) in RESULT_PROBES.items():
+        result = ic.getresult(element, result_name)
+        for key, value in result.items():
+            if key == 'Lumerical_dataset':
+                continue
+            arrays[streaming.result_key(probe, key)] = np.asarray(value)
+
+    tmp_path = output_path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, output_path)
+
+    print(f"  ✓ INTERCONNECT results saved: {output_path}")
+    return output_path
+
+
+def stream_interconnect_results(ic, output_dir, chunk_size=1 << 18):
+    """
+    Stream the RESULT_PROBES monitors to a folder of .npy files in chunks
+
+    Same "<probe>__<name>" keys as save_interconnect_results, but the
+    signals are copied chunk by chunk straight to disk, so memory stays
+    bounded for long time windows
+
+    Args:
+        ic: INTERCONNECT object after run()
+        output_dir: Destination folder
+        chunk_size: Elements transferred per chunk
+
+    Returns:
+        str: output_dir
+    """
+    tmp_dir = output_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for probe, (element, result_name) in RESULT_PROBES.items():
+        streaming.stream_result(ic, element, result_name, tmp_dir, probe, chunk_size)
+    # a half written folder must never look like a cache hit
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+
+    print(f"  ✓ INTERCONNECT results streamed: {output_dir}")
+    return output_dir
+
+
+# Run parameters, as (element, property, inputs -> value or None to skip)
+PARAMETER_BINDINGS = {
+    'laser_frequency': ("CWL_1", "frequency",
+                        lambda inputs: 3.0e8 / inputs['source_wavelength'] if inputs.get('source_wavelength') else None),
+    # the heater is driven by the DC source, as in Extras/heater_current_sweep.py
+    'dc_amplitude': ("DC_1", "amplitude", lambda inputs: inputs.get('constant_v')),
+}
+
+# Parameters a native sweep can vary, as (sweep parameter path, type)
+SWEEP_PARAMETERS = {
+    'laser_frequency': ("::Root Element::CWL_1::frequency", "Frequency"),
+    'dc_amplitude': ("::Root Element::DC_1::amplitude", "Number"),
+}
+
+# Sweep results, as name -> result path
+SWEEP_RESULTS = {
+    'drop': "::Root Element::OSA_1::mode 1/signal",
+    'thru': "::Root Element::OSA_2::mode 1/signal",
+}
+
+
+class InterconnectSession:
+    """
+    Keeps an INTERCONNECT project loaded between runs
+
+    Remembers every element property it set and only sends the ones whose
+    value changed, so consecutive runs skip the project load and most of
+    the setnamed() round trips
+    """
+
+    def __init__(self, icp_file):
+        """
+        Args:
+            icp_file: Path to the .icp project
+        """
+        self.icp_file = icp_file
+        self.ic = get_lumapi().INTERCONNECT(icp_file)
+        self.applied = {}
+        self.elements = {}
+
+    def has_element(self, element):
+        """True if the project contains the element (asked once per element)"""
+        if element not in self.elements:
+            try:
+                self.ic.getnamed(element, "name")
+                self.elements[element] = True
+            except Exception:
+                self.elements[element] = False
+        return self.elements[element]
+
+    def set(self, element, prop, value):
+        """
+        setnamed() only if the value differs from the last one applied
+
+        Returns:
+            bool: True if the property was updated
+        """
+        key = (element, prop)
+        if key in self.applied and self.applied[key] == value:
+            return False
+        self.ic.setnamed(element, prop, value)
+        self.applied[key] = value
+        return True
+
+    def configure(self, inputs, files):
+        """
+        Apply the time settings, stage files and run parameters
+
+        Args:
+            inputs: Dictionary with simulation parameters
+            files: Dictionary with paths to the stage files
+
+        Returns:
+            list: Names of the settings that changed
+        """
+        # restore design mode, the previous run leaves the project in analysis mode
+        self.ic.switchtodesign()
+
+        settings = [
+            ('time_window', "::Root Element", "time window", inputs.get('time_window', 5.12e-9)),
+            ('n_samples', "::Root Element", "number of samples", inputs.get('n_samples', 15360)),
+        ]
+        # stage files are only wired into elements the caller names, which
+        # elements consume them depends on the circuit
+        for stage, (element, prop) in (inputs.get('element_bindings') or {}).items():
+            if not files.get(stage):
+                continue
+            if not self.has_element(element):
+                print(f"  ⚠ {element} not found in {os.path.basename(self.icp_file)}, {stage} not wired")
+                continue
+            # INTERCONNECT resolves relative paths against the project folder
+            settings.append((stage, element, prop, os.path.abspath(files[stage])))
+        for name, (element, prop, value_of) in PARAMETER_BINDINGS.items():
+            value = value_of(inputs)
+            if value is not None:
+                settings.append((name, element, prop, value))
+
+        changed = []
+        for name, element, prop, value in settings:
+            if self.set(element, prop, value):
+                changed.append(name)
+        return changed
+
+    def run(self, inputs, files, results_path=None):
+        """
+        Configure and run the project
+
+        Args:
+            inputs: Dictionary with simulation parameters
+            files: Dictionary with paths to the stage files
+            results_path: Optional .npz file for save_interconnect_results,
+                or a folder for stream_interconnect_results
+
+        Returns:
+            list: Names of the settings that changed since the previous run
+        """
+        changed = self.configure(inputs, files)
+        print(f"  Updated: {', '.join(changed) if changed else 'nothing (same configuration)'}")
+
+        print(f"\n  🚀 Running INTERCONNECT...")
+        self.ic.run()
+        print(f"  ✓ INTERCONNECT simulation complete!")
+
+        if results_path is None:
+            pass
+        elif results_path.endswith(".npz"):
+            save_interconnect_results(self.ic, results_path)
+        else:
+            chunk_size = inputs.get('stream_chunk_size', 1 << 18)
+            stream_interconnect_results(self.ic, results_path, chunk_size)
+        return changed
+
+    def close(self):
+        self.ic.close()
+        self.applied = {}
+        self.elements = {}
+
+
+def interconnect(inputs, files, results_path=None, session=None):
     """
     Run INTERCONNECT simulation
     
@@ -319,12 +700,25 @@ def interconnect(inputs, files):
             - time_window: Simulation time window
             - n_samples: Number of samples
             - keep_interconnect_open: Boolean to keep window open after simulation
+            - element_bindings: Optional {stage: (element, property)}
+              wiring stage files into circuit elements. Nothing is wired
+              without it and elements missing from the project are skipped
         files: Dictionary with paths to required simulation files:
             - heat: Path to heat simulation .mat
             - passivebentwg: Path to passive waveguide .ldf
             - activebentwg: Path to active waveguide .ldf
             - effective_index: Path to neff .txt
+            - coupling: Optional coupling table (defaults to the platform one)
             - interconnect: Path to .icp file
+        results_path: Optional .npz file where the monitor results are
+            memoized (see save_interconnect_results), or a folder to stream
+            them to in chunks (see stream_interconnect_results)
+        session: Optional InterconnectSession to reuse. The caller owns it
+            and it is never closed here. A session for another .icp file
+            is closed and replaced.
+
+    Returns:
+        InterconnectSession: The session that ran the project
     """
     platform = inputs.get('platform', 'sipho')
     
@@ -333,6 +727,8 @@ def interconnect(inputs, files):
     keep_open = inputs.get('keep_interconnect_open', False)
     
     icp_file = files['interconnect']
+    files = dict(files)
+    files.setdefault('coupling', f"{get_platform_path(platform)}/couplingcoefficient.txt")
     
     print(f"\n⚙ Running INTERCONNECT simulation...")
     print(f"  Platform: {platform.upper()}")
@@ -346,26 +742,20 @@ def interconnect(inputs, files):
         if key != 'interconnect':
             print(f"    • {key}: {value}")
     
-    ic = lumapi.INTERCONNECT(icp_file)
-    
-    # Restore design mode
-    ic.switchtodesign()
-    
-    # Set time parameters
-    ic.setnamed("::Root Element", "time window", time_window)
-    ic.setnamed("::Root Element", "number of samples", n_samples)
-    
-    # TODO: Load simulation files into INTERCONNECT
-    # This depends on your specific .icp file structure
-    # You may need to configure element parameters here based on files dict
-    
-    print(f"\n  🚀 Running INTERCONNECT...")
-    ic.run()
+    owned = session is None
+    if session is not None and session.icp_file != icp_file:
+        session.close()
+        session = None
+    if session is None:
+        session = InterconnectSession(icp_file)
+    else:
+        print(f"  ♻ Reusing loaded INTERCONNECT project")
     
-    print(f"  ✓ INTERCONNECT simulation complete!")
+    session.run(inputs, files, results_path)
     
-    # DEBUG: Show what we're about to do
-    print(f"\n  DEBUG: keep_open = {keep_open}, type = {type(keep_open)}")
+    # sessions passed in by the caller stay open for the next run
+    if not owned:
+        return session
     
     # Check if user wants to keep INTERCONNECT open
     if keep_open:
@@ -381,9 +771,181 @@ def interconnect(inputs, files):
         print(f"="*70 + "\n")
     else:
         print(f"  Closing INTERCONNECT...")
-        ic.close()
+        session.close()
         # Give the process time to close cleanly
         time.sleep(0.5)
         print(f"  ✓ INTERCONNECT window closed")
     
-    return ic
\ No newline at end of file
+    return session
+
+def sweep(inputs, grid, files=None, session=None, results=None, sweep_name="api_sweep"):
+    """
+    Run a grid of configurations as one native INTERCONNECT sweep
+
+    The cartesian product of the grid axes is flattened into a single
+    "Values" sweep (or one per batch with sweep_batch_size), so every point
+    runs in the same invocation and the results come back through
+    getsweepresult
+
+    Args:
+        inputs: Dictionary with simulation parameters including:
+            - platform: 'sipho' or 'sin'
+            - time_window: Simulation time window
+            - n_samples: Number of samples
+            - sweep_batch_size: Optional points per native sweep. Each
+              completed batch is checkpointed, so rerunning the same sweep
+              resumes after the last completed batch
+        grid: Ordered dict of SWEEP_PARAMETERS name -> 1D values, e.g.
+            {'laser_frequency': f, 'dc_amplitude': a}
+        files: Optional stage files; 'interconnect' selects the .icp file and
+            the rest are bound to the circuit elements before sweeping
+        session: Optional InterconnectSession to reuse (left open)
+        results: Optional name -> result path, defaults to SWEEP_RESULTS
+        sweep_name: Name of the sweep object in the project
+
+    Returns:
+        dict: {
+            'axes': {name: 1D values} in grid order,
+            '<result>': np.ndarray of shape grid shape + the result's own
+                shape (e.g. the OSA wavelength axis),
+            '<result>_parameters': {name: values} of the result's own axes
+        }
+    """
+    platform = inputs.get('platform', 'sipho')
+    files = dict(files or {})
+    files.setdefault('interconnect', f"{get_platform_path(platform)}/weight_bank.icp")
+    files.setdefault('coupling', f"{get_platform_path(platform)}/couplingcoefficient.txt")
+    results = results or SWEEP_RESULTS
+
+    for name in grid:
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Invalid sweep parameter: {name}. Must be one of {list(SWEEP_PARAMETERS)}")
+
+    axes = {name: np.atleast_1d(np.asarray(values, dtype=float)) for name, values in grid.items()}
+    shape = tuple(len(values) for values in axes.values())
+    points = np.meshgrid(*axes.values(), indexing='ij')
+    n_points = int(np.prod(shape))
+
+    print(f"⚙ Running INTERCONNECT sweep {' x '.join(f'{n} {name}' for name, n in zip(axes, shape))} ({n_points} points)...")
+
+    # long sweeps run in checkpointed batches, completed batches are reused
+    # when the same sweep is rerun
+    batch_size = inputs.get('sweep_batch_size') or n_points
+    batches = [np.arange(start, min(start + batch_size, n_points)) for start in range(0, n_points, batch_size)]
+    run = checkpoint.run_id('sweep', dict(inputs, platform=platform), checkpoint.SWEEP_INPUTS,
+                            extra={'grid': {k: v.tolist() for k, v in axes.items()},
+                                   'results': results, 'batch_size': batch_size})
+    completed = checkpoint.BatchCheckpoint(checkpoint.get_checkpoint_folder(platform), run) if len(batches) > 1 else None
+
+    flat_points = {name: values.ravel() for name, values in zip(axes, points)}
+    batch_outputs = [completed.load(i) if completed else None for i in range(len(batches))]
+    if completed and any(o is not None for o in batch_outputs):
+        print(f"  ↻ Resuming {run}: {sum(o is not None for o in batch_outputs)} of {len(batches)} batches done")
+
+    owned = session is None or session.icp_file != files['interconnect']
+    if owned and all(o is not None for o in batch_outputs):
+        session = None
+    elif owned:
+        session = InterconnectSession(files['interconnect'])
+
+    try:
+        if session is not None:
+            session.configure(inputs, files)
+
+        for b, indices in enumerate(batches):
+            if batch_outputs[b] is not None:
+                continue
+            batch_outputs[b] = _run_sweep_batch(session.ic, sweep_name, {name: values[indices] for name, values in flat_points.items()}, results)
+            if completed:
+                completed.save(b, batch_outputs[b])
+    finally:
+        if owned and session is not None:
+            session.close()
+
+    output = {'axes': axes}
+    for name in results:
+        values = np.concatenate([o[name] for o in batch_outputs])
+        output[name] = values.reshape(shape + values.shape[1:])
+        prefix = f"{name}__param__"
+        output[f"{name}_parameters"] = {key[len(prefix):]: value for key, value in batch_outputs[0].items() if key.startswith(prefix)}
+
+    if completed:
+        completed.discard()
+
+    print(f"  ✓ Sweep complete")
+
+    return output
+
+
+def _run_sweep_batch(ic, sweep_name, values, results):
+    """
+    Run one "Values" sweep over flat point values
+
+    Returns:
+        dict: '<result>' -> array with the point axis first and
+            '<result>__param__<name>' -> the result's own axes
+    """
+    n_points = len(next(iter(values.values())))
+
+    ic.deletesweep(sweep_name)
+    ic.addsweep(0)
+    ic.setsweep("sweep", "name", sweep_name)
+    ic.setsweep(sweep_name, "type", "Values")
+    ic.setsweep(sweep_name, "number of points", n_points)
+
+    for name, point_values in values.items():
+        path, param_type = SWEEP_PARAMETERS[name]
+        params = {"Name": name, "Parameter": path, "Type": param_type}
+        for i, value in enumerate(point_values):
+            params[f"Value_{i + 1}"] = value
+        ic.addsweepparameter(sweep_name, params)
+
+    for name, path in results.items():
+        ic.addsweepresult(sweep_name, {"Name": name, "Result": path})
+
+    ic.runsweep(sweep_name)
+
+    output = {}
+    point_axis = {'point': np.arange(n_points)}
+    for name in results:
+        dataset = lumerical_results.sweep_dataset(ic.getsweepresult(sweep_name, name), point_axis)
+        output[name] = next(iter(dataset.fields.values()))
+        for p, axis in dataset.axes.items():
+            if p != 'point' and p not in values:
+                output[f"{name}__param__{p}"] = axis
+    return output
+
+
+def laser_sweep(inputs, wavelengths, files=None, session=None):
+    """
+    Sweep the CW laser over arbitrary wavelengths in one INTERCONNECT sweep
+
+    Uses a "Values" sweep of the laser frequency, so non-uniform grids
+    (e.g. from Analysis.resonance_sweep) run in a single invocation
+
+    Args:
+        inputs: Dictionary with simulation parameters including:
+            - platform: 'sipho' or 'sin'
+            - time_window: Simulation time window
+            - n_samples: Number of samples
+        wavelengths: Laser wavelengths (m)
+        files: Optional stage files; 'interconnect' selects the .icp file
+        session: Optional InterconnectSession to reuse (left open)
+
+    Returns:
+        tuple: (drop, thru) steady-state power (W) at each wavelength
+    """
+    c = 3.0e8
+    wavelengths = np.asarray(wavelengths, dtype=float)
+
+    data = sweep(inputs, {'laser_frequency': c / wavelengths}, files, session,
+                 results={
+                     'drop': "::Root Element::OOSC_2::mode 1/signal",
+                     'thru': "::Root Element::OOSC_1::mode 1/signal",
+                 },
+                 sweep_name="laser_wavelength_sweep")
+
+    # last time sample of every sweep point is the steady-state power
+    drop = data['drop'].reshape(len(wavelengths), -1)[:, -1]
+    thru = data['thru'].reshape(len(wavelengths), -1)[:, -1]
+    return drop, thru
@@ -0,0 +1,223 @@
+"""
+neff Tables
+Reading and writing effective index tables
+
+Single wavelength tables (neff_*.txt) hold "V Re(neff) Im(neff)" rows.
+Multi-wavelength tables (neffwl_*.txt) start with a "# wavelengths: ..."
+header and hold "V Re1 Im1 Re2 Im2 ..." rows, one column pair per wavelength.
+"""
+
+import os
+import numpy as np
+
+WAVELENGTHS_HEADER = "# wavelengths:"
+
+
+def multi_filename(wavelengths, min_v, max_v, interval_v, suffix="neff"):
+    """
+    Cache filename of a multi-wavelength table
+
+    Follows the neff_* convention with the wavelength span and count first:
+    neffwl_<first>_<last>_<count>_<min_v>_<max_v>_<interval_v>_<suffix>.txt
+    """
+    return f"neffwl_{wavelengths[0]}_{wavelengths[-1]}_{len(wavelengths)}_{min_v}_{max_v}_{interval_v}_{suffix}.txt"
+
+
+def sampling_suffix(adaptive_tol=None, track_mode=False):
+    """
+    Filename suffix recording how a table was sampled: "neff" (uniform grid)
+    or "adaptive_<tol>", followed by "_track" for mode tracked solves
+    """
+    suffix = f"adaptive_{adaptive_tol}" if adaptive_tol else "neff"
+    return suffix + "_track" if track_mode else suffix
+
+
+def parse_sampling(filename):
+    """
+    Sampling of a cached table from its filename (see sampling_suffix)
+
+    Returns:
+        tuple: (adaptive_tol, track_mode); adaptive_tol is None for uniform
+            tables and inf for adaptive tables that did not record it
+    """
+    tokens = os.path.splitext(os.path.basename(filename))[0].split("_")
+    adaptive_tol = None
+    if "adaptive" in tokens:
+        try:
+            adaptive_tol = float(tokens[tokens.index("adaptive") + 1])
+        except (IndexError, ValueError):
+            adaptive_tol = np.inf
+    return adaptive_tol, "track" in tokens
+
+
+def serves_sampling(entry, inputs):
+    """
+    Check whether a cached table was sampled the way a request needs
+
+    Mode tracking must match. Uniform tables serve any request, adaptive
+    ones only adaptive requests with an equal or looser tolerance (their
+    interval_v is the finest spacing, not a bound).
+
+    Args:
+        entry: Cache entry with 'adaptive_tol' and 'track_mode'
+        inputs: Dictionary with simulation parameters
+
+    Returns:
+        bool: True if the table serves the request
+    """
+    if bool(entry.get('track_mode', False)) != bool(inputs.get('track_mode', False)):
+        return False
+    adaptive_tol = entry.get('adaptive_tol')
+    if adaptive_tol is None:
+        return True
+    requested = inputs.get('adaptive_tol')
+    return bool(requested) and adaptive_tol <= requested
+
+
+def format_row(v, neffs):
+    """One table row for a voltage and its neff (scalar or one per wavelength)"""
+    columns = [str(v)]
+    for neff in np.atleast_1d(neffs):
+        columns.append(f"{np.real(neff)} {np.imag(neff)}")
+    return " ".join(columns) + "\n"
+
+
+def read_wavelengths(path):
+    """
+    Wavelengths of a multi-wavelength table (from its header)
+
+    Returns:
+        list: Wavelengths (m), or None for single wavelength tables
+    """
+    with open(path) as f:
+        first = f.readline()
+    if not first.startswith(WAVELENGTHS_HEADER):
+        return None
+    return [float(x) for x in first[len(WAVELENGTHS_HEADER):].split()]
+
+
+def read_table(path):
+    """
+    Load a single or multi-wavelength table
+
+    Args:
+        path: neff_* or neffwl_* file
+
+    Returns:
+        tuple: (voltage array, wavelengths list or None, complex neff array
+                of shape (n_voltages, n_wavelengths))
+    """
+    wavelengths = read_wavelengths(path)
+    data = np.atleast_2d(np.loadtxt(path, comments="#"))
+    neff = data[:, 1::2] + 1j * data[:, 2::2]
+    return data[:, 0], wavelengths, neff
+
+
+def write_header(f, wavelengths):
+    f.write(f"{WAVELENGTHS_HEADER} " + " ".join(str(w) for w in wavelengths) + "\n")
+
+
+def extract_wavelength(path, wavelength, output_path):
+    """
+    Write the single wavelength neff_* table for one column of a
+    multi-wavelength table
+
+    Args:
+        path: neffwl_* file
+        wavelength: Wavelength to extract (must be one of the table's)
+        output_path: Destination neff_* file
+
+    Returns:
+        str: output_path
+    """
+    voltage, wavelengths, neff = read_table(path)
+    column = int(np.argmin(np.abs(np.asarray(wavelengths) - wavelength)))
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for v, n in zip(voltage, neff[:, column]):
+            f.write(format_row(v, n))
+    os.replace(tmp_path, output_path)
+
+    return output_path
+
+
+class NeffWriter:
+    """
+    Streams a neff table to disk row by row
+
+    Rows go to "<path>.partial" (flushed every flush_every rows, so progress
+    UIs can tail it) and the file is renamed to path on close(), so the
+    cache never picks up an unfinished table. With binary=True the rows are
+    mirrored into a columnar sweep bundle next to it (see Lumerical/bundle.py).
+    """
+
+    def __init__(self, path, wavelengths=None, binary=False, flush_every=16):
+        """
+        Args:
+            path: Final neff_* or neffwl_* file
+            wavelengths: Wavelengths of a multi-wavelength table, or None
+            binary: Also write "<path without .txt>.sweep" bundle
+            flush_every: Rows between flushes
+        """
+        self.path = path
+        self.partial_path = path + ".partial"
+        self.flush_every = flush_every
+        self.rows = 0
+
+        self.file = open(self.partial_path, "w")
+        if wavelengths:
+            write_header(self.file, wavelengths)
+
+        self.bundle = None
+        if binary:
+            from Lumerical.bundle import BundleWriter
+
+            n_wavelengths = len(wavelengths) if wavelengths else 1
+            self.bundle = BundleWriter(
+                os.path.splitext(path)[0] + ".sweep",
+                axes={
+                    'voltage': {'units': 'V', 'values': None},
+                    'wavelength': {'units': 'm', 'values': list(wavelengths) if wavelengths else [None] * n_wavelengths},
+                },
+                arrays={
+                    'voltage': {'dims': ['voltage'], 'units': 'V', 'dtype': 'float64'},
+                    'neff': {'dims': ['voltage', 'wavelength'], 'units': '', 'dtype': 'complex128'},
+                },
+                attrs={'kind': 'neff', 'source': os.path.basename(path)},
+            )
+
+    def write(self, v, neffs):
+        """Append the row of one voltage"""
+        self.file.write(format_row(v, neffs))
+        if self.bundle is not None:
+            self.bundle.append(voltage=v, neff=np.atleast_1d(neffs))
+
+        self.rows += 1
+        if self.rows % self.flush_every == 0:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        if self.bundle is not None:
+            self.bundle.flush()
+
+    def close(self):
+        """
+        Returns:
+            str: Path to the finished table
+        """
+        self.file.close()
+        os.replace(self.partial_path, self.path)
+        if self.bundle is not None:
+            self.bundle.close()
+        return self.path
+
+    def abort(self):
+        """Drop the unfinished table and its bundle"""
+        self.file.close()
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+        if self.bundle is not None:
+            self.bundle.abort()
+            self.bundle = None
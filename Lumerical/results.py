@@ -0,0 +1,159 @@
+"""
+Result Extraction
+Turns lumapi getresult/getsweepresult datasets into labelled NumPy arrays
+without per-element Python work, plus vectorised unit conversions
+"""
+
+import numpy as np
+
+c = 3.0e8
+
+
+class ResultDataset:
+    """
+    A Lumerical dataset as NumPy arrays
+
+    Parameters become axes (1D arrays, in dataset order) and every
+    attribute becomes a field shaped like the axes (plus any trailing
+    component dimension). Fields are views of the arrays lumapi returned
+    whenever their layout allows it, never element-wise copies.
+    """
+
+    def __init__(self, axes, fields):
+        """
+        Args:
+            axes: Ordered dict of parameter name -> 1D array
+            fields: Dict of attribute name -> ndarray
+        """
+        self.axes = axes
+        self.fields = fields
+
+    @property
+    def shape(self):
+        return tuple(len(values) for values in self.axes.values())
+
+    def __getitem__(self, name):
+        if name in self.fields:
+            return self.fields[name]
+        return self.axes[name]
+
+    def __contains__(self, name):
+        return name in self.fields or name in self.axes
+
+    def axis(self, name):
+        """Position of a parameter axis in the field arrays"""
+        return list(self.axes).index(name)
+
+    def to_structured(self):
+        """
+        Copy the fields into one structured array (one record per grid point)
+
+        Returns:
+            np.ndarray: Structured array of shape self.shape
+        """
+        dtype = [(name, values.dtype, values.shape[len(self.shape):])
+                 for name, values in self.fields.items()]
+        records = np.empty(self.shape, dtype=dtype)
+        for name, values in self.fields.items():
+            records[name] = values
+        return records
+
+
+def _as_axis(values):
+    # lumapi returns parameters as (n, 1) columns; ravel is a view for those
+    return np.asarray(values).ravel()
+
+
+def _shape_like(values, shape):
+    """
+    Reshape an attribute to the parameter grid, keeping trailing component
+    dimensions (e.g. vector attributes) and dropping singleton padding
+    """
+    values = np.asarray(values)
+    n = int(np.prod(shape)) if shape else 1
+    if values.size == n:
+        return values.reshape(shape)
+    if n and values.size % n == 0:
+        return values.reshape(shape + (-1,))
+    return values
+
+
+def to_dataset(result):
+    """
+    Convert a getresult()/getsweepresult() dictionary
+
+    Args:
+        result: Dictionary returned by lumapi, with its 'Lumerical_dataset'
+            description. Plain (non-dataset) results become a single field.
+
+    Returns:
+        ResultDataset
+    """
+    description = result.get('Lumerical_dataset')
+    if description is None:
+        fields = {name: np.asarray(values) for name, values in result.items()}
+        return ResultDataset({}, fields)
+
+    # each parameter entry lists its name first (then interdependent names)
+    axes = {}
+    for names in description.get('parameters', []):
+        names = [names] if isinstance(names, str) else list(names)
+        if names and names[0] in result:
+            axes[names[0]] = _as_axis(result[names[0]])
+
+    shape = tuple(len(values) for values in axes.values())
+    fields = {name: _shape_like(result[name], shape)
+              for name in description.get('attributes', []) if name in result}
+
+    return ResultDataset(axes, fields)
+
+
+def sweep_dataset(result, grid_axes):
+    """
+    Convert a getsweepresult() dictionary whose last axis is the flattened
+    sweep point index (see interface.sweep)
+
+    Args:
+        result: Dictionary returned by getsweepresult
+        grid_axes: Ordered dict of sweep parameter name -> 1D values
+
+    Returns:
+        ResultDataset: Sweep axes first, then the result's own axes
+    """
+    dataset = to_dataset(result)
+    grid_shape = tuple(len(values) for values in grid_axes.values())
+    own_axes = {name: values for name, values in dataset.axes.items() if name not in grid_axes}
+
+    fields = {}
+    for name, values in dataset.fields.items():
+        raw = np.asarray(result[name])
+        # the sweep point axis comes last, move it first and unflatten it
+        fields[name] = np.moveaxis(raw, -1, 0).reshape(grid_shape + raw.shape[:-1])
+
+    return ResultDataset(dict(grid_axes, **own_axes), fields)
+
+
+def hz_to_m(frequency):
+    """Frequency (Hz) to wavelength (m)"""
+    return c / np.asarray(frequency, dtype=float)
+
+
+def m_to_hz(wavelength):
+    """Wavelength (m) to frequency (Hz)"""
+    return c / np.asarray(wavelength, dtype=float)
+
+
+def w_to_dbm(power, floor=1e-30):
+    """
+    Power (W) to dBm
+
+    Args:
+        power: Power array (W)
+        floor: Smallest power used, so zeros map to a finite level
+    """
+    return 10 * np.log10(np.maximum(np.asarray(power, dtype=float), floor) * 1e3)
+
+
+def dbm_to_w(power_dbm):
+    """Power (dBm) to W"""
+    return 10 ** (np.asarray(power_dbm, dtype=float) / 10) * 1e-3
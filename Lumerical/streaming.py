@@ -0,0 +1,108 @@
+"""
+Streaming Retrieval
+Copies large INTERCONNECT results to on-disk .npy files in bounded chunks,
+so long time traces never have to fit in the Python process at once
+"""
+
+import os
+import numpy as np
+
+# Lumerical script variables used while streaming (cleared afterwards)
+_RESULT = "_stream_result"
+_DATA = "_stream_data"
+_CHUNK = "_stream_chunk"
+
+
+def _names(ic, expression):
+    """Names listed (one per line) by a getattribute/getparameter call"""
+    ic.eval(f"_stream_names = {expression};")
+    names = ic.getv("_stream_names")
+    if isinstance(names, str):
+        return [n for n in names.splitlines() if n]
+    return list(names)
+
+
+def result_key(prefix, name):
+    """
+    Key of a result entry, "<prefix>__<name>" with "/" replaced by "_"
+
+    Names may contain path separators (e.g. "mode 1/signal"), which would
+    nest inside .npz archives and folders. Both result layouts use this.
+    """
+    return f"{prefix}__{name}".replace("/", "_")
+
+
+def _stream_variable(ic, output_path, chunk_size):
+    """
+    Stream the Lumerical matrix in _DATA to a .npy file
+
+    Lumerical stores matrices column-major, so linear index ranges map
+    straight onto a Fortran ordered array on disk
+
+    Returns:
+        np.memmap: Read-only view of the written file
+    """
+    ic.eval(f"_stream_size = size({_DATA}); _stream_complex = max(abs(imag({_DATA}))) > 0;")
+    shape = tuple(int(n) for n in np.ravel(ic.getv("_stream_size")))
+    dtype = complex if float(np.ravel(ic.getv("_stream_complex"))[0]) else float
+    n = int(np.prod(shape))
+
+    tmp_path = output_path + ".tmp.npy"
+    array = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape, fortran_order=True)
+    flat = array.reshape(-1, order="F")
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        ic.eval(f"{_CHUNK} = {_DATA}({start + 1}:{stop});")
+        flat[start:stop] = np.ravel(ic.getv(_CHUNK))
+
+    array.flush()
+    del flat, array
+    os.replace(tmp_path, output_path)
+
+    return np.load(output_path, mmap_mode="r")
+
+
+def stream_result(ic, element, result_name, output_dir, prefix, chunk_size=1 << 18):
+    """
+    Stream every attribute and parameter of a result to .npy files
+
+    Args:
+        ic: INTERCONNECT object after run()
+        element: Monitor element name
+        result_name: Result name (e.g. "mode 1/signal")
+        output_dir: Folder for the .npy files
+        prefix: File prefix, files are "<prefix>__<name>.npy"
+        chunk_size: Elements transferred per getv() call
+
+    Returns:
+        dict: result_key(prefix, name) -> read-only memory mapped array
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    ic.eval(f"{_RESULT} = getresult('{element}', '{result_name}');")
+    arrays = {}
+    try:
+        for kind in ("getattribute", "getparameter"):
+            for name in _names(ic, f"{kind}({_RESULT})"):
+                ic.eval(f"{_DATA} = {kind}({_RESULT}, '{name}');")
+                key = result_key(prefix, name)
+                arrays[key] = _stream_variable(ic, os.path.join(output_dir, key + ".npy"), chunk_size)
+    finally:
+        ic.eval(f"clear({_RESULT}, {_DATA}, {_CHUNK});")
+
+    return arrays
+
+
+def load_streamed(output_dir):
+    """
+    Memory map every array written by stream_result in a folder
+
+    Returns:
+        dict: "<prefix>__<name>" -> read-only memory mapped array
+    """
+    arrays = {}
+    for filename in sorted(os.listdir(output_dir)):
+        if filename.endswith(".npy") and not filename.endswith(".tmp.npy"):
+            arrays[filename[:-len(".npy")]] = np.load(os.path.join(output_dir, filename), mmap_mode="r")
+    return arrays
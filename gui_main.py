@@ -4,6 +4,7 @@ Modern graphical interface with Sidebar using CustomTkinter
 """
 
 import customtkinter as ctk
+from tkinter import messagebox
 from API.main import API
 from PIL import Image
 import os
@@ -714,6 +715,17 @@ class LumericalGUI:
             params['max_v'] = float(self.max_voltage_entry.get())
             params['interval_v'] = float(self.voltage_interval_entry.get())
         
+        # Show the dry-run plan so the user can tune the inputs before
+        # committing licence time
+        plan = self.api.plan(params)
+        confirmed = messagebox.askyesno(
+            "Simulation Plan",
+            "\n".join(self.api.describe_plan(plan)) + "\n\nRun this simulation?"
+        )
+        if not confirmed:
+            # stay on the form so the parameters can be adjusted
+            return
+        
         # Execute callback
         self.on_configuration_complete(params)
     
@@ -911,7 +923,11 @@ class LumericalGUI:
         
     def run(self):
         """Run the application"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # release the licence of a reused or kept open INTERCONNECT project
+            self.api.close_interconnect()
 
 
 def main():
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import numpy as np
+
+from API import telemetry
+from API.licence import LicenceGate, Preempted
+from API.main import API
+from API.prefetch import Prefetcher
+from Lumerical import interface
+from Lumerical.neff_table import NeffWriter
+
+NEFF_PATH = "./Lumerical/cache_sipho/neff_1.55e-06_0_1_0.1_neff.txt"
+
+
+def test_foreground_waits_for_background_work():
+    gate = LicenceGate()
+    inside = threading.Event()
+    events = []
+
+    def background():
+        with gate.background():
+            inside.set()
+            try:
+                while True:
+                    gate.check()
+                    time.sleep(0.01)
+            except Preempted:
+                time.sleep(0.05)
+                events.append('background stopped')
+
+    thread = threading.Thread(target=background)
+    thread.start()
+    inside.wait(5)
+    with gate.foreground():
+        events.append('foreground started')
+    thread.join(5)
+    assert events == ['background stopped', 'foreground started']
+
+
+def test_background_refused_while_foreground_holds():
+    gate = LicenceGate()
+    gate.hold()
+    try:
+        with gate.background():
+            raise AssertionError("background work started while held")
+    except Preempted:
+        pass
+    finally:
+        gate.release()
+
+
+def test_run_during_prefetch_solve(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Lumerical" / "cache_sipho").mkdir(parents=True)
+
+    api = API()
+    prefetcher = Prefetcher(api, idle_delay=0.0)
+    worker = prefetcher.worker
+    solving = threading.Event()
+    events = []
+
+    # a neff solve writing the same table the foreground run writes
+    def prefetch_solve():
+        writer = NeffWriter(NEFF_PATH)
+        solving.set()
+        try:
+            for v in range(1000):
+                worker.interrupt()
+                writer.write(v, 1.0)
+                time.sleep(0.01)
+        except Exception:
+            writer.abort()
+            events.append('prefetch aborted')
+            raise
+        return writer.close()
+
+    def foreground_interconnect(inputs, files, results_file, session=None):
+        events.append('run started')
+        writer = NeffWriter(NEFF_PATH)
+        for v in range(5):
+            writer.write(v, 2.0)
+            time.sleep(0.02)
+        writer.close()
+        np.savez(results_file, OSA_1__signal=np.zeros(3))
+
+    monkeypatch.setattr(telemetry, 'load_records', lambda *args, **kwargs: [])
+    monkeypatch.setattr(worker, 'load_cache', lambda: None)
+    monkeypatch.setattr(worker, 'get_param_suggestions', lambda: {
+        'laser_wavelength': 1.55e-6, 'wavelength_window': 1e-9, 'min_v': 0, 'max_v': 1, 'interval_v': 0.1})
+    monkeypatch.setattr(worker, 'get_heat_sim', prefetch_solve)
+    monkeypatch.setattr(api, 'get_stage_files', lambda: {})
+    monkeypatch.setattr(interface, 'interconnect', foreground_interconnect)
+
+    def prefetch():
+        try:
+            prefetcher.prefetch_round()
+        except Preempted:
+            pass
+
+    thread = threading.Thread(target=prefetch)
+    thread.start()
+    assert solving.wait(5)
+    api.run({'source_wavelength': 1.55e-6, 'min_v': 0, 'max_v': 1, 'interval_v': 0.1,
+             'output_dir': str(tmp_path / "results")})
+    thread.join(5)
+
+    assert events == ['prefetch aborted', 'run started']
+    assert np.loadtxt(NEFF_PATH)[:, 1].tolist() == [2.0] * 5
@@ -0,0 +1,61 @@
+import numpy as np
+
+from API import replay
+from API.main import API
+from Lumerical import interface
+
+STAGES = ['heat', 'passivebentwg', 'activebentwg', 'effective_index']
+
+
+def test_replay_round_trip_with_element_bindings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = tmp_path / "Lumerical" / "cache_sipho"
+    cache.mkdir(parents=True)
+    files = {}
+    for stage in STAGES:
+        files[stage] = str(cache / f"{stage}.txt")
+        open(files[stage], "w").close()
+
+    def run_interconnect(inputs, files, results_file, session=None):
+        np.savez(results_file, OSA_1__signal=np.arange(4.0))
+
+    api = API()
+    monkeypatch.setattr(api, 'get_stage_files', lambda: dict(files))
+    monkeypatch.setattr(interface, 'interconnect', run_interconnect)
+
+    inputs = {
+        'source_wavelength': 1.55e-6, 'start_wavelength': 1.54e-6, 'end_wavelength': 1.56e-6,
+        'min_v': 0, 'max_v': 1, 'interval_v': 0.1,
+        'element_bindings': {'effective_index': ('WG_1', 'load from file'), 'heat': ('HT_1', 'filename')},
+        'output_dir': str(tmp_path / "results"),
+        'progress': lambda: None,
+    }
+    result = api.run(inputs)
+
+    manifest = replay.load_manifest(result['manifest'])
+    assert manifest['inputs']['element_bindings'] == {'effective_index': ['WG_1', 'load from file'],
+                                                     'heat': ['HT_1', 'filename']}
+    assert 'progress' not in manifest['inputs']
+    assert replay.interconnect_key('sipho', manifest['inputs']) == manifest['key']
+
+    replayed = API().replay_run(result['manifest'])
+    assert replayed['files'] == {**files, 'interconnect': replayed['files']['interconnect']}
+    np.testing.assert_array_equal(replayed['results']['OSA_1__signal'], np.arange(4.0))
+
+
+def test_replay_uses_recorded_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Lumerical" / "cache_sipho").mkdir(parents=True)
+    results_file = str(tmp_path / "kept.npz")
+    np.savez(results_file, OSA_1__signal=np.ones(2))
+
+    inputs = {'source_wavelength': 1.55e-6, 'start_wavelength': 1.54e-6, 'end_wavelength': 1.56e-6,
+              'min_v': 0, 'max_v': 1, 'interval_v': 0.1}
+    files = {}
+    for stage in STAGES:
+        files[stage] = str(tmp_path / f"{stage}.txt")
+        open(files[stage], "w").close()
+    manifest = replay.write_manifest(str(tmp_path), 'sipho', inputs, files, results_file)
+
+    replayed = API().replay_run(manifest)
+    np.testing.assert_array_equal(replayed['results']['OSA_1__signal'], np.ones(2))
@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+
+from Analysis.resonance_fit import fit_resonances
+
+PEAK1 = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Extras", "sweep_data", "peak1")
+
+
+def test_extinction_ratio_of_a_clean_peak():
+    wavelength = np.linspace(1549e-9, 1551e-9, 401)
+    spectrum = 0.01 + 1.0 / (1 + ((wavelength - 1550e-9) / 0.05e-9) ** 2)
+    fit = fit_resonances(wavelength, spectrum)
+    assert fit['extinction_fitted']
+    np.testing.assert_allclose(fit['extinction_ratio'], 10 * np.log10(1.01 / 0.01), atol=0.05)
+
+
+def test_extinction_ratio_without_positive_baseline():
+    # the fitted floor of this measurement is below zero
+    wavelength = np.load(os.path.join(PEAK1, "wavelength.npy"))
+    for kind, name in (('peak', "drop_transmission.npy"), ('dip', "thru_transmission.npy")):
+        spectrum = np.load(os.path.join(PEAK1, name))
+        fit = fit_resonances(wavelength, spectrum, kind=kind, units='dBm')
+        assert not fit['extinction_fitted']
+        assert 0 < fit['extinction_ratio'] <= np.ptp(spectrum) + 1e-9
+
+
+def test_extinction_ratio_nan_without_positive_power():
+    wavelength = np.linspace(1549e-9, 1551e-9, 401)
+    spectrum = 1.0 / (1 + ((wavelength - 1550e-9) / 0.05e-9) ** 2) - 0.5
+    fit = fit_resonances(wavelength, spectrum)
+    assert not fit['extinction_fitted']
+    assert np.isnan(fit['extinction_ratio'])
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from Analysis.resonance_tracking import track_resonances
+
+
+def ring_sweep(n_voltages, shift, span=(1540e-9, 1560e-9), fsr=9.08e-9, fwhm=0.1e-9):
+    """Lorentzian resonances of a ring whose optical length grows with heater power"""
+    wavelength = np.linspace(*span, 4001)
+    group_length = 1550e-9 ** 2 / fsr
+    voltage = np.linspace(0, 3, n_voltages)
+    length = group_length * (1 + shift / 1550e-9 * voltage ** 2 / 9)
+    orders = np.round(group_length / 1550e-9) + np.arange(-5, 6)
+    resonances = length[:, None] / orders[None, :]
+    spectra = np.sum(1 / (1 + ((wavelength[None, None, :] - resonances[..., None]) / (fwhm / 2)) ** 2), axis=1)
+    return voltage, wavelength, spectra
+
+
+@pytest.mark.parametrize('n_voltages', [20, 200, 1000])
+def test_shift_does_not_depend_on_sampling(n_voltages):
+    voltage, wavelength, spectra = ring_sweep(n_voltages, 3.30e-9)
+    result = track_resonances(voltage, wavelength, spectra)
+    assert result['shift'][-1] == pytest.approx(3.30e-9, abs=0.02e-9)
+
+
+def test_single_resonance_window_wraps():
+    voltage, wavelength, spectra = ring_sweep(100, 20e-9, span=(1546e-9, 1554e-9))
+    result = track_resonances(voltage, wavelength, spectra, fsr=9.08e-9)
+    assert result['shift'][-1] == pytest.approx(20e-9, abs=0.2e-9)